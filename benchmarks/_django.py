@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup(database_url="sqlite:///:memory:", migrate=True):
+    # Benchmarks run against a throwaway database unless DATABASE_URL is set.
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "medical_admin.settings")
+    os.environ.setdefault("DATABASE_URL", database_url)
+
+    import django
+
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0, interactive=False)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def report(name, stats):
+    parts = ", ".join(f"{key}={value:.2f}" for key, value in stats.items())
+    print(f"{name:<40} {parts}")
@@ -0,0 +1,87 @@
+"""Step-4 account update: legacy view logic vs provision_doctor_account.
+
+    python -m benchmarks.bench_account_provisioning [repeat]
+"""
+
+import sys
+import uuid
+
+from benchmarks._django import report, setup, timed
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from medflex.models import Doctor  # noqa: E402
+from medflex.serializers import DoctorUserNamePasswordSerializer  # noqa: E402
+from medflex.services import provision_doctor_account  # noqa: E402
+
+PASSWORD = "Secret@123"
+
+
+def make_doctor():
+    suffix = uuid.uuid4().hex[:12]
+    return Doctor.objects.create(
+        first_name="Bench",
+        last_name="Doctor",
+        age=40,
+        gender="male",
+        create_id=suffix,
+        email=f"{suffix}@example.com",
+        mobile_number=str(uuid.uuid4().int)[:12],
+        blood_group="O+",
+    )
+
+
+def legacy(doctor):
+    data = {
+        "user_name": f"user_{doctor.create_id}",
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    }
+    serializer = DoctorUserNamePasswordSerializer(doctor, data=data, partial=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    user, created = User.objects.get_or_create(email=doctor.email)
+    if created:
+        user.set_password(PASSWORD)
+        user.username = doctor.user_name
+        user.first_name = doctor.first_name
+        user.last_name = doctor.last_name
+        user.save()
+    if user:
+        user.set_password(PASSWORD)
+        user.username = doctor.user_name
+        user.save()
+
+
+def unified(doctor):
+    data = {
+        "user_name": f"user_{doctor.create_id}",
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    }
+    serializer = DoctorUserNamePasswordSerializer(doctor, data=data, partial=True)
+    serializer.is_valid(raise_exception=True)
+    provision_doctor_account(
+        doctor, serializer.validated_data["user_name"], serializer.validated_data["password"]
+    )
+
+
+def run(name, flow, repeat):
+    doctors = [make_doctor() for _ in range(repeat)]
+    queue = iter(doctors)
+    stats = timed(lambda: flow(next(queue)), repeat)
+    with CaptureQueriesContext(connection) as ctx:
+        flow(make_doctor())
+    stats["queries"] = len(ctx.captured_queries)
+    report(name, stats)
+    User.objects.all().delete()
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    run("legacy step 4 (new user)", legacy, repeat)
+    run("provision_doctor_account (new user)", unified, repeat)
@@ -0,0 +1,136 @@
+"""Sync WSGI vs async ASGI doctor endpoints under many concurrent clients.
+
+python -m benchmarks.bench_asgi [clients] [requests_per_client] [workers]
+
+Starts gunicorn with sync workers on the WSGI app and with uvicorn workers
+on the ASGI app (the two Procfile web profiles), against a throwaway SQLite
+file, and replays the same Bearer-authenticated GETs against each.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+DATABASE_URL = "sqlite:////tmp/medflex_bench_asgi.db"
+
+from benchmarks._django import BASE_DIR, report, setup  # noqa: E402
+
+if os.path.exists(DATABASE_URL[10:]):
+    os.remove(DATABASE_URL[10:])
+setup(DATABASE_URL)
+
+from django.contrib.auth.models import User  # noqa: E402
+
+from medflex.authentication import issue_tokens  # noqa: E402
+from medflex.models import Doctor  # noqa: E402
+
+PROFILES = {
+    "wsgi sync": ["medical_admin.wsgi"],
+    "asgi async": [
+        "medical_admin.asgi:application",
+        "-k",
+        "uvicorn.workers.UvicornWorker",
+    ],
+}
+PATHS = {
+    "wsgi sync": "/doctor/api/?per_page=20",
+    "asgi async": "/doctor/api/async/?per_page=20",
+}
+
+
+def seed(count=200):
+    Doctor.objects.bulk_create(
+        Doctor(
+            first_name=f"Doc{i}",
+            last_name="Bench",
+            age=40,
+            gender="male",
+            create_id=f"B{i}",
+            email=f"doc{i}@example.com",
+            mobile_number=f"{i:010d}",
+            blood_group="O+",
+        )
+        for i in range(count)
+    )
+    user = User.objects.create_user(username="bench", email="bench@example.com")
+    return issue_tokens(user)["access"]
+
+
+async def fetch(port, path, token):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET {path} HTTP/1.0\r\nHost: localhost\r\n"
+        f"Authorization: Bearer {token}\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status = (await reader.readline()).split()[1]
+    await reader.read()
+    writer.close()
+    return status == b"200"
+
+
+async def client(port, path, token, count, latencies, errors):
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            ok = await fetch(port, path, token)
+        except OSError:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors[0] += not ok
+
+
+async def load(port, path, token, clients, per_client):
+    latencies, errors = [], [0]
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(port, path, token, per_client, latencies, errors)
+            for _ in range(clients)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "req_per_s": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "errors": errors[0],
+    }
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(asyncio.open_connection("127.0.0.1", port))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    workers = sys.argv[3] if len(sys.argv) > 3 else str(os.cpu_count())
+    token = seed()
+    env = {**os.environ, "DATABASE_URL": DATABASE_URL}
+
+    for port, (name, target) in enumerate(PROFILES.items(), start=8701):
+        server = subprocess.Popen(
+            ["gunicorn", *target, "-w", workers, "-b", f"127.0.0.1:{port}"]
+            + ["--backlog", "2048", "--log-level", "warning"],
+            cwd=BASE_DIR,
+            env=env,
+        )
+        try:
+            wait_for(port)
+            asyncio.run(load(port, PATHS[name], token, 10, 1))
+            stats = asyncio.run(load(port, PATHS[name], token, clients, per_client))
+            report(f"{name} ({clients} clients)", stats)
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,128 @@
+"""Request latency and connection churn with and without persistent connections.
+
+python -m benchmarks.bench_db_connections [requests]
+
+The WSGI runs show what persistent connections save; the ASGI runs show
+that they are not reused there, because every request does its database
+work on a fresh thread, and count the connections each setting leaves open.
+
+Runs against DATABASE_URL when set (point it at PostgreSQL/MySQL to see the
+TLS and auth handshake), otherwise a throwaway SQLite file.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from benchmarks._django import report, setup, timed
+
+DATABASE_FILE = "/tmp/medflex_bench_db.sqlite3"
+if "DATABASE_URL" not in os.environ and os.path.exists(DATABASE_FILE):
+    os.remove(DATABASE_FILE)
+setup(f"sqlite:///{DATABASE_FILE}")
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncRequestFactory, RequestFactory  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from medflex.authentication import issue_tokens  # noqa: E402
+from medflex.db_metrics import connection_stats, reset_connection_stats  # noqa: E402
+
+
+def request(handler, environ):
+    # Go through the real WSGI handler: the test Client disconnects
+    # close_old_connections, which would hide the churn being measured.
+    response = handler(dict(environ), lambda status, headers: None)
+    b"".join(response)
+    response.close()
+
+
+def run(name, environ, conn_max_age, repeat):
+    handler = WSGIHandler()
+    connection.close()
+    connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    reset_connection_stats()
+    stats = timed(lambda: request(handler, environ), repeat)
+    stats["conn_per_req"] = connection_stats()["connections_per_request"]
+    report(name, stats)
+
+
+async def asgi_requests(handler, scope, repeat, samples):
+    async def send(message):
+        pass
+
+    for _ in range(repeat):
+        # The body, then nothing until Django stops listening for a disconnect.
+        messages = asyncio.Queue()
+        messages.put_nowait({"type": "http.request", "body": b""})
+        start = time.perf_counter()
+        await handler(dict(scope), messages.get, send)
+        samples.append(time.perf_counter() - start)
+
+
+def run_asgi(name, scope, conn_max_age, repeat):
+    # One event loop for the whole run, as in a uvicorn worker; each request
+    # gets its own ThreadSensitiveContext and so its own worker thread.
+    opened = []
+
+    def track(sender, connection, **kwargs):
+        opened.append(connection.connection)
+
+    connection_created.connect(track)
+    connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    reset_connection_stats()
+    samples = []
+    asyncio.run(asgi_requests(ASGIHandler(), scope, repeat, samples))
+    connection_created.disconnect(track)
+    samples.sort()
+    stats = {
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "conn_per_req": connection_stats()["connections_per_request"],
+        "left_open": sum(still_open(conn) for conn in opened),
+    }
+    report(name, stats)
+
+
+def still_open(conn):
+    try:
+        conn.total_changes
+    except Exception:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    user = User.objects.get_or_create(username="bench", email="bench@example.com")[0]
+    environ = (
+        RequestFactory()
+        .get(
+            "/doctor/api/",
+            HTTP_AUTHORIZATION=f"Bearer {issue_tokens(user)['access']}",
+        )
+        .environ
+    )
+
+    # No cache, so every request reads the page from the database.
+    dummy_cache = {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    }
+    with override_settings(ALLOWED_HOSTS=["testserver"], CACHES=dummy_cache):
+        run("CONN_MAX_AGE=0 (before)", environ, 0, repeat)
+        run("CONN_MAX_AGE=600 + health checks", environ, 600, repeat)
+        scope = (
+            AsyncRequestFactory()
+            .get(
+                "/doctor/api/async/",
+                headers={"Authorization": f"Bearer {issue_tokens(user)['access']}"},
+            )
+            .scope
+        )
+        run_asgi("asgi CONN_MAX_AGE=600", scope, 600, repeat)
+        run_asgi("asgi CONN_MAX_AGE=0 (DJANGO_ASGI)", scope, 0, repeat)
@@ -0,0 +1,50 @@
+"""Login throughput through django.contrib.auth.authenticate().
+
+    python -m benchmarks.bench_login [users] [attempts]
+
+Uses the MD5 hasher so the numbers reflect lookup cost rather than PBKDF2.
+"""
+
+import sys
+import time
+
+from benchmarks._django import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import authenticate  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+
+settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def seed(count):
+    encoded = make_password("Secret@123")
+    User.objects.bulk_create(
+        User(username=f"user{i}", email=f"user{i}@example.com", password=encoded)
+        for i in range(count)
+    )
+
+
+def throughput(name, emails, password):
+    start = time.perf_counter()
+    for email in emails:
+        authenticate(None, email=email, password=password)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {len(emails) / elapsed:>10.0f} logins/s")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    attempts = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    seed(users)
+    known = [f"USER{i % users}@example.com" for i in range(attempts)]
+    unknown = [f"ghost{i % 50}@example.com" for i in range(attempts)]
+
+    throughput("known email, valid password", known, "Secret@123")
+    throughput("known email, wrong password", known, "wrong")
+    cache.clear()
+    throughput("unknown email (50 distinct)", unknown, "wrong")
@@ -0,0 +1,39 @@
+"""Per-request overhead of the middleware stack on Bearer JSON endpoints.
+
+python -m benchmarks.bench_middleware [requests]
+
+"full stack" disables LEAN_API_PREFIXES so every middleware runs, as it did
+before the route-aware wrappers.
+"""
+
+import sys
+
+from benchmarks._django import report, setup, timed
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from medflex.authentication import issue_tokens  # noqa: E402
+
+ENDPOINTS = ["/doctor/api/", "/login-stats/"]
+
+
+def run(name, client, repeat):
+    for path in ENDPOINTS:
+        assert client.get(path).status_code == 200
+        report(f"{name} {path}", timed(lambda: client.get(path), repeat))
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    user = User.objects.create_user(username="bench", email="bench@example.com")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(user)['access']}")
+
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        with override_settings(LEAN_API_PREFIXES=[]):
+            run("full stack", client, repeat)
+        run("lean", client, repeat)
@@ -0,0 +1,53 @@
+"""Bulk onboarding: password hashing throughput per worker process count.
+
+python -m benchmarks.bench_onboarding [users]
+"""
+
+import sys
+
+from benchmarks._django import report, setup, timed
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+
+from medflex.onboarding import (  # noqa: E402
+    available_cores,
+    hash_passwords,
+    onboard_users,
+)
+
+
+def worker_counts():
+    cores = available_cores()
+    counts, workers = [], 1
+    while workers < cores:
+        counts.append(workers)
+        workers *= 2
+    return counts + [cores]
+
+
+def rows(users):
+    return [
+        {
+            "username": f"bench_{i}",
+            "email": f"bench_{i}@example.com",
+            "password": f"Secret@{i:04d}",
+        }
+        for i in range(users)
+    ]
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    passwords = [row["password"] for row in rows(users)]
+
+    for workers in worker_counts():
+        stats = timed(lambda: hash_passwords(passwords, workers), 1)
+        stats["users_per_s"] = users / (stats["mean_ms"] / 1000)
+        report(f"hash_passwords workers={workers}", stats)
+
+    stats = timed(lambda: onboard_users(rows(users)), 1)
+    stats["users_per_s"] = users / (stats["mean_ms"] / 1000)
+    report(f"onboard_users workers={available_cores()}", stats)
+    User.objects.all().delete()
@@ -0,0 +1,73 @@
+"""Per-worker LocMemCache against the shared memory-mapped cache.
+
+python -m benchmarks.bench_shared_cache [workers] [pages]
+
+Each worker process reads every directory page once, building it on a miss;
+the hit ratio shows how much of that work the workers share.
+"""
+
+import glob
+import multiprocessing
+import os
+import sys
+
+from benchmarks._django import report, setup, timed
+
+setup(migrate=False)
+
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from medflex.shared_cache import SharedMemoryCache  # noqa: E402
+
+PATH = "/tmp/medflex_bench_shared_cache"
+PAGE = {"doctors": [{"id": f"B{i}", "name": f"Doc{i} Bench"} for i in range(50)]}
+
+
+def make(kind):
+    if kind == "locmem":
+        return LocMemCache("bench", {})
+    return SharedMemoryCache(PATH, {})
+
+
+def read_pages(kind, pages, results):
+    cache = make(kind)
+    hits = 0
+    for page in range(pages):
+        key = f"directory:{page}"
+        if cache.get(key) is None:
+            cache.set(key, PAGE)
+        else:
+            hits += 1
+    results.put(hits)
+
+
+def hit_ratio(kind, workers, pages):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [
+        context.Process(target=read_pages, args=(kind, pages, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    hits = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return hits / (workers * pages)
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for path in glob.glob(f"{PATH}-*"):
+        os.remove(path)
+
+    for kind in ("locmem", "shared"):
+        cache = make(kind)
+        cache.set("page", PAGE)
+        stats = timed(lambda: cache.get("page"), 5000)
+        stats["set_p50_ms"] = timed(lambda: cache.set("page", PAGE), 5000)["p50_ms"]
+        stats["hit_ratio"] = hit_ratio(kind, workers, pages)
+        report(f"{kind} get", stats)
+    for path in glob.glob(f"{PATH}-*"):
+        os.remove(path)
@@ -0,0 +1,117 @@
+"""Directory page rebuilds after a cache miss or a write.
+
+python -m benchmarks.bench_single_flight [concurrency] [doctors]
+"""
+
+import os
+import sys
+import threading
+import time
+
+from benchmarks._django import report, setup, timed
+
+DATABASE_FILE = "/tmp/medflex_bench_single_flight.sqlite3"
+if os.path.exists(DATABASE_FILE):
+    os.remove(DATABASE_FILE)
+setup(f"sqlite:///{DATABASE_FILE}")
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from medflex import directory  # noqa: E402
+from medflex.directory import bump_directory_version  # noqa: E402
+from medflex.models import Doctor  # noqa: E402
+from medflex.single_flight import (  # noqa: E402
+    reset_single_flight_stats,
+    single_flight_stats,
+)
+
+builds = []
+build_list_payload = directory.build_list_payload
+
+
+def counted_build(params):
+    builds.append(1)
+    return build_list_payload(params)
+
+
+def burst(fetch, concurrency):
+    def worker():
+        fetch(directory.parse_list_params({"per_page": "50"}))
+        connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def first_after_write(params, revalidate, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        # Let the previous background refresh finish so it doesn't compete
+        # with the measured request for the GIL.
+        for thread in threading.enumerate():
+            if thread.name == "cache-revalidate":
+                thread.join()
+        bump_directory_version()
+        start = time.perf_counter()
+        directory.read_list_payload(params, revalidate)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def run(name, fetch, concurrency, expire, repeat=5):
+    builds.clear()
+    reset_single_flight_stats()
+
+    def cold_burst():
+        expire()
+        burst(fetch, concurrency)
+
+    stats = timed(cold_burst, repeat)
+    stats["builds_per_burst"] = len(builds) / repeat
+    report(name, stats)
+    print(f"{'':<40} {single_flight_stats()}")
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    doctors = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    Doctor.objects.bulk_create(
+        Doctor(
+            first_name=f"Doc{i}",
+            last_name="Bench",
+            age=40,
+            gender="male",
+            create_id=f"B{i}",
+            email=f"doc{i}@example.com",
+            mobile_number=f"{i:010d}",
+            blood_group="O+",
+        )
+        for i in range(doctors)
+    )
+    directory.build_list_payload = counted_build
+
+    run("uncached (before)", counted_build, concurrency, cache.clear)
+    # An empty cache makes everyone wait for the one rebuild; after a write
+    # the others serve the previous page instead.
+    cached = directory.read_list_payload
+    run("single-flight, cold cache", cached, concurrency, cache.clear)
+    run("single-flight, after a write", cached, concurrency, bump_directory_version)
+    run(
+        "stale-while-revalidate, after a write",
+        lambda params: cached(params, revalidate=True),
+        concurrency,
+        bump_directory_version,
+    )
+    # The first request after a write is the one that used to pay the rebuild.
+    params = directory.parse_list_params({"per_page": "50"})
+    for name, revalidate in (("rebuild", False), ("stale-while-revalidate", True)):
+        report(f"after a write, {name}", first_after_write(params, revalidate))
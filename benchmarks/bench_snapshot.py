@@ -0,0 +1,124 @@
+"""Directory pages from the ORM against the in-memory snapshot.
+
+python -m benchmarks.bench_snapshot [doctors]
+
+Seeding a million doctors into SQLite takes a few minutes; pass a smaller
+count for a quick run.
+"""
+
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import time as clock
+
+from benchmarks._django import report, setup, timed
+
+DATABASE_FILE = "/tmp/medflex_bench_snapshot.sqlite3"
+SNAPSHOT_PATH = "/tmp/medflex_bench_snapshot"
+if os.path.exists(DATABASE_FILE):
+    os.remove(DATABASE_FILE)
+shutil.rmtree(SNAPSHOT_PATH, ignore_errors=True)
+setup(f"sqlite:///{DATABASE_FILE}")
+
+from django.conf import settings  # noqa: E402
+
+from medflex.directory import build_list_payload, parse_list_params  # noqa: E402
+from medflex.models import Doctor, DoctorAvailability  # noqa: E402
+from medflex.snapshot import DirectorySnapshot, build_snapshot  # noqa: E402
+
+FIRST_NAMES = [
+    f"{a}{b}"
+    for a in ("Al", "Be", "Ca", "Da", "El", "Fa", "Jo", "Ma")
+    for b in ("n", "x", "ra", "lie", "ssa", "ton")
+]
+LAST_NAMES = [
+    f"{a}{b}"
+    for a in ("Smi", "Joh", "Bro", "Tay", "Wil", "Lee", "Mar", "Gar", "Ro", "Kha")
+    for b in ("th", "nson", "wn", "lor", "liams", "ng", "tin", "cia", "ss", "n")
+]
+CITIES = [f"City{i}" for i in range(300)]
+QUERIES = {
+    "first page by first_name": {},
+    "page 400 by city, desc": {"sort_by": "city", "order": "desc", "page": "400"},
+    "last page by updated_at": {"sort_by": "updated_at", "page": "-1"},
+    "search 'son', page 3": {"search": "son", "page": "3"},
+    "search 'zzz' (no match)": {"search": "zzz"},
+}
+
+
+def seed(count):
+    rng = random.Random(7)
+    for start in range(0, count, 20000):
+        batch = Doctor.objects.bulk_create(
+            Doctor(
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                age=rng.randint(25, 70),
+                gender="male",
+                create_id=f"B{i}",
+                email=f"doc{i}@example.com",
+                mobile_number=f"{i:010d}",
+                blood_group="O+",
+                designation=rng.choice(["doctor", "hod", None]),
+                city=rng.choice(CITIES),
+            )
+            for i in range(start, min(start + 20000, count))
+        )
+        DoctorAvailability.objects.bulk_create(
+            DoctorAvailability(
+                doctor=doctor,
+                day_of_week=rng.choice(["monday", "tuesday", "friday"]),
+                start_time=clock(rng.randint(8, 11)),
+                end_time=clock(rng.randint(14, 18)),
+            )
+            for doctor in batch
+        )
+
+
+def params_for(query, count):
+    query = dict(query)
+    if query.get("page") == "-1":
+        query["page"] = str(-(-count // 10))
+    return parse_list_params(query)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    start = time.perf_counter()
+    seed(count)
+    print(f"seeded {count} doctors in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    snapshot = build_snapshot("bench")
+    print(f"snapshot built in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    snapshot.save(SNAPSHOT_PATH)
+    print(f"snapshot saved in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    snapshot = DirectorySnapshot.load(SNAPSHOT_PATH)
+    print(f"snapshot loaded in {time.perf_counter() - start:.2f}s")
+
+    settings.DIRECTORY_SNAPSHOT = False
+    for name, query in QUERIES.items():
+        params = params_for(query, count)
+        report(f"orm: {name}", timed(lambda: build_list_payload(params), 5))
+        report(f"snapshot: {name}", timed(lambda: snapshot.list_payload(params), 20))
+
+    # Every row was just seeded, so the usual look-back would refetch all.
+    settings.DIRECTORY_SNAPSHOT_OVERLAP_SECONDS = 0
+    doctor = Doctor.objects.order_by("?").first()
+    samples = []
+    for _ in range(5):
+        doctor.first_name = random.choice(FIRST_NAMES)
+        doctor.save()
+        start = time.perf_counter()
+        snapshot.refreshed("bench-edit")
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    report(
+        "snapshot: refresh after one edit",
+        {"p50_ms": samples[2] * 1000, "max_ms": samples[-1] * 1000},
+    )
+    shutil.rmtree(SNAPSHOT_PATH, ignore_errors=True)
@@ -0,0 +1,125 @@
+"""Wizard availability steps: per-row autocommit writes vs one batched commit.
+
+python -m benchmarks.bench_wizard_steps [repeat]
+
+"commits" counts explicit COMMITs plus writes issued in autocommit mode,
+each of which the database commits (and fsyncs) on its own.
+"""
+
+import sys
+import uuid
+
+from benchmarks._django import report, setup, timed
+
+setup()
+
+from django.db import connection, transaction  # noqa: E402
+
+from medflex.models import Doctor, DoctorAvailability  # noqa: E402
+from medflex.serializers import (  # noqa: E402
+    DoctorAvailabilitySerializer,
+    UpdateDoctorAvailabilitySerializer,
+)
+from medflex.services import upsert_availabilities  # noqa: E402
+
+WEEK = [
+    {"day_of_week": day, "start_time": "09:00", "end_time": "17:00"}
+    for day in DoctorAvailability.DaysOfWeek.values
+]
+EDITED = [{**item, "start_time": "10:00"} for item in WEEK]
+
+
+class Counter:
+    def __init__(self):
+        self.statements = self.commits = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        verb = sql.lstrip().split(None, 1)[0].upper()
+        if verb != "BEGIN":
+            self.statements += 1
+        if not connection.in_atomic_block and verb not in ("SELECT", "BEGIN"):
+            self.commits += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._commit = connection.commit
+
+        def commit():
+            self.commits += 1
+            self._commit()
+
+        connection.commit = commit
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._wrapper.__exit__(*exc)
+        connection.commit = self._commit
+
+
+def make_doctor():
+    suffix = uuid.uuid4().hex[:12]
+    return Doctor.objects.create(
+        first_name="Bench",
+        last_name="Doctor",
+        age=40,
+        gender="male",
+        create_id=suffix,
+        email=f"{suffix}@example.com",
+        mobile_number=str(uuid.uuid4().int)[:12],
+        blood_group="O+",
+    )
+
+
+def legacy_create(doctor):
+    DoctorAvailability.objects.filter(doctor=doctor).delete()
+    for item in WEEK:
+        serializer = DoctorAvailabilitySerializer(data=item, context={"doctor": doctor})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+
+def batched_create(doctor):
+    serializer = DoctorAvailabilitySerializer(
+        data=WEEK, many=True, context={"doctor": doctor}
+    )
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        DoctorAvailability.objects.filter(doctor=doctor).delete()
+        serializer.save()
+
+
+def legacy_edit(doctor):
+    existing = {a.day_of_week: a for a in doctor.availabilities.all()}
+    for item in EDITED:
+        serializer = UpdateDoctorAvailabilitySerializer(
+            existing[item["day_of_week"]], data=item, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+
+def batched_edit(doctor):
+    upsert_availabilities(doctor, EDITED, UpdateDoctorAvailabilitySerializer)
+
+
+def run(name, flow, prepare, repeat):
+    doctors = [make_doctor() for _ in range(repeat + 1)]
+    for doctor in doctors:
+        prepare(doctor)
+    queue = iter(doctors)
+    with Counter() as counter:
+        flow(next(queue))
+    stats = timed(lambda: flow(next(queue)), repeat)
+    stats["statements"] = counter.statements
+    stats["commits"] = counter.commits
+    report(name, stats)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    run("create step 3, per row", legacy_create, lambda d: None, repeat)
+    run("create step 3, batched", batched_create, lambda d: None, repeat)
+    run("edit step 3, per row", legacy_edit, legacy_create, repeat)
+    run("edit step 3, batched", batched_edit, legacy_create, repeat)
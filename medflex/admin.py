@@ -1,9 +1,22 @@
 from django.contrib import admin
 
-from .models import Doctor, DoctorAvailability, LoginLogs
+from .models import (
+    AvailabilityDigest,
+    Doctor,
+    DoctorAvailability,
+    LoginLogDailySummary,
+    LoginLogs,
+    OutboundEmail,
+)
 
 admin.site.register(LoginLogs)
 
+admin.site.register(LoginLogDailySummary)
+
 admin.site.register(Doctor)
 
 admin.site.register(DoctorAvailability)
+
+admin.site.register(OutboundEmail)
+
+admin.site.register(AvailabilityDigest)
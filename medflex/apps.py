@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MedflexConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "medflex"
+
+    def ready(self):
+        from . import db_metrics, doctor_cache, social  # noqa: F401
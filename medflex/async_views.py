@@ -0,0 +1,97 @@
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from rest_framework import exceptions
+
+from .authentication import JWTAuthentication, has_bearer_token
+from .directory import (
+    DirectoryQueryError,
+    parse_list_params,
+    read_list_payload,
+    schedule_payload,
+)
+from .models import Doctor
+from .single_flight import set_cache_headers
+
+
+def unauthorized(detail):
+    response = JsonResponse({"detail": detail}, status=401)
+    response["WWW-Authenticate"] = JWTAuthentication().authenticate_header(None)
+    return response
+
+
+def async_api_view(view):
+    # DRF's APIView only dispatches to sync handlers, so the async endpoints
+    # are plain Django views that authenticate the same two ways: a Bearer
+    # token, or the session user from AuthenticationMiddleware.
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return JsonResponse(
+                {"detail": f'Method "{request.method}" not allowed.'}, status=405
+            )
+        if has_bearer_token(request):
+            try:
+                user, claims = JWTAuthentication().authenticate(request)
+            except exceptions.AuthenticationFailed as exc:
+                return unauthorized(str(exc.detail))
+            username = claims["username"]
+        else:
+            user = await request.auser()
+            if not user.is_authenticated:
+                return unauthorized("Authentication credentials were not provided.")
+            username = user.get_username()
+        request.api_username = username
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@async_api_view
+async def doctor_list(request):
+    try:
+        params = parse_list_params(request.GET)
+        # The page comes from the same cache as the sync endpoint, built or
+        # read in a single thread hop instead of one per query.
+        result = await sync_to_async(read_list_payload)(params, revalidate=True)
+    except DirectoryQueryError as exc:
+        return JsonResponse({"error": exc.message}, status=exc.status_code)
+
+    response = set_cache_headers(JsonResponse(result.value), result)
+    patch_cache_control(
+        response,
+        private=True,
+        max_age=settings.DIRECTORY_CACHE_TTL,
+        stale_while_revalidate=settings.SINGLE_FLIGHT_FALLBACK_SECONDS,
+    )
+    return response
+
+
+@async_api_view
+async def doctor_schedule(request, doctor_id):
+    try:
+        doctor_uuid = uuid.UUID(str(doctor_id))
+    except ValueError:
+        return JsonResponse(
+            {"error": "Invalid doctor ID format. Must be a valid UUID."}, status=400
+        )
+    try:
+        doctor = await Doctor.objects.prefetch_related("availabilities").aget(
+            doctor_id=doctor_uuid
+        )
+    except Doctor.DoesNotExist:
+        return JsonResponse(
+            {"detail": "No Doctor matches the given query."}, status=404
+        )
+    return JsonResponse(schedule_payload(doctor))
+
+
+@async_api_view
+async def dashboard(request):
+    return JsonResponse(
+        {"message": "Welcome to the dashboard", "user": request.api_username}
+    )
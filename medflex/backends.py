@@ -1,12 +1,54 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models.functions import Upper
+
+UNKNOWN_EMAIL_CACHE_PREFIX = "medflex:auth:unknown-email:"
+
+
+def unknown_email_cache_key(email):
+    digest = hashlib.sha256(email.strip().upper().encode()).hexdigest()
+    return UNKNOWN_EMAIL_CACHE_PREFIX + digest
+
+
+def forget_unknown_email(email):
+    if email:
+        cache.delete(unknown_email_cache_key(email))
 
 
 class EmailBackend(ModelBackend):
+    @staticmethod
+    def _hash_anyway(password):
+        # Unknown emails cost one hash like real accounts do, as in
+        # ModelBackend, so response times don't reveal which emails exist.
+        User().set_password(password)
+
     def authenticate(self, request, email=None, password=None, **kwargs):
-        try:
-            user = User.objects.get(email=email)  # Find user by email
-            if user.check_password(password):  # Check if password is correct
-                return user
-        except User.DoesNotExist:
+        if email is None or password is None:
+            # Username logins (admin, allauth) are handled by the next backend.
             return None
+
+        cache_key = unknown_email_cache_key(email)
+        if cache.get(cache_key):
+            self._hash_anyway(password)
+            raise PermissionDenied
+
+        # UPPER(email) matches the functional index added in migration 0002.
+        user = (
+            User.objects.alias(email_upper=Upper("email"))
+            .filter(email_upper=email.strip().upper())
+            .order_by("pk")
+            .first()
+        )
+        if user is None:
+            cache.set(cache_key, True, settings.AUTH_UNKNOWN_EMAIL_CACHE_TTL)
+            self._hash_anyway(password)
+            raise PermissionDenied
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        # Email logins end here so ModelBackend and allauth don't repeat the lookup.
+        raise PermissionDenied
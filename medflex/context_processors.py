@@ -0,0 +1,20 @@
+from django.utils.functional import SimpleLazyObject
+
+from .doctor_cache import get_doctor_for_email
+
+
+def get_current_doctor(request):
+    # Memoised on the request like AuthenticationMiddleware's _cached_user,
+    # so every template rendered for the request shares one lookup.
+    if "_cached_current_doctor" not in vars(request):
+        user = getattr(request, "user", None)
+        email = getattr(user, "email", None) if user and user.is_authenticated else None
+        request._cached_current_doctor = (
+            get_doctor_for_email(email) if isinstance(email, str) else None
+        )
+    return request._cached_current_doctor
+
+
+def current_doctor(request):
+    # Nothing is looked up unless a template actually uses current_doctor.
+    return {"current_doctor": SimpleLazyObject(lambda: get_current_doctor(request))}
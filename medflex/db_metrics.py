@@ -0,0 +1,44 @@
+import os
+import threading
+from collections import Counter
+
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_counts = Counter()
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    with _lock:
+        _counts[f"connections:{connection.alias}"] += 1
+
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    with _lock:
+        _counts["requests"] += 1
+
+
+def connection_stats():
+    # Counters are per process: each gunicorn/uvicorn worker reports its own
+    # numbers, so connections per request shows whether reuse is working.
+    with _lock:
+        counts = dict(_counts)
+    requests = counts.pop("requests", 0)
+    opened = {key.split(":", 1)[1]: value for key, value in counts.items()}
+    return {
+        "pid": os.getpid(),
+        "requests": requests,
+        "connections_opened": opened,
+        "connections_per_request": (
+            round(sum(opened.values()) / requests, 4) if requests else None
+        ),
+    }
+
+
+def reset_connection_stats():
+    with _lock:
+        _counts.clear()
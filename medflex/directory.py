@@ -0,0 +1,171 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DOCTOR_SORT_FIELDS, Doctor
+from .single_flight import read_through
+
+DAYS_OF_WEEK = [
+    "sunday",
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+]
+
+
+DIRECTORY_VERSION_KEY = "medflex:directory:version"
+
+
+class DirectoryQueryError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def parse_list_params(params):
+    search_query = params.get("search", "")
+    sort_by = params.get("sort_by", "first_name")
+    order = params.get("order", "asc")
+
+    if sort_by not in DOCTOR_SORT_FIELDS:
+        raise DirectoryQueryError(
+            f"Invalid sort_by field: {sort_by}. Available fields: {DOCTOR_SORT_FIELDS}"
+        )
+    if order not in ["asc", "desc"]:
+        raise DirectoryQueryError("Invalid order parameter. Allowed values: asc, desc.")
+    try:
+        page = int(params.get("page", 1))
+        per_page = int(params.get("per_page", 10))
+        if page < 1 or per_page < 1:
+            raise ValueError
+    except ValueError:
+        raise DirectoryQueryError("Page and per_page must be positive integers.")
+
+    return {
+        "search": search_query,
+        "sort_by": sort_by,
+        "order": order,
+        "page": page,
+        "per_page": per_page,
+    }
+
+
+def doctor_queryset(search, sort_by, order):
+    doctors = Doctor.objects.prefetch_related("availabilities").all()
+    if search:
+        doctors = doctors.filter(
+            Q(first_name__icontains=search)
+            | Q(last_name__icontains=search)
+            | Q(designation__icontains=search)
+        )
+    # doctor_id breaks ties so pages are stable and match the
+    # (column, doctor_id) indexes in either direction.
+    prefix = "-" if order == "desc" else ""
+    return doctors.order_by(f"{prefix}{sort_by}", f"{prefix}doctor_id")
+
+
+def availability_map(availabilities):
+    # availabilities are (day_of_week, start_time, end_time) tuples.
+    days = {day: "NA" for day in DAYS_OF_WEEK}
+    for day_of_week, start_time, end_time in availabilities:
+        time_range = f"{start_time.strftime('%#I%p')}-{end_time.strftime('%#I%p')}"
+        if days[day_of_week] == "NA":
+            days[day_of_week] = time_range
+        else:
+            days[day_of_week] += f" <br> {time_range}"
+    return days
+
+
+def doctor_row(doctor):
+    return {
+        "id": doctor.create_id,
+        "name": f"{doctor.first_name} {doctor.last_name}",
+        "profile_image": doctor.update_profile.url if doctor.update_profile else None,
+        "designation": doctor.get_designation_display(),
+        "availability": availability_map(
+            (availability.day_of_week, availability.start_time, availability.end_time)
+            for availability in doctor.availabilities.all()
+        ),
+    }
+
+
+def list_payload(rows, current_page, total_pages, params):
+    return {
+        "doctors": rows,
+        "days_of_week": DAYS_OF_WEEK,
+        "current_page": current_page,
+        "total_pages": total_pages,
+        "per_page": params["per_page"],
+        "search_query": params["search"],
+        "sort_by": params["sort_by"],
+        "order": params["order"],
+    }
+
+
+def schedule_payload(doctor):
+    return {
+        "doctor_name": doctor.first_name,
+        "doctor_id": str(doctor.create_id),
+        "availabilities": [
+            {
+                "day_of_week": availability.day_of_week,
+                "start_time": availability.start_time.strftime("%H:%M"),
+                "end_time": availability.end_time.strftime("%H:%M"),
+            }
+            for availability in doctor.availabilities.all()
+        ],
+        "days_of_week": DAYS_OF_WEEK,
+    }
+
+
+def directory_version():
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:
+        version = timezone.now().isoformat()
+        if not cache.add(DIRECTORY_VERSION_KEY, version, None):
+            version = cache.get(DIRECTORY_VERSION_KEY, version)
+    return version
+
+
+def bump_directory_version():
+    # Every page is keyed by the version, so one write retires all of them.
+    cache.set(DIRECTORY_VERSION_KEY, timezone.now().isoformat(), None)
+
+
+def build_list_payload(params):
+    if settings.DIRECTORY_SNAPSHOT:
+        from .snapshot import snapshot_list_payload
+
+        payload = snapshot_list_payload(params)
+        if payload is not None:
+            return payload
+    doctors = doctor_queryset(params["search"], params["sort_by"], params["order"])
+    paginator = Paginator(doctors, params["per_page"])
+    try:
+        page_obj = paginator.page(params["page"])
+    except EmptyPage:
+        raise DirectoryQueryError("Page number out of range.", status_code=404)
+    rows = [doctor_row(doctor) for doctor in page_obj.object_list]
+    return list_payload(rows, page_obj.number, paginator.num_pages, params)
+
+
+def read_list_payload(params, revalidate=False):
+    # Returns a CacheResult; revalidate serves the previous page while a
+    # write's new version is rebuilt in the background.
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return read_through(
+        f"medflex:directory:{directory_version()}:{digest}",
+        lambda: build_list_payload(params),
+        settings.DIRECTORY_CACHE_TTL,
+        fallback_key=f"medflex:directory:last:{digest}",
+        revalidate=revalidate,
+    )
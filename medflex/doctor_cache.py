@@ -0,0 +1,168 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .directory import bump_directory_version
+from .models import Doctor, DoctorAvailability
+from .routers import primary_reads
+from .single_flight import HIT, MISS, CacheResult, read_through
+
+_lock = threading.Lock()
+_counts = Counter()
+# Cached in place of a doctor for users who have none, so they stay warm too.
+_NO_DOCTOR = "none"
+
+
+def _version_key(doctor_id):
+    return f"medflex:doctor:{doctor_id}:version"
+
+
+def _entry_key(doctor_id, version):
+    return f"medflex:doctor:{doctor_id}:{version}"
+
+
+def _last_key(doctor_id):
+    return f"medflex:doctor:{doctor_id}:last"
+
+
+def _email_key(email):
+    return "medflex:doctor:email:" + hashlib.sha256(email.encode()).hexdigest()
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+
+
+def _data_version(doctor):
+    # updated_at stays NULL until a row is first edited.
+    rows = [doctor, *doctor.availabilities.all()]
+    return max(row.updated_at or row.created_at for row in rows).isoformat()
+
+
+def _load_doctor(doctor_id):
+    return (
+        Doctor.objects.prefetch_related("availabilities")
+        .filter(doctor_id=doctor_id)
+        .first()
+    )
+
+
+def read_cached_doctor(doctor_id, revalidate=False):
+    # Entries hold the pickled doctor with its availabilities prefetched and
+    # are keyed by the doctor's current version, so a write only has to move
+    # the version pointer; readers never see the superseded entry again,
+    # except as a STALE result when revalidate is set.
+    version = cache.get(_version_key(doctor_id))
+    if version is not None:
+        # The version is read before the rows, so an entry can never be
+        # filed under a version newer than its data.
+        result = read_through(
+            _entry_key(doctor_id, version),
+            lambda: _load_doctor(doctor_id),
+            settings.DOCTOR_CACHE_TTL,
+            fallback_key=_last_key(doctor_id),
+            revalidate=revalidate,
+        )
+        _count("hits" if result.status == HIT else "misses")
+        return result
+
+    # First read of this doctor: derive the version from the rows. add()
+    # lets a concurrent write's version win over this one.
+    _count("misses")
+    with primary_reads():
+        doctor = _load_doctor(doctor_id)
+    if doctor is not None:
+        version = _data_version(doctor)
+        if cache.add(_version_key(doctor_id), version, None):
+            entry = (time.time(), doctor)
+            cache.set(_entry_key(doctor_id, version), entry, settings.DOCTOR_CACHE_TTL)
+            cache.set(
+                _last_key(doctor_id), entry, settings.SINGLE_FLIGHT_FALLBACK_SECONDS
+            )
+    return CacheResult(doctor, MISS, 0)
+
+
+def get_cached_doctor(doctor_id):
+    return read_cached_doctor(doctor_id).value
+
+
+def get_doctor_for_email(email):
+    # The header avatar only needs the doctor row, matched by exact email as
+    # Dashboard always has; no availabilities are loaded.
+    if not email:
+        return None
+    key = _email_key(email)
+    doctor = cache.get(key)
+    if doctor is None:
+        with primary_reads():
+            doctor = Doctor.objects.filter(email=email).first()
+        cache.set(key, doctor or _NO_DOCTOR, settings.DOCTOR_CACHE_TTL)
+    return doctor if isinstance(doctor, Doctor) else None
+
+
+def invalidate_doctor(doctor_id, *emails, deleted=False):
+    cache.set(_version_key(doctor_id), timezone.now().isoformat(), None)
+    bump_directory_version()
+    keys = [_email_key(email) for email in emails if email]
+    if deleted:
+        # A deleted doctor has no previous version worth serving as stale.
+        keys.append(_last_key(doctor_id))
+    cache.delete_many(keys)
+
+
+@receiver(pre_save, sender=Doctor)
+def remember_previous_email(sender, instance, update_fields=None, **kwargs):
+    # An email change has to drop the entry cached under the old address
+    # too, or that address keeps resolving to this doctor.
+    instance._previous_email = None
+    if instance._state.adding or (
+        update_fields is not None and "email" not in update_fields
+    ):
+        return
+    instance._previous_email = (
+        Doctor.objects.filter(pk=instance.pk).values_list("email", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_save, sender=DoctorAvailability)
+@receiver(post_delete, sender=DoctorAvailability)
+def invalidate_on_commit(sender, instance, signal, **kwargs):
+    doctor_id = instance.doctor_id
+    if doctor_id is None:
+        return
+    emails = ()
+    if sender is Doctor:
+        emails = (instance.email, getattr(instance, "_previous_email", None))
+    deleted = sender is Doctor and signal is post_delete
+    transaction.on_commit(
+        lambda: invalidate_doctor(doctor_id, *emails, deleted=deleted)
+    )
+
+
+def doctor_cache_stats():
+    # Per-process counters, like connection_stats(): each worker reports the
+    # lookups it served itself.
+    with _lock:
+        hits, misses = _counts["hits"], _counts["misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def reset_doctor_cache_stats():
+    with _lock:
+        _counts.clear()
@@ -0,0 +1,111 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from .models import LoginLogs
+
+logger = logging.getLogger(__name__)
+
+
+class LoginLogBuffer:
+    def __init__(self):
+        self._events = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, name, email):
+        event = LoginLogs(name=name[:50], email=email, created_at=timezone.now())
+        if not settings.LOGIN_LOG_ASYNC:
+            LoginLogs.objects.bulk_create([event])
+            return
+
+        with self._lock:
+            if len(self._events) >= settings.LOGIN_LOG_MAX_PENDING:
+                logger.warning("Login log buffer full, dropping event for %s", email)
+                return
+            self._events.append(event)
+            pending = len(self._events)
+        self._ensure_worker()
+        if pending >= settings.LOGIN_LOG_BATCH_SIZE:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            batch, self._events = self._events, []
+        if not batch:
+            return 0
+        try:
+            LoginLogs.objects.bulk_create(
+                batch, batch_size=settings.LOGIN_LOG_BATCH_SIZE
+            )
+        except DatabaseError:
+            logger.exception("Failed to write %d login log rows", len(batch))
+            with self._lock:
+                room = settings.LOGIN_LOG_MAX_PENDING - len(self._events)
+                self._events[:0] = batch[: max(room, 0)]
+            return 0
+        return len(batch)
+
+    def shutdown(self):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        with self._lock:
+            # A later record() starts a new writer.
+            self._thread = None
+        self.flush()
+
+    def _ensure_worker(self):
+        # Threads don't survive fork, so a pre-forked worker starts its own.
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="login-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _running(self):
+        return (
+            self._thread is not None
+            and self._pid == os.getpid()
+            and self._thread.is_alive()
+        )
+
+    def _run(self):
+        interval = settings.LOGIN_LOG_FLUSH_INTERVAL_MS / 1000
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                # shutdown() does the final flush on the calling thread.
+                return
+            self.flush()
+            connection.close()
+
+
+login_log_buffer = LoginLogBuffer()
+atexit.register(login_log_buffer.shutdown)
+
+
+def record_login(request, user):
+    # user_logged_in can fire more than once per request (allauth wraps
+    # django.contrib.auth.login), so only the first one is logged.
+    if request is not None:
+        if getattr(request, "_login_logged", False):
+            return
+        request._login_logged = True
+    login_log_buffer.record(user.get_full_name() or user.get_username(), user.email)
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import LoginLogDailySummary, LoginLogs, LoginRollupWatermark
+
+ROLLUP_NAME = "login_daily"
+
+
+def merge_daily_summaries(totals):
+    totals = list(totals)
+    existing = {
+        (summary.day, summary.email): summary
+        for summary in LoginLogDailySummary.objects.select_for_update().filter(
+            day__in={row["day"] for row in totals},
+            email__in={row["email"] for row in totals},
+        )
+    }
+    to_create, to_update = [], []
+    for row in totals:
+        summary = existing.get((row["day"], row["email"]))
+        if summary is None:
+            to_create.append(
+                LoginLogDailySummary(
+                    day=row["day"],
+                    email=row["email"],
+                    name=row["display_name"],
+                    login_count=row["logins"],
+                )
+            )
+        else:
+            summary.login_count += row["logins"]
+            to_update.append(summary)
+    LoginLogDailySummary.objects.bulk_create(to_create)
+    LoginLogDailySummary.objects.bulk_update(to_update, ["login_count"])
+
+
+@transaction.atomic
+def rollup_batch(batch_size):
+    # Rows are taken in (created_at, pk) order, and only once they are older
+    # than LOGIN_ROLLUP_LAG_SECONDS. Buffered rows from several workers commit
+    # out of pk order, so a pk watermark could pass over rows that were not
+    # visible yet; the lag gives those flushes time to commit.
+    watermark, _ = LoginRollupWatermark.objects.select_for_update().get_or_create(
+        name=ROLLUP_NAME
+    )
+    horizon = timezone.now() - timedelta(seconds=settings.LOGIN_ROLLUP_LAG_SECONDS)
+    logs = LoginLogs.objects.filter(created_at__lt=horizon)
+    if watermark.rolled_up_to is not None:
+        logs = logs.filter(
+            Q(created_at__gt=watermark.rolled_up_to)
+            | Q(created_at=watermark.rolled_up_to, pk__gt=watermark.last_log_id)
+        )
+    batch = list(
+        logs.order_by("created_at", "pk").values_list("pk", "created_at")[:batch_size]
+    )
+    if not batch:
+        return 0
+
+    merge_daily_summaries(
+        LoginLogs.objects.filter(pk__in=[pk for pk, _ in batch])
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "email")
+        .annotate(logins=Count("id"), display_name=Max("name"))
+    )
+    watermark.last_log_id, watermark.rolled_up_to = batch[-1]
+    watermark.save(update_fields=["last_log_id", "rolled_up_to", "updated_at"])
+    return len(batch)
+
+
+def rollup_login_logs(batch_size=1000):
+    processed = 0
+    while True:
+        count = rollup_batch(batch_size)
+        if not count:
+            return processed
+        processed += count
+
+
+def rolled_up_logs():
+    # The rows already counted in the daily summaries.
+    watermark = LoginRollupWatermark.objects.filter(name=ROLLUP_NAME).first()
+    if watermark is None or watermark.rolled_up_to is None:
+        return LoginLogs.objects.none()
+    return LoginLogs.objects.filter(
+        Q(created_at__lt=watermark.rolled_up_to)
+        | Q(created_at=watermark.rolled_up_to, pk__lte=watermark.last_log_id)
+    )
+
+
+def login_stats(start, end, top=10):
+    # Three grouped queries, one per metric, each a range scan of the
+    # (day, email) summaries aggregated by the database rather than loaded
+    # row by row.
+    summaries = LoginLogDailySummary.objects.filter(day__range=(start, end))
+    logins_per_day = (
+        summaries.values("day").annotate(logins=Sum("login_count")).order_by("day")
+    )
+    unique_users_per_week = (
+        summaries.annotate(week=TruncWeek("day"))
+        .values("week")
+        .annotate(unique_users=Count("email", distinct=True))
+        .order_by("week")
+    )
+    top_emails = (
+        summaries.values("email")
+        .annotate(logins=Sum("login_count"))
+        .order_by("-logins", "email")[:top]
+    )
+    return {
+        "logins_per_day": list(logins_per_day),
+        "unique_users_per_week": list(unique_users_per_week),
+        "top_emails": list(top_emails),
+    }
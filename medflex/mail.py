@@ -0,0 +1,131 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, body, to, html_body="", from_email=None):
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+
+
+def build_message(outbound, connection=None):
+    message = EmailMultiAlternatives(
+        outbound.subject,
+        outbound.body,
+        outbound.from_email,
+        outbound.to,
+        connection=connection,
+    )
+    if outbound.html_body:
+        message.attach_alternative(outbound.html_body, "text/html")
+    return message
+
+
+@transaction.atomic
+def claim_batch(batch_size):
+    now = timezone.now()
+    pending = OutboundEmail.objects.filter(
+        status=OutboundEmail.StatusChoices.PENDING, next_attempt_at__lte=now
+    ).order_by("next_attempt_at")
+    if db_connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True)
+    batch = list(pending[:batch_size])
+
+    # Push the claimed rows out of reach of other workers while we send;
+    # if this worker dies they become due again after the lease.
+    OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+        next_attempt_at=now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE_SECONDS)
+    )
+    return batch
+
+
+def deliver_queued_emails(batch_size=50):
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    try:
+        connection = get_connection()
+        connection.open()
+    except Exception as exc:
+        # The server is unreachable: retry the whole batch later instead of
+        # waiting for the lease to run out.
+        logger.warning("Opening the mail connection failed: %s", exc)
+        for outbound in batch:
+            schedule_retry(outbound, exc)
+        return 0, len(batch)
+
+    sent = failed = 0
+    try:
+        for outbound in batch:
+            try:
+                connection.send_messages([build_message(outbound, connection)])
+            except Exception as exc:
+                logger.warning("Sending email %s failed: %s", outbound.pk, exc)
+                schedule_retry(outbound, exc)
+                failed += 1
+            else:
+                outbound.status = OutboundEmail.StatusChoices.SENT
+                outbound.attempts += 1
+                outbound.sent_at = timezone.now()
+                outbound.last_error = ""
+                outbound.save(
+                    update_fields=["status", "attempts", "sent_at", "last_error"]
+                )
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def schedule_retry(outbound, exc):
+    outbound.attempts += 1
+    outbound.last_error = str(exc)
+    if outbound.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        outbound.status = OutboundEmail.StatusChoices.FAILED
+    else:
+        backoff = settings.EMAIL_QUEUE_BACKOFF_SECONDS * 2 ** (outbound.attempts - 1)
+        outbound.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+    outbound.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_bulk_mail(subject, template_name, recipients, from_email=None, batch_size=100):
+    # recipients is an iterable of (email, context) pairs. The template is
+    # compiled once and each batch goes out over a single SMTP connection.
+    template = get_template(template_name)
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    recipients = list(recipients)
+
+    sent = 0
+    for start in range(0, len(recipients), batch_size):
+        connection = get_connection()
+        messages = []
+        for email, context in recipients[start : start + batch_size]:
+            html_body = template.render(context)
+            message = EmailMultiAlternatives(
+                subject,
+                strip_tags(html_body),
+                from_email,
+                [email],
+                connection=connection,
+            )
+            message.attach_alternative(html_body, "text/html")
+            messages.append(message)
+        sent += connection.send_messages(messages) or 0
+    return sent
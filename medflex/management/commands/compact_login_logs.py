@@ -0,0 +1,58 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from medflex.login_stats import rolled_up_logs, rollup_login_logs
+from medflex.models import LoginLogs
+
+
+class Command(BaseCommand):
+    help = "Purge login logs older than the retention window once rolled up."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.LOGIN_LOG_RETENTION_DAYS,
+            help="Keep raw rows for this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        # Cut at midnight so a day is never split between raw and summary rows.
+        cutoff_day = timezone.localdate() - timedelta(days=options["days"])
+        cutoff = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+
+        # Only rows already counted in the daily summaries may be deleted.
+        rollup_login_logs(options["batch_size"])
+        rolled_up = rolled_up_logs()
+
+        compacted = 0
+        while True:
+            count = self.purge_batch(rolled_up, cutoff, options["batch_size"])
+            if not count:
+                break
+            compacted += count
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Compacted {compacted} login logs before {cutoff_day}.")
+        )
+
+    @transaction.atomic
+    def purge_batch(self, rolled_up, cutoff, batch_size):
+        pks = list(
+            rolled_up.filter(created_at__lt=cutoff)
+            .order_by("created_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if pks:
+            LoginLogs.objects.filter(pk__in=pks).delete()
+        return len(pks)
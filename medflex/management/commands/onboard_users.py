@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from medflex.onboarding import onboard_users, read_onboarding_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Create user accounts from a CSV with username, email, password and "
+        "optional first_name/last_name columns. Rows with a create_id also "
+        "create a doctor profile from the doctor columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path to the CSV file.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes (defaults to the available cores).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        with open(options["csv_path"], newline="", encoding="utf-8-sig") as file:
+            rows = read_onboarding_csv(file)
+
+        users, errors = onboard_users(rows, options["workers"], options["batch_size"])
+        if errors:
+            for line, line_errors in sorted(errors.items()):
+                self.stderr.write(f"Line {line}: {line_errors}")
+            raise CommandError(f"{len(errors)} invalid rows; no accounts created.")
+
+        self.stdout.write(self.style.SUCCESS(f"Created {len(users)} accounts."))
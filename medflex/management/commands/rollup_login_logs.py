@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from medflex.login_stats import rollup_login_logs
+
+
+class Command(BaseCommand):
+    help = "Add login logs written since the last run to the daily rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows rolled up per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep rolling up new rows instead of exiting when caught up.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="Seconds to sleep between runs when looping.",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            processed += rollup_login_logs(options["batch_size"])
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {processed} login logs."))
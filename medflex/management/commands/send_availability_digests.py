@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from medflex.notifications import send_availability_digests
+
+
+class Command(BaseCommand):
+    help = "Queue one email per doctor digesting their recent availability changes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=settings.AVAILABILITY_DIGEST_WINDOW_MINUTES,
+            help="Minutes to coalesce changes before a digest is sent.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Digests queued per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep queueing digests as windows close instead of exiting.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="Seconds to sleep between runs when looping.",
+        )
+
+    def handle(self, *args, **options):
+        queued = 0
+        while True:
+            queued += send_availability_digests(
+                timedelta(minutes=options["window"]), options["batch_size"]
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} availability digests."))
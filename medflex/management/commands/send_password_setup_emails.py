@@ -0,0 +1,35 @@
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+
+from medflex.models import Doctor
+from medflex.notifications import send_password_setup_emails
+
+
+class Command(BaseCommand):
+    help = "Email password setup links to doctors who have not chosen a password."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            help="Site root used for links (defaults to the current Site domain).",
+        )
+        parser.add_argument(
+            "--doctor-id",
+            action="append",
+            dest="doctor_ids",
+            help="Only email these doctors; may be repeated.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Emails sent per SMTP connection.",
+        )
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"] or f"https://{Site.objects.get_current().domain}"
+        doctors = Doctor.objects.all()
+        if options["doctor_ids"]:
+            doctors = doctors.filter(doctor_id__in=options["doctor_ids"])
+        sent = send_password_setup_emails(base_url, doctors, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} password setup emails."))
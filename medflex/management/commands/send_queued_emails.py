@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from medflex.mail import deliver_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound emails over one SMTP connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Emails sent per SMTP connection.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the queue instead of exiting when it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep between polls when looping.",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_queued_emails(options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Sent {total_sent} emails, {total_failed} failed.")
+        )
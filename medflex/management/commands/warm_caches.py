@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from medflex.models import DOCTOR_SORT_FIELDS
+from medflex.warmup import WARM_PER_PAGE, WARM_SORT_FIELDS, warm_caches
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the directory page, doctor detail and template caches after a "
+        "deploy. Entries go to the configured cache backend, so workers only "
+        "share them with a cross-process backend such as the shared profile; "
+        "compiled templates stay in the process that loads them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=3,
+            help="Directory pages warmed per sort order and page size.",
+        )
+        parser.add_argument(
+            "--sort-by",
+            nargs="+",
+            choices=DOCTOR_SORT_FIELDS,
+            default=list(WARM_SORT_FIELDS),
+            help="Sort fields warmed, each in both orders.",
+        )
+        parser.add_argument(
+            "--per-page",
+            nargs="+",
+            type=int,
+            default=list(WARM_PER_PAGE),
+            help="Page sizes warmed.",
+        )
+        parser.add_argument(
+            "--doctors",
+            type=int,
+            default=1000,
+            help="Most recently created doctors whose details are warmed; 0 for all.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Threads filling caches in parallel.",
+        )
+
+    def handle(self, *args, **options):
+        results = warm_caches(
+            pages=options["pages"],
+            sort_fields=options["sort_by"],
+            per_page_values=options["per_page"],
+            doctors=options["doctors"],
+            workers=options["workers"],
+        )
+        for result in results:
+            line = f"{result.name}: {result.entries} entries in {result.seconds * 1000:.1f} ms"
+            if result.failed:
+                line += f" ({result.failed} failed)"
+            self.stdout.write(line)
+        total = sum(result.entries for result in results)
+        self.stdout.write(self.style.SUCCESS(f"Warmed {total} cache entries."))
@@ -0,0 +1,83 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import clickjacking, csrf
+from whitenoise import middleware as whitenoise_middleware
+
+from .authentication import has_bearer_token
+
+
+def is_lean_api_request(request):
+    # Bearer-authenticated calls to the JSON endpoints never read the
+    # session, flash messages or templates, so the browser-oriented
+    # middleware can be skipped for them.
+    lean = getattr(request, "_lean_api", None)
+    if lean is None:
+        lean = request.path_info.startswith(
+            tuple(settings.LEAN_API_PREFIXES)
+        ) and has_bearer_token(request)
+        request._lean_api = lean
+    return lean
+
+
+class LeanApiMixin:
+    # Django's MiddlewareMixin is async-capable: in async mode get_response
+    # and super().__call__ both return coroutines, so this stays a single
+    # pass-through under ASGI as well.
+    def __call__(self, request):
+        if is_lean_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(LeanApiMixin, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class WhiteNoiseMiddleware(LeanApiMixin, whitenoise_middleware.WhiteNoiseMiddleware):
+    # WhiteNoise's own middleware is sync-only, which under ASGI would move
+    # every request onto a thread and back. Only serving a file (opening it)
+    # touches the disk, so that alone goes through a thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if not is_lean_api_request(request):
+            if self.autorefresh:
+                static_file = await sync_to_async(self.find_file)(request.path_info)
+            else:
+                static_file = self.files.get(request.path_info)
+            if static_file is not None:
+                return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class CsrfViewMiddleware(LeanApiMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(LeanApiMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(LeanApiMixin, messages_middleware.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(LeanApiMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
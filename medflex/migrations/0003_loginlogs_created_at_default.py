@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medflex", "0002_user_email_upper_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="loginlogs",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-19 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medflex", "0003_loginlogs_created_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoginLogDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("email", models.EmailField(max_length=254)),
+                ("name", models.CharField(max_length=50)),
+                ("login_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="loginlogs",
+            index=models.Index(
+                fields=["created_at"], name="medflex_log_created_f0313c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loginlogs",
+            index=models.Index(
+                fields=["email", "created_at"], name="medflex_log_email_13a7fc_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="loginlogdailysummary",
+            constraint=models.UniqueConstraint(
+                fields=("day", "email"), name="unique_login_summary_day_email"
+            ),
+        ),
+    ]
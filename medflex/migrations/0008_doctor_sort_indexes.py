@@ -0,0 +1,57 @@
+# Generated by Django 5.1.5 on 2026-10-19 11:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+from medflex.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("medflex", "0007_availabilitydigest"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(
+                fields=["first_name", "doctor_id"], name="doctor_first_name_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(
+                fields=["last_name", "doctor_id"], name="doctor_last_name_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(fields=["age", "doctor_id"], name="doctor_age_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(
+                fields=["designation", "doctor_id"], name="doctor_designation_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(
+                fields=["created_at", "doctor_id"], name="doctor_created_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(
+                fields=["updated_at", "doctor_id"], name="doctor_updated_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="doctor",
+            index=models.Index(fields=["city", "doctor_id"], name="doctor_city_idx"),
+        ),
+    ]
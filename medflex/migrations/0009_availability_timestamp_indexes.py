@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+from medflex.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("medflex", "0008_doctor_sort_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="doctoravailability",
+            index=models.Index(
+                fields=["created_at"], name="availability_created_at_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="doctoravailability",
+            index=models.Index(
+                fields=["updated_at"], name="availability_updated_at_idx"
+            ),
+        ),
+    ]
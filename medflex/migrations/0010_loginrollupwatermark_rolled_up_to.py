@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+def watermark_from_log_id(apps, schema_editor):
+    # The old watermark was a pk; start the timestamp watermark at the
+    # newest row it covered.
+    LoginLogs = apps.get_model("medflex", "LoginLogs")
+    LoginRollupWatermark = apps.get_model("medflex", "LoginRollupWatermark")
+    for watermark in LoginRollupWatermark.objects.all():
+        row = (
+            LoginLogs.objects.filter(pk__lte=watermark.last_log_id)
+            .order_by("-created_at", "-pk")
+            .first()
+        )
+        if row is not None:
+            watermark.rolled_up_to = row.created_at
+            watermark.last_log_id = row.pk
+            watermark.save(update_fields=["rolled_up_to", "last_log_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medflex", "0009_availability_timestamp_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="loginrollupwatermark",
+            name="rolled_up_to",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(watermark_from_log_id, migrations.RunPython.noop),
+    ]
@@ -1,21 +1,72 @@
+import threading
 import uuid
+from contextlib import contextmanager
 
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models.signals import pre_save
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
+from .backends import forget_unknown_email
+
 
 class LoginLogs(models.Model):
     name = models.CharField(max_length=50)
     email = models.EmailField(unique=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["email", "created_at"]),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class LoginLogDailySummary(models.Model):
+    day = models.DateField()
+    email = models.EmailField()
+    name = models.CharField(max_length=50)
+    login_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "email"], name="unique_login_summary_day_email"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.day} ({self.login_count})"
+
+
+class LoginRollupWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    # The last rolled-up row in (created_at, pk) order.
+    rolled_up_to = models.DateTimeField(null=True, blank=True)
+    last_log_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.rolled_up_to}"
+
+
+# Columns the doctor directory may sort by; each has a (column, doctor_id)
+# index so ordered pages are index scans with a stable tie-break.
+DOCTOR_SORT_FIELDS = [
+    "first_name",
+    "last_name",
+    "age",
+    "designation",
+    "created_at",
+    "updated_at",
+    "city",
+]
+
+
 class Doctor(models.Model):
     class GenderChoices(models.TextChoices):
         MALE = "male", "Male"
@@ -87,6 +138,12 @@ class Doctor(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True, blank=True, default=None)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=[field, "doctor_id"], name=f"doctor_{field}_idx")
+            for field in DOCTOR_SORT_FIELDS
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.designation}"
 
@@ -117,11 +174,116 @@ class DoctorAvailability(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True, blank=True, default=None)
 
+    class Meta:
+        # The directory snapshot reads changed rows by these timestamps.
+        indexes = [
+            models.Index(fields=["created_at"], name="availability_created_at_idx"),
+            models.Index(fields=["updated_at"], name="availability_updated_at_idx"),
+        ]
+
     def __str__(self):
 
         return f"{self.doctor.first_name} - {self.day_of_week} ({self.start_time} - {self.end_time})"
 
 
+class AvailabilityDigest(models.Model):
+    doctor = models.OneToOneField(
+        Doctor, on_delete=models.CASCADE, related_name="availability_digest"
+    )
+    changes = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.doctor} - {len(self.changes)} changes"
+
+    @classmethod
+    @transaction.atomic
+    def record(cls, doctor_id, changes):
+        if not Doctor.objects.filter(pk=doctor_id).exists():
+            return
+        # Insert-or-ignore rather than get_or_create: two workers recording
+        # the first change for a doctor would otherwise race on the unique
+        # doctor_id. The row can also vanish between the two statements when
+        # the digest is being sent, so loop until one is locked.
+        digest = None
+        while digest is None:
+            cls.objects.bulk_create([cls(doctor_id=doctor_id)], ignore_conflicts=True)
+            digest = cls.objects.select_for_update().filter(doctor_id=doctor_id).first()
+        # Keyed by slot so repeated edits to the same slot collapse into
+        # its latest state within one digest.
+        digest.changes.update(
+            {
+                str(availability_id): change
+                for availability_id, change in changes.items()
+            }
+        )
+        digest.save(update_fields=["changes", "updated_at"])
+
+
+class _DigestBatch:
+    # Collects availability changes and records them per doctor after
+    # commit, so a wizard step that touches seven days costs one digest
+    # write rather than seven.
+    def __init__(self):
+        self.changes = {}
+
+    def add(self, doctor_id, availability_id, change):
+        self.changes.setdefault(doctor_id, {})[availability_id] = change
+
+    def __call__(self):
+        for doctor_id, changes in self.changes.items():
+            AvailabilityDigest.record(doctor_id, changes)
+
+
+_digest_batches = threading.local()
+
+
+@contextmanager
+def batched_digests():
+    # Availability changes made inside the block share one _DigestBatch,
+    # registered once with on_commit when the block ends. An exception
+    # discards the batch, and so does a rollback of the enclosing
+    # transaction, since on_commit drops its callbacks.
+    if getattr(_digest_batches, "batch", None) is not None:
+        yield
+        return
+    batch = _digest_batches.batch = _DigestBatch()
+    try:
+        yield
+    finally:
+        _digest_batches.batch = None
+    if batch.changes:
+        transaction.on_commit(batch)
+
+
+class OutboundEmail(models.Model):
+    class StatusChoices(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()
+    status = models.CharField(
+        max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
 @receiver(pre_save, sender=Doctor)
 @receiver(pre_save, sender=DoctorAvailability)
 def update_timestamp(sender, instance, **kwargs):
@@ -139,3 +301,34 @@ def update_timestamp(sender, instance, **kwargs):
             pass
     else:
         instance.updated_at = None
+
+
+@receiver(post_save, sender=User)
+def clear_unknown_email(sender, instance, **kwargs):
+    forget_unknown_email(instance.email)
+
+
+@receiver(post_save, sender=DoctorAvailability)
+@receiver(post_delete, sender=DoctorAvailability)
+def queue_availability_digest(sender, instance, signal, **kwargs):
+    if instance.doctor_id is None:
+        return
+    doctor_id = instance.doctor_id
+    # Backends that cannot return ids from bulk_create leave pk unset; key
+    # such new slots by day and start instead.
+    availability_id = instance.pk or f"{instance.day_of_week}@{instance.start_time}"
+    change = {
+        "action": "removed" if signal is post_delete else "updated",
+        "day_of_week": instance.day_of_week,
+        "start_time": instance.start_time and str(instance.start_time),
+        "end_time": instance.end_time and str(instance.end_time),
+    }
+    batch = getattr(_digest_batches, "batch", None)
+    if batch is None:
+        batch = _DigestBatch()
+        batch.add(doctor_id, availability_id, change)
+        # Runs immediately in autocommit mode, otherwise once the outermost
+        # transaction commits.
+        transaction.on_commit(batch)
+    else:
+        batch.add(doctor_id, availability_id, change)
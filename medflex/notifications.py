@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection as db_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.html import strip_tags
+from django.utils.http import urlsafe_base64_encode
+
+from .mail import enqueue_email, send_bulk_mail
+from .models import AvailabilityDigest, Doctor, DoctorAvailability, User
+
+DAY_ORDER = DoctorAvailability.DaysOfWeek.values
+
+
+def send_availability_digests(window=None, batch_size=100):
+    # A digest is held until its first change is `window` old, so a burst of
+    # schedule edits reaches the doctor as one email.
+    if window is None:
+        window = timedelta(minutes=settings.AVAILABILITY_DIGEST_WINDOW_MINUTES)
+    template = get_template("availability_digest_email.html")
+    queued = 0
+    while True:
+        count = queue_digest_batch(template, timezone.now() - window, batch_size)
+        if not count:
+            return queued
+        queued += count
+
+
+@transaction.atomic
+def queue_digest_batch(template, cutoff, batch_size):
+    # Digests move to the outbound queue in the transaction that deletes
+    # them, so each is mailed exactly once and no row lock is held while
+    # talking to SMTP; send_queued_emails does the delivery.
+    due = AvailabilityDigest.objects.filter(created_at__lte=cutoff).order_by(
+        "created_at"
+    )
+    if db_connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+    else:
+        due = due.select_for_update()
+    due = list(due.select_related("doctor")[:batch_size])
+    if not due:
+        return 0
+
+    for digest in due:
+        changes = sorted(
+            digest.changes.values(),
+            key=lambda change: (
+                (
+                    DAY_ORDER.index(change["day_of_week"])
+                    if change["day_of_week"] in DAY_ORDER
+                    else len(DAY_ORDER)
+                ),
+                change["start_time"] or "",
+            ),
+        )
+        html_body = template.render({"doctor": digest.doctor, "changes": changes})
+        enqueue_email(
+            "Your Availability Was Updated",
+            strip_tags(html_body),
+            [digest.doctor.email],
+            html_body=html_body,
+        )
+    AvailabilityDigest.objects.filter(pk__in=[digest.pk for digest in due]).delete()
+    return len(due)
+
+
+def send_password_setup_emails(base_url, doctors=None, batch_size=100):
+    # Onboarded doctors are provisioned without a password; mail each one a
+    # reset link so they can choose their own.
+    if doctors is None:
+        doctors = Doctor.objects.all()
+    doctors = {doctor.email: doctor for doctor in doctors}
+    users = User.objects.filter(
+        email__in=doctors, password__startswith=UNUSABLE_PASSWORD_PREFIX
+    )
+
+    recipients = []
+    for user in users:
+        path = reverse(
+            "password_reset_confirm",
+            kwargs={
+                "uidb64": urlsafe_base64_encode(force_bytes(user.pk)),
+                "token": default_token_generator.make_token(user),
+            },
+        )
+        recipients.append(
+            (
+                user.email,
+                {
+                    "doctor": doctors[user.email],
+                    "user": user,
+                    "reset_url": base_url.rstrip("/") + path,
+                },
+            )
+        )
+
+    return send_bulk_mail(
+        "Set Your MedFlex Password",
+        "password_setup_email.html",
+        recipients,
+        batch_size=batch_size,
+    )
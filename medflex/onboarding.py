@@ -0,0 +1,215 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .backends import unknown_email_cache_key
+from .doctor_cache import invalidate_doctor
+from .models import Doctor, User
+from .serializers import BulkOnboardingDoctorRowSerializer, BulkOnboardingRowSerializer
+
+DOCTOR_COLUMNS = tuple(BulkOnboardingDoctorRowSerializer.Meta.fields)
+# Columns that must be unique within a file.
+LABELS = {
+    "email": "Email",
+    "username": "Username",
+    "create_id": "Create ID",
+    "mobile_number": "Mobile number",
+}
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker():
+    # Forked workers inherit the configured app registry; spawned ones
+    # (macOS, Windows) have to set Django up before hashing.
+    if not apps.ready:
+        django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    passwords = list(passwords)
+    workers = min(
+        workers or settings.ONBOARDING_HASH_WORKERS or available_cores(), len(passwords)
+    )
+    if workers <= 1:
+        return [make_password(password) for password in passwords]
+
+    # PBKDF2 holds the GIL, so threads would not help; a few chunks per
+    # worker keeps the pool busy without paying IPC per password.
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def read_onboarding_csv(file):
+    if isinstance(file, bytes):
+        file = file.decode("utf-8-sig")
+    if isinstance(file, str):
+        file = io.StringIO(file)
+    return list(csv.DictReader(file))
+
+
+def _doctor_fields(row):
+    # Blank cells leave optional profile fields unset rather than "".
+    return {
+        field: row[field]
+        for field in DOCTOR_COLUMNS
+        if row.get(field) not in ("", None)
+    }
+
+
+def _taken(queryset, field, values, ignore_case=False):
+    if ignore_case:
+        queryset = queryset.annotate(lookup=Lower(field))
+        field, values = "lookup", [value.lower() for value in values]
+    return set(
+        queryset.filter(**{f"{field}__in": values}).values_list(field, flat=True)
+    )
+
+
+def validate_onboarding_rows(rows):
+    # Rows with a create_id also carry a doctor profile, which is created
+    # along with the account.
+    valid, errors = [], {}
+    seen = {field: set() for field in LABELS}
+    for line, row in enumerate(rows, start=2):
+        serializer = BulkOnboardingRowSerializer(data=row)
+        row_errors = {} if serializer.is_valid() else dict(serializer.errors)
+        doctor = None
+        if row.get("create_id"):
+            doctor_serializer = BulkOnboardingDoctorRowSerializer(
+                data=_doctor_fields(row)
+            )
+            if doctor_serializer.is_valid():
+                doctor = doctor_serializer.validated_data
+            else:
+                row_errors = {**doctor_serializer.errors, **row_errors}
+        if row_errors:
+            errors[line] = row_errors
+            continue
+
+        data = {**serializer.validated_data, "doctor": doctor}
+        keys = {"email": data["email"].lower(), "username": data["username"]}
+        if doctor:
+            keys["create_id"] = doctor["create_id"]
+            keys["mobile_number"] = doctor["mobile_number"]
+        duplicate = next(
+            (field for field, key in keys.items() if key in seen[field]), None
+        )
+        if duplicate:
+            errors[line] = {
+                duplicate: [f"{LABELS[duplicate]} appears more than once in the file."]
+            }
+        else:
+            for field, key in keys.items():
+                seen[field].add(key)
+            valid.append((line, data))
+
+    # One query per column instead of the per-row lookups SignupSerializer
+    # and DoctorSerializer would run. Emails are compared case-insensitively.
+    emails = [data["email"] for _, data in valid]
+    doctors = [data["doctor"] for _, data in valid if data["doctor"]]
+    taken_emails = _taken(User.objects, "email", emails, ignore_case=True)
+    taken_usernames = _taken(
+        User.objects, "username", [data["username"] for _, data in valid]
+    )
+    doctor_emails = _taken(
+        Doctor.objects,
+        "email",
+        [doctor["email"] for doctor in doctors],
+        ignore_case=True,
+    )
+    taken_create_ids = _taken(
+        Doctor.objects, "create_id", [doctor["create_id"] for doctor in doctors]
+    )
+    taken_mobiles = _taken(
+        Doctor.objects, "mobile_number", [doctor["mobile_number"] for doctor in doctors]
+    )
+    for line, data in valid:
+        doctor = data["doctor"]
+        if data["email"].lower() in taken_emails:
+            errors[line] = {"email": ["Email is already registered."]}
+        elif data["username"] in taken_usernames:
+            errors[line] = {"username": ["Username is already taken."]}
+        elif doctor and doctor["email"].lower() in doctor_emails:
+            errors[line] = {"email": ["A doctor with this email already exists."]}
+        elif doctor and doctor["create_id"] in taken_create_ids:
+            errors[line] = {"create_id": ["Create ID is already taken."]}
+        elif doctor and doctor["mobile_number"] in taken_mobiles:
+            errors[line] = {"mobile_number": ["Mobile number is already registered."]}
+
+    return [data for line, data in valid if line not in errors], errors
+
+
+def onboard_users(rows, workers=None, batch_size=500, created_by=None):
+    # All or nothing: a file with any bad row creates no accounts, so it can
+    # be fixed and re-uploaded as a whole.
+    rows, errors = validate_onboarding_rows(rows)
+    if errors:
+        return [], errors
+    if not rows:
+        return [], {}
+
+    encoded = hash_passwords([row["password"] for row in rows], workers)
+    users = [
+        User(
+            username=row["username"],
+            email=row["email"],
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            password=password,
+        )
+        for row, password in zip(rows, encoded)
+    ]
+    new_doctors = [
+        Doctor(
+            **row["doctor"],
+            user_name=row["username"],
+            password=password,
+            created_by=created_by,
+        )
+        for row, password in zip(rows, encoded)
+        if row["doctor"]
+    ]
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+
+        # Rows whose email matches an onboarded doctor also get their
+        # doctor login details, as in step 4 of the dashboard wizard.
+        by_email = {user.email.lower(): user for user in users}
+        doctors = list(
+            Doctor.objects.annotate(lookup=Lower("email")).filter(lookup__in=by_email)
+        )
+        now = timezone.now()
+        for doctor in doctors:
+            user = by_email[doctor.email.lower()]
+            doctor.user_name = user.username
+            doctor.password = user.password
+            doctor.updated_at = now
+        Doctor.objects.bulk_update(
+            doctors, ["user_name", "password", "updated_at"], batch_size=batch_size
+        )
+
+        Doctor.objects.bulk_create(new_doctors, batch_size=batch_size)
+
+    # bulk_create and bulk_update skip post_save, so neither
+    # clear_unknown_email nor the doctor cache invalidation runs.
+    cache.delete_many([unknown_email_cache_key(user.email) for user in users])
+    for doctor in [*doctors, *new_doctors]:
+        invalidate_doctor(doctor.doctor_id, doctor.email)
+    return users, {}
@@ -0,0 +1,107 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+STICKY_COOKIE = "medflex_primary"
+
+# Per-request routing state: {"pinned": bool, "wrote": bool}. A dict is
+# stored rather than flags so writes made inside sync_to_async threads are
+# visible to the middleware afterwards.
+_request_state = ContextVar("medflex_db_routing", default=None)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        # Management commands and workers have no request state and read
+        # from the primary, so their read-after-write logic stays correct.
+        if state is None or state["pinned"] or state["wrote"]:
+            return "default"
+        if not settings.DATABASE_REPLICAS:
+            return "default"
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+@contextmanager
+def primary_reads():
+    # Reads that fill a shared cache (cached pages and doctors, the directory
+    # snapshot) go to the primary: whatever they load is served to every
+    # later reader, so a lagging replica must not be the source. Also works
+    # as a decorator.
+    state = _request_state.get()
+    pinned = {"pinned": True, "wrote": False}
+    token = _request_state.set(pinned)
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+        if state is not None and pinned["wrote"]:
+            state["wrote"] = True
+
+
+class PrimaryStickinessMiddleware:
+    # A client that wrote recently reads from the primary until replication
+    # has had REPLICA_STICKY_SECONDS to catch up, so a wizard step never
+    # renders data older than what it just saved. Runs natively under both
+    # WSGI and ASGI so it never forces a thread hop on the async views.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.request_state(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request):
+        state = self.request_state(request)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self.process_response(state, response)
+
+    def request_state(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        return {"pinned": pinned_until > time.time(), "wrote": False}
+
+    def process_response(self, state, response):
+        if state["wrote"] and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -8,6 +8,8 @@ from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from .models import Doctor, DoctorAvailability
+from .services import save_availabilities
+from .wizard import wizard_doctor_id
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -89,6 +91,16 @@ class SignupSerializer(serializers.ModelSerializer):
         return user
 
 
+class BulkOnboardingRowSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField()
+    password = serializers.CharField()
+    first_name = serializers.CharField(max_length=150, required=False, default="")
+    last_name = serializers.CharField(max_length=150, required=False, default="")
+
+    validate_password = SignupSerializer.validate_password
+
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField(
         error_messages={
@@ -129,6 +141,10 @@ class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
 
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
 class DoctorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Doctor
@@ -165,6 +181,40 @@ class DoctorSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class BulkOnboardingDoctorRowSerializer(serializers.ModelSerializer):
+    # The doctor profile half of an onboarding row; uniqueness is checked for
+    # the whole file at once, so the per-row unique validators are dropped.
+    class Meta:
+        model = Doctor
+        fields = [
+            "first_name",
+            "last_name",
+            "age",
+            "gender",
+            "create_id",
+            "email",
+            "mobile_number",
+            "marital_status",
+            "qualification",
+            "designation",
+            "blood_group",
+            "address",
+            "country",
+            "state",
+            "city",
+            "postal_code",
+            "bio",
+        ]
+        extra_kwargs = {
+            "create_id": {"validators": []},
+            "email": {"validators": []},
+            "mobile_number": {"validators": []},
+        }
+
+    validate_mobile_number = DoctorSerializer.validate_mobile_number
+    validate_age = DoctorSerializer.validate_age
+
+
 class DoctorUpdateSerializer(serializers.ModelSerializer):
     update_profile = serializers.ImageField(required=False)
 
@@ -181,10 +231,22 @@ class DoctorUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
+class DoctorAvailabilityListSerializer(serializers.ListSerializer):
+    # One INSERT for the whole week instead of one per day.
+    def create(self, validated_data):
+        doctor = self.child.resolve_doctor()
+        if doctor is not None:
+            validated_data = [{**item, "doctor": doctor} for item in validated_data]
+        return save_availabilities(
+            [DoctorAvailability(**item) for item in validated_data]
+        )
+
+
 class DoctorAvailabilitySerializer(serializers.ModelSerializer):
     class Meta:
         model = DoctorAvailability
         fields = "__all__"
+        list_serializer_class = DoctorAvailabilityListSerializer
 
     def validate_day_of_week(self, value):
         valid_days = [choice[0] for choice in DoctorAvailability.DaysOfWeek.choices]
@@ -236,18 +298,23 @@ class DoctorAvailabilitySerializer(serializers.ModelSerializer):
 
         return data
 
-    def create(self, validated_data):
+    def resolve_doctor(self):
         request = self.context.get("request")
+        if "doctor" in self.context:
+            return self.context["doctor"]
         if request:
-            doctor_id = request.session.get("doctor_id")
+            doctor_id = wizard_doctor_id(request)
             if not doctor_id:
                 raise serializers.ValidationError(
                     {"doctor": "Doctor ID not found in session."}
                 )
+            return get_object_or_404(Doctor, doctor_id=doctor_id)
+        return None
 
-            doctor = get_object_or_404(Doctor, doctor_id=doctor_id)
+    def create(self, validated_data):
+        doctor = self.resolve_doctor()
+        if doctor is not None:
             validated_data["doctor"] = doctor
-
         return DoctorAvailability.objects.create(**validated_data)
 
 
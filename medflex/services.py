@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import DoctorAvailability, batched_digests
+
+User = get_user_model()
+
+
+@transaction.atomic
+def provision_doctor_account(doctor, user_name, password=None):
+    # Hash once and store the same encoded value on both rows; Django's
+    # hashers verify either copy, so there is no need to hash per record.
+    encoded = make_password(password)
+
+    doctor.user_name = user_name
+    doctor_fields = ["user_name", "updated_at"]
+    if password is not None:
+        doctor.password = encoded
+        doctor_fields.append("password")
+    doctor.save(update_fields=doctor_fields)
+
+    user = User.objects.filter(email=doctor.email).first()
+    if user is None:
+        user = User.objects.create(
+            username=doctor.user_name,
+            email=doctor.email,
+            first_name=doctor.first_name,
+            last_name=doctor.last_name,
+            password=encoded,
+        )
+    else:
+        user.username = doctor.user_name
+        user_fields = ["username"]
+        if password is not None:
+            user.password = encoded
+            user_fields.append("password")
+        user.save(update_fields=user_fields)
+    return user
+
+
+@transaction.atomic
+@batched_digests()
+def save_availabilities(created=(), updated=()):
+    created, updated = list(created), list(updated)
+    if created:
+        DoctorAvailability.objects.bulk_create(created)
+    if updated:
+        now = timezone.now()
+        for availability in updated:
+            availability.updated_at = now
+        DoctorAvailability.objects.bulk_update(
+            updated, ["day_of_week", "start_time", "end_time", "updated_at"]
+        )
+
+    # Bulk writes bypass model signals; replay post_save so receivers such as
+    # the availability digest still run, deferred to on_commit as before.
+    for was_created, batch in ((True, created), (False, updated)):
+        for availability in batch:
+            post_save.send(
+                sender=DoctorAvailability,
+                instance=availability,
+                created=was_created,
+                update_fields=None,
+                raw=False,
+                using=availability._state.db,
+            )
+    return created + updated
+
+
+def upsert_availabilities(doctor, availability_data, serializer_class, context=None):
+    # Validate every day before touching the database so a bad day leaves
+    # the schedule as it was, then write all days in one transaction.
+    existing = {
+        availability.day_of_week: availability
+        for availability in DoctorAvailability.objects.filter(
+            doctor=doctor,
+            day_of_week__in=[item["day_of_week"] for item in availability_data],
+        )
+    }
+    created, updated, errors = [], [], {}
+    for item in availability_data:
+        day_of_week = item["day_of_week"]
+        instance = existing.get(day_of_week)
+        if instance is None:
+            serializer = serializer_class(data=item, context=context or {})
+        else:
+            serializer = serializer_class(instance, data=item, partial=True)
+        if not serializer.is_valid():
+            errors[day_of_week] = serializer.errors
+        elif instance is None:
+            created.append(
+                DoctorAvailability(**{**serializer.validated_data, "doctor": doctor})
+            )
+        else:
+            changed = False
+            for field, value in serializer.validated_data.items():
+                if getattr(instance, field) != value:
+                    setattr(instance, field, value)
+                    changed = True
+            if changed:
+                updated.append(instance)
+
+    if errors:
+        return [], errors
+    return save_availabilities(created, updated), {}
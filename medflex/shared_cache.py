@@ -0,0 +1,331 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MAGIC = b"MEDFLEX1"
+# magic, layout fingerprint
+_FILE_HEADER = struct.Struct("<8s16s")
+_HEADER_SIZE = 4096
+# key digest, expires (0 = never), stored, accessed, payload length
+_SLOT = struct.Struct("<16sdddI")
+_THREAD_STRIPES = 64
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+class _Region:
+    # One size class: slots of slot_size bytes grouped into sets of `ways`.
+    # A key may only live in set digest % sets, and a full set evicts its
+    # least recently used slot, so every operation touches one small range.
+    def __init__(self, offset, slot_size, sets, ways):
+        self.offset = offset
+        self.slot_size = slot_size
+        self.sets = sets
+        self.ways = ways
+        self.capacity = slot_size - _SLOT.size
+        self.set_bytes = slot_size * ways
+        self.size = self.set_bytes * sets
+
+
+class _SharedFile:
+    # Each process maps the file once; fcntl range locks keep workers apart
+    # and striped thread locks do the same for threads, which share the
+    # process's fcntl locks.
+    def __init__(self, path, regions, size, fingerprint):
+        self.pid = os.getpid()
+        self.regions = regions
+        self.thread_locks = [threading.Lock() for _ in range(_THREAD_STRIPES)]
+        self.fd = self._open(path, size, _FILE_HEADER.pack(_MAGIC, fingerprint))
+        self.mm = mmap.mmap(self.fd, size)
+
+    @staticmethod
+    def _open(path, size, header):
+        # The path is unique to the layout, so an existing file is only ever
+        # opened, never resized: workers of an older layout may still have
+        # it mapped. A new file is built under a temporary name and linked
+        # into place, so nobody maps it half-initialized; losing that race
+        # just means opening the winner's file.
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            tmp_fd, tmp_path = tempfile.mkstemp(
+                prefix=os.path.basename(path) + ".", dir=os.path.dirname(path)
+            )
+            try:
+                os.ftruncate(tmp_fd, size)
+                os.pwrite(tmp_fd, header, 0)
+                try:
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    pass
+            finally:
+                os.close(tmp_fd)
+                os.unlink(tmp_path)
+            fd = os.open(path, os.O_RDWR)
+        if os.fstat(fd).st_size != size or os.pread(fd, len(header), 0) != header:
+            os.close(fd)
+            raise ValueError(f"{path} is not a cache file for this layout.")
+        return fd
+
+    @contextmanager
+    def locked_all(self, start, length):
+        for lock in self.thread_locks:
+            lock.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, length, start)
+        finally:
+            for lock in reversed(self.thread_locks):
+                lock.release()
+
+    @contextmanager
+    def locked(self, start, length, stripe):
+        with self.thread_locks[stripe % _THREAD_STRIPES]:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, length, start)
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Cache shared by every worker process on a host through a memory-mapped
+    file at LOCATION.
+
+    OPTIONS:
+        MAX_SIZE      total bytes for entries (default 64 MiB)
+        SIZE_CLASSES  slot sizes in bytes; MAX_SIZE is split evenly between
+                      them and each entry uses the smallest slot it fits in
+                      (default 512, 4096, 32768 and 262144)
+        WAYS          slots per set, i.e. LRU candidates (default 8)
+
+    Entries larger than the largest class are not stored. Each layout of
+    the options gets its own file, LOCATION-<fingerprint>, so changing them
+    starts an empty cache without touching the file older workers still
+    use; remove old files once those workers are gone.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        max_size = int(options.get("MAX_SIZE", 64 * 1024 * 1024))
+        size_classes = sorted(options.get("SIZE_CLASSES", (512, 4096, 32768, 262144)))
+        ways = int(options.get("WAYS", 8))
+
+        self._regions = []
+        offset = _HEADER_SIZE
+        for slot_size in size_classes:
+            sets = max(1, max_size // len(size_classes) // (slot_size * ways))
+            region = _Region(offset, slot_size, sets, ways)
+            self._regions.append(region)
+            offset += region.size
+        self._size = offset
+        self._fingerprint = hashlib.blake2b(
+            repr((size_classes, ways, offset)).encode(), digest_size=16
+        ).digest()
+        self._path = f"{location}-{self._fingerprint.hex()}"
+
+    @property
+    def _file(self):
+        shared = _files.get(self._path)
+        if shared is None or shared.pid != os.getpid():
+            with _files_lock:
+                shared = _files.get(self._path)
+                if shared is None or shared.pid != os.getpid():
+                    shared = _SharedFile(
+                        self._path, self._regions, self._size, self._fingerprint
+                    )
+                    _files[self._path] = shared
+        return shared
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _expiry(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return 0.0 if timeout is None else timeout
+
+    @contextmanager
+    def _set(self, region, digest):
+        index = int.from_bytes(digest[:8], "little") % region.sets
+        start = region.offset + index * region.set_bytes
+        with self._file.locked(start, region.set_bytes, index):
+            yield self._file.mm, start
+
+    def _find(self, mm, region, start, digest, now):
+        # Returns (slot offset, header) of the live entry for digest, if any.
+        for way in range(region.ways):
+            slot = start + way * region.slot_size
+            header = _SLOT.unpack_from(mm, slot)
+            if header[4] and header[0] == digest:
+                if header[1] and header[1] <= now:
+                    mm[slot : slot + _SLOT.size] = bytes(_SLOT.size)
+                    return None
+                return slot, header
+        return None
+
+    def _victim(self, mm, region, start, now):
+        # An empty or expired slot if there is one, else the least recently
+        # used.
+        oldest = None
+        for way in range(region.ways):
+            slot = start + way * region.slot_size
+            _, expires, _, accessed, length = _SLOT.unpack_from(mm, slot)
+            if not length or (expires and expires <= now):
+                return slot
+            if oldest is None or accessed < oldest[0]:
+                oldest = (accessed, slot)
+        return oldest[1]
+
+    def _write(self, mm, slot, digest, expires, payload, now):
+        _SLOT.pack_into(mm, slot, digest, expires, now, now, len(payload))
+        start = slot + _SLOT.size
+        mm[start : start + len(payload)] = payload
+
+    def _read(self, key, digest, now, touch=True):
+        # The newest copy wins in case a concurrent set left one in two
+        # size classes.
+        found = None
+        for region in self._regions:
+            with self._set(region, digest) as (mm, start):
+                hit = self._find(mm, region, start, digest, now)
+                if hit is None:
+                    continue
+                slot, (_, expires, stored, _, length) = hit
+                if found is None or stored > found[0]:
+                    if touch:
+                        _SLOT.pack_into(mm, slot, digest, expires, stored, now, length)
+                    data = mm[slot + _SLOT.size : slot + _SLOT.size + length]
+                    found = (stored, data)
+        if found is None:
+            return None
+        stored_key, value = pickle.loads(found[1])
+        return (value,) if stored_key == key else None
+
+    def _region_for(self, payload):
+        for region in self._regions:
+            if len(payload) <= region.capacity:
+                return region
+        return None
+
+    def _store(self, key, value, timeout, only_if_missing):
+        digest = self._digest(key)
+        payload = pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        target = self._region_for(payload)
+        for region in self._regions:
+            if region is target:
+                continue
+            with self._set(region, digest) as (mm, start):
+                hit = self._find(mm, region, start, digest, now)
+                if hit is not None:
+                    if only_if_missing:
+                        return False
+                    mm[hit[0] : hit[0] + _SLOT.size] = bytes(_SLOT.size)
+        if target is None:
+            return False
+
+        with self._set(target, digest) as (mm, start):
+            hit = self._find(mm, target, start, digest, now)
+            if hit is not None and only_if_missing:
+                return False
+            slot = hit[0] if hit else self._victim(mm, target, start, now)
+            self._write(mm, slot, digest, self._expiry(timeout), payload, now)
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, only_if_missing=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout, only_if_missing=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        found = self._read(key, self._digest(key), time.time())
+        return default if found is None else found[0]
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._read(key, self._digest(key), time.time(), touch=False) is not None
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        digest = self._digest(key)
+        now = time.time()
+        touched = False
+        for region in self._regions:
+            with self._set(region, digest) as (mm, start):
+                hit = self._find(mm, region, start, digest, now)
+                if hit is not None:
+                    slot, (_, _, stored, _, length) = hit
+                    _SLOT.pack_into(
+                        mm, slot, digest, self._expiry(timeout), stored, now, length
+                    )
+                    touched = True
+        return touched
+
+    def incr(self, key, delta=1, version=None):
+        # Read, add and write back under one set lock so counters shared by
+        # several workers don't lose updates.
+        key = self.make_and_validate_key(key, version=version)
+        digest = self._digest(key)
+        now = time.time()
+        for region in self._regions:
+            with self._set(region, digest) as (mm, start):
+                hit = self._find(mm, region, start, digest, now)
+                if hit is None:
+                    continue
+                slot, (_, expires, _, _, length) = hit
+                data = mm[slot + _SLOT.size : slot + _SLOT.size + length]
+                stored_key, value = pickle.loads(data)
+                if stored_key != key:
+                    break
+                value += delta
+                payload = pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL)
+                if len(payload) <= region.capacity:
+                    self._write(mm, slot, digest, expires, payload, now)
+                    return value
+            # Outgrew its size class; _store moves it to a larger one.
+            timeout = max(expires - now, 0.001) if expires else None
+            self._store(key, value, timeout, only_if_missing=False)
+            return value
+        raise ValueError("Key '%s' not found" % key)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        digest = self._digest(key)
+        now = time.time()
+        deleted = False
+        for region in self._regions:
+            with self._set(region, digest) as (mm, start):
+                hit = self._find(mm, region, start, digest, now)
+                if hit is not None:
+                    mm[hit[0] : hit[0] + _SLOT.size] = bytes(_SLOT.size)
+                    deleted = True
+        return deleted
+
+    def clear(self):
+        shared = self._file
+        with shared.locked_all(_HEADER_SIZE, self._size - _HEADER_SIZE):
+            for region in self._regions:
+                for slot in range(
+                    region.offset, region.offset + region.size, region.slot_size
+                ):
+                    shared.mm[slot : slot + _SLOT.size] = bytes(_SLOT.size)
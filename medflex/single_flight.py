@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .routers import primary_reads
+
+logger = logging.getLogger(__name__)
+
+HIT, MISS, STALE = "HIT", "MISS", "STALE"
+
+_lock = threading.Lock()
+_counts = Counter()
+# key -> [lock, holders]; entries are dropped once nobody is using the key.
+_key_locks = {}
+_TIMED_OUT = object()
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+
+
+@contextmanager
+def _key_lock(key):
+    with _lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        yield entry[0]
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+class CacheResult(NamedTuple):
+    value: object
+    status: str
+    # Seconds since value was computed, for the Age header.
+    age: int
+
+
+def _result(entry, status):
+    stored_at, value = entry
+    return CacheResult(value, status, max(0, int(time.time() - stored_at)))
+
+
+def _previous(fallback_key):
+    return cache.get(fallback_key) if fallback_key else None
+
+
+def _wait_for(key, deadline):
+    while time.monotonic() < deadline:
+        time.sleep(settings.SINGLE_FLIGHT_POLL_SECONDS)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _take_lease(key):
+    return cache.add(f"{key}:lease", os.getpid(), settings.SINGLE_FLIGHT_LEASE_SECONDS)
+
+
+def _compute_and_store(key, compute, timeout, fallback_key):
+    # Entries are (stored_at, value) so readers can report their age. When
+    # there is no longer a value (a deleted doctor, a page past the end) the
+    # previous one is dropped too, so it is not served as stale.
+    try:
+        with primary_reads():
+            value = compute()
+    except Exception:
+        if fallback_key:
+            cache.delete(fallback_key)
+        raise
+    finally:
+        cache.delete(f"{key}:lease")
+    entry = (time.time(), value)
+    if value is not None:
+        cache.set(key, entry, timeout)
+        if fallback_key:
+            cache.set(fallback_key, entry, settings.SINGLE_FLIGHT_FALLBACK_SECONDS)
+    elif fallback_key:
+        cache.delete(fallback_key)
+    return entry
+
+
+def _compute_under_lease(key, compute, timeout, fallback_key, deadline):
+    entry = cache.get(key)
+    if entry is not None:
+        # Filled by the thread that held the lock before us.
+        _count("coalesced")
+        return _result(entry, HIT)
+
+    if not _take_lease(key):
+        # Another worker is computing.
+        entry = _previous(fallback_key)
+        if entry is not None:
+            _count("stale")
+            return _result(entry, STALE)
+        entry = _wait_for(key, deadline)
+        if entry is None:
+            return _TIMED_OUT
+        _count("coalesced")
+        return _result(entry, HIT)
+
+    entry = _compute_and_store(key, compute, timeout, fallback_key)
+    _count("computed")
+    return _result(entry, MISS)
+
+
+def coalesced_fill(key, compute, timeout, fallback_key=None):
+    # Fill a missing cache entry with one compute() per key. Threads of this
+    # process queue on a lock and workers share a lease held in the cache.
+    # Everyone else serves the value kept under fallback_key when there is
+    # one, otherwise waits briefly for the winner and, failing that, computes
+    # for itself. A None from compute() is never cached.
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT_SECONDS
+    with _key_lock(key) as lock:
+        acquired = lock.acquire(blocking=False)
+        if not acquired:
+            entry = _previous(fallback_key)
+            if entry is not None:
+                _count("stale")
+                return _result(entry, STALE)
+            acquired = lock.acquire(timeout=settings.SINGLE_FLIGHT_WAIT_SECONDS)
+        if acquired:
+            try:
+                result = _compute_under_lease(
+                    key, compute, timeout, fallback_key, deadline
+                )
+            finally:
+                lock.release()
+            if result is not _TIMED_OUT:
+                return result
+
+    _count("timed_out")
+    return CacheResult(compute(), MISS, 0)
+
+
+def _refresh(key, compute, timeout, fallback_key):
+    # Unlike coalesced_fill this never waits: if anyone in this process or
+    # another worker is already recomputing key, there is nothing to do.
+    with _key_lock(key) as lock:
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            if cache.get(key) is None and _take_lease(key):
+                _compute_and_store(key, compute, timeout, fallback_key)
+                _count("revalidated")
+        finally:
+            lock.release()
+
+
+def _refresh_in_background(key, compute, timeout, fallback_key):
+    try:
+        _refresh(key, compute, timeout, fallback_key)
+    except Exception:
+        logger.exception("Background refresh of %s failed", key)
+    finally:
+        connections.close_all()
+
+
+def _revalidate(key, compute, timeout, fallback_key):
+    if not settings.CACHE_REVALIDATE_ASYNC:
+        _refresh(key, compute, timeout, fallback_key)
+        return
+    with _lock:
+        if key in _key_locks:
+            return
+    threading.Thread(
+        target=_refresh_in_background,
+        args=(key, compute, timeout, fallback_key),
+        name="cache-revalidate",
+        daemon=True,
+    ).start()
+
+
+def read_through(key, compute, timeout, fallback_key=None, revalidate=False):
+    # With revalidate=True a miss that has a previous value returns it at
+    # once as STALE and recomputes in a background thread, so the first
+    # request after an invalidation doesn't pay for the rebuild.
+    entry = cache.get(key)
+    if entry is not None:
+        return _result(entry, HIT)
+    if revalidate:
+        entry = _previous(fallback_key)
+        if entry is not None:
+            _count("stale")
+            _revalidate(key, compute, timeout, fallback_key)
+            return _result(entry, STALE)
+    return coalesced_fill(key, compute, timeout, fallback_key)
+
+
+def set_cache_headers(response, result):
+    response["X-Cache"] = result.status
+    if result.status != MISS:
+        response["Age"] = str(result.age)
+    return response
+
+
+def single_flight_stats():
+    with _lock:
+        return {
+            name: _counts[name]
+            for name in ("computed", "coalesced", "stale", "revalidated", "timed_out")
+        }
+
+
+def reset_single_flight_stats():
+    with _lock:
+        _counts.clear()
@@ -0,0 +1,654 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .directory import (
+    DAYS_OF_WEEK,
+    DirectoryQueryError,
+    availability_map,
+    directory_version,
+    list_payload,
+)
+from .models import DOCTOR_SORT_FIELDS, Doctor, DoctorAvailability
+from .routers import primary_reads
+
+logger = logging.getLogger(__name__)
+
+_FORMAT = 1
+_DOCTOR_FIELDS = (
+    "doctor_id",
+    "create_id",
+    "first_name",
+    "last_name",
+    "designation",
+    "city",
+    "age",
+    "created_at",
+    "updated_at",
+    "update_profile",
+)
+# Low-cardinality text is stored as int32 codes into a table of distinct
+# values; create_id and update_profile are unique per row and kept inline.
+_INTERNED_FIELDS = ("first_name", "last_name", "designation", "city")
+_SEARCH_FIELDS = ("first_name", "last_name", "designation")
+_TIME_FIELDS = ("created_at", "updated_at")
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_NULL_TIME = np.iinfo(np.int64).min
+# SQLite's LIKE only folds ASCII letters, so search does the same.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_DESIGNATIONS = dict(Doctor.DesignationChoices.choices)
+
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_counts = Counter()
+_state = {
+    "pid": None,
+    "snapshot": None,
+    "loaded": False,
+    "building": False,
+    "saved_at": 0.0,
+}
+# Refreshed snapshots are saved at most this often; a worker that loads an
+# older one catches up with a larger delta.
+_SAVE_INTERVAL_SECONDS = 600
+
+
+class _Table:
+    # Append-only distinct values. Snapshots from successive refreshes share
+    # one table, which is safe because existing codes never change.
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+
+
+def snapshot_stats():
+    with _lock:
+        return dict(_counts)
+
+
+def reset_snapshot_stats():
+    with _lock:
+        _counts.clear()
+
+
+def _micros(value):
+    if value is None:
+        return _NULL_TIME
+    if timezone.is_naive(value):
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _source():
+    # A saved snapshot is only reused against the database it came from.
+    db = settings.DATABASES["default"]
+    return [connection.vendor, str(db.get("NAME")), db.get("HOST"), db.get("PORT")]
+
+
+def _availabilities(queryset):
+    by_doctor = defaultdict(list)
+    rows = (
+        queryset.filter(doctor__isnull=False)
+        .order_by("doctor_id", "id")
+        .values_list("doctor_id", "day_of_week", "start_time", "end_time")
+    )
+    for doctor_id, *availability in rows.iterator(chunk_size=10000):
+        by_doctor[doctor_id].append(tuple(availability))
+    return by_doctor
+
+
+def _encode(rows, availabilities, tables):
+    # Column fragments for doctor rows, in the order given.
+    days = tables["availability"]
+    schedules = {}
+
+    def schedule(doctor_id):
+        entries = tuple(availabilities.get(doctor_id, ()))
+        codes = schedules.get(entries)
+        if codes is None:
+            # Rows with a NULL day or time can't be shown; the ORM path
+            # fails on them.
+            shown = availability_map(entry for entry in entries if None not in entry)
+            codes = schedules[entries] = [days.code(shown[day]) for day in DAYS_OF_WEEK]
+        return codes
+
+    ids = [row[0].int for row in rows]
+    columns = {
+        "id_hi": np.array([value >> 64 for value in ids], dtype=np.uint64),
+        "id_lo": np.array(
+            [value & 0xFFFFFFFFFFFFFFFF for value in ids], dtype=np.uint64
+        ),
+        "create_id": np.array([row[1] for row in rows], dtype=str),
+        "age": np.array([row[6] for row in rows], dtype=np.int64),
+        "created_at": np.array([_micros(row[7]) for row in rows], dtype=np.int64),
+        "updated_at": np.array([_micros(row[8]) for row in rows], dtype=np.int64),
+        "update_profile": np.array([row[9] or "" for row in rows], dtype=str),
+        "availability": np.array(
+            [schedule(row[0]) for row in rows], dtype=np.int32
+        ).reshape(len(rows), len(DAYS_OF_WEEK)),
+        "availability_count": np.array(
+            [len(availabilities.get(row[0], ())) for row in rows], dtype=np.int32
+        ),
+    }
+    for index, field in enumerate(_DOCTOR_FIELDS):
+        if field in _INTERNED_FIELDS:
+            table = tables[field]
+            columns[field] = np.array(
+                [table.code(row[index]) for row in rows], dtype=np.int32
+            )
+    return columns
+
+
+def _ranks(field, table):
+    # Position of each distinct value in the database's own ordering, so
+    # sorted pages match ORDER BY under its collation and NULL placement.
+    # The last entry ranks NULL, which is stored as code -1.
+    ordered = Doctor.objects.order_by(field).values_list(field, flat=True).distinct()
+    position = {value: rank for rank, value in enumerate(ordered)}
+    return np.array(
+        [position.get(value, -1) for value in table.values] + [position.get(None, -1)],
+        dtype=np.int64,
+    )
+
+
+def _merge_order(order, keys, id_hi, id_lo, moved):
+    # Re-sorts the changed and new rows into an existing ascending order
+    # without sorting everything again.
+    keep = np.ones(len(keys), dtype=bool)
+    keep[moved] = False
+    base = order[keep[order]]
+    moved = moved[np.lexsort((id_lo[moved], id_hi[moved], keys[moved]))]
+    base_keys = keys[base]
+    left = np.searchsorted(base_keys, keys[moved], "left")
+    right = np.searchsorted(base_keys, keys[moved], "right")
+    positions = left.copy()
+    # Equal keys are ordered by doctor_id, like the ORM's tie breaker.
+    for index in np.flatnonzero(right > left):
+        row = moved[index]
+        ties = base[left[index] : right[index]]
+        tie_hi = id_hi[ties]
+        start = np.searchsorted(tie_hi, id_hi[row], "left")
+        end = np.searchsorted(tie_hi, id_hi[row], "right")
+        start += np.searchsorted(id_lo[ties[start:end]], id_lo[row])
+        positions[index] = left[index] + start
+    return np.insert(base, positions, moved)
+
+
+class DirectorySnapshot:
+    """
+    Columnar copy of the doctor list fields with an ascending row order per
+    sort key. Descending pages read an order backwards, and search scans the
+    distinct values of each searched column rather than every row.
+    """
+
+    def __init__(self, columns, tables, ranks, orders, watermark, version):
+        self.columns = columns
+        self.tables = tables
+        self.ranks = ranks
+        self.orders = orders
+        self.watermark = watermark
+        self.version = version
+        self.rows = len(columns["age"])
+        self._lowered = {}
+        self._lock = threading.Lock()
+
+    def sort_keys(self, sort_by):
+        if sort_by == "doctor_id":
+            return self.columns["id_hi"]
+        if sort_by in _INTERNED_FIELDS:
+            return self.ranks[sort_by][self.columns[sort_by]]
+        keys = self.columns[sort_by]
+        if sort_by in _TIME_FIELDS and connection.features.nulls_order_largest:
+            keys = np.where(keys == _NULL_TIME, np.iinfo(np.int64).max, keys)
+        return keys
+
+    def ascending(self, sort_by):
+        order = self.orders.get(sort_by)
+        if order is None:
+            with self._lock:
+                order = self.orders.get(sort_by)
+                if order is None:
+                    order = np.lexsort(
+                        (
+                            self.columns["id_lo"],
+                            self.columns["id_hi"],
+                            self.sort_keys(sort_by),
+                        )
+                    )
+                    self.orders[sort_by] = order
+        return order
+
+    def prepare(self):
+        for sort_by in ("doctor_id", *DOCTOR_SORT_FIELDS):
+            self.ascending(sort_by)
+
+    def _lowered_values(self, field):
+        values = self.tables[field].values
+        with self._lock:
+            lowered = self._lowered.get(field, np.array([], dtype=str))
+            if len(lowered) < len(values):
+                tail = [
+                    value.translate(_ASCII_LOWER) for value in values[len(lowered) :]
+                ]
+                lowered = np.concatenate([lowered, np.array(tail, dtype=str)])
+                self._lowered[field] = lowered
+        return lowered
+
+    def matches(self, search):
+        term = search.translate(_ASCII_LOWER)
+        mask = np.zeros(self.rows, dtype=bool)
+        for field in _SEARCH_FIELDS:
+            codes = np.flatnonzero(np.char.find(self._lowered_values(field), term) >= 0)
+            if len(codes):
+                mask |= np.isin(self.columns[field], codes)
+        return mask
+
+    def _value(self, field, index):
+        code = self.columns[field][index]
+        return None if code == -1 else self.tables[field].values[code]
+
+    def _row(self, index):
+        columns = self.columns
+        designation = self._value("designation", index)
+        days = self.tables["availability"].values
+        profile = str(columns["update_profile"][index])
+        return {
+            "id": str(columns["create_id"][index]),
+            "name": f"{self._value('first_name', index)} {self._value('last_name', index)}",
+            "profile_image": (
+                Doctor._meta.get_field("update_profile").storage.url(profile)
+                if profile
+                else None
+            ),
+            "designation": _DESIGNATIONS.get(designation, designation),
+            "availability": {
+                day: days[code]
+                for day, code in zip(DAYS_OF_WEEK, columns["availability"][index])
+            },
+        }
+
+    def list_payload(self, params):
+        # None when the snapshot can't answer exactly like the ORM would.
+        search = params["search"]
+        if search and not (search.isascii() or connection.vendor == "sqlite"):
+            return None
+        order = self.ascending(params["sort_by"])
+        if params["order"] == "desc":
+            order = order[::-1]
+        if search:
+            order = order[self.matches(search)[order]]
+
+        per_page, page = params["per_page"], params["page"]
+        # Same page count as Paginator with allow_empty_first_page.
+        total_pages = max(1, -(-len(order) // per_page))
+        if page > total_pages:
+            raise DirectoryQueryError("Page number out of range.", status_code=404)
+        rows = order[(page - 1) * per_page : page * per_page]
+        return list_payload(
+            [self._row(index) for index in rows], page, total_pages, params
+        )
+
+    @primary_reads()
+    def refreshed(self, version):
+        # A new snapshot with the doctors and availabilities changed since
+        # the watermark, or None when only a full rebuild can be trusted.
+        started = timezone.now()
+        since = self.watermark - timedelta(
+            seconds=settings.DIRECTORY_SNAPSHOT_OVERLAP_SECONDS
+        )
+        # One query per timestamp, so each can use its index; an OR of the
+        # two scans the table on SQLite.
+        doctors = {}
+        doctor_ids = set()
+        for changed in (Q(created_at__gte=since), Q(updated_at__gte=since)):
+            for row in (
+                Doctor.objects.filter(changed).order_by().values_list(*_DOCTOR_FIELDS)
+            ):
+                doctors[row[0]] = row
+            doctor_ids.update(
+                DoctorAvailability.objects.filter(changed, doctor__isnull=False)
+                .order_by()
+                .values_list("doctor_id", flat=True)
+            )
+        doctor_ids.update(doctors)
+        doctors = list(doctors.values())
+        if len(doctor_ids) > max(1000, self.rows // 10):
+            return None
+        ids = sorted(doctor_ids)
+        availabilities = {}
+        for start in range(0, len(ids), 500):
+            availabilities.update(
+                _availabilities(
+                    DoctorAvailability.objects.filter(
+                        doctor_id__in=ids[start : start + 500]
+                    )
+                )
+            )
+        # Availability rows of unchanged doctors are refetched too, since
+        # only whole schedules are stored.
+        known = {row[0] for row in doctors}
+        missing = [doctor_id for doctor_id in ids if doctor_id not in known]
+        for start in range(0, len(missing), 500):
+            doctors.extend(
+                Doctor.objects.filter(doctor_id__in=missing[start : start + 500])
+                .order_by()
+                .values_list(*_DOCTOR_FIELDS)
+            )
+        doctor_count = Doctor.objects.count()
+        availability_count = DoctorAvailability.objects.filter(
+            doctor__isnull=False
+        ).count()
+
+        if not doctors:
+            if (self.rows, int(self.columns["availability_count"].sum())) != (
+                doctor_count,
+                availability_count,
+            ):
+                return None
+            snapshot = DirectorySnapshot(
+                self.columns,
+                self.tables,
+                self.ranks,
+                dict(self.orders),
+                started,
+                version,
+            )
+            snapshot._lowered = dict(self._lowered)
+            return snapshot
+
+        sizes = {field: len(self.tables[field].values) for field in _INTERNED_FIELDS}
+        delta = _encode(doctors, availabilities, self.tables)
+        rows = self._locate(delta["id_hi"], delta["id_lo"])
+        new = rows == -1
+        rows[new] = np.arange(self.rows, self.rows + int(new.sum()))
+
+        columns = {}
+        for name, column in self.columns.items():
+            if column.dtype.kind == "U":
+                width = max(column.dtype.itemsize, delta[name].dtype.itemsize) // 4
+                column = column.astype(f"<U{max(width, 1)}")
+            else:
+                column = np.array(column)
+            if new.any():
+                column = np.concatenate([column, delta[name][new].astype(column.dtype)])
+            column[rows[~new]] = delta[name][~new]
+            columns[name] = column
+        if (
+            len(columns["age"]) != doctor_count
+            or int(columns["availability_count"].sum()) != availability_count
+        ):
+            # Something was deleted, which deltas can't show.
+            return None
+
+        ranks = dict(self.ranks)
+        for field in _INTERNED_FIELDS:
+            # A new value has no rank yet, and one that was missing from the
+            # database when ranks were taken (a renamed-away value, or NULL)
+            # ranks -1 until they are taken again.
+            if (
+                len(self.tables[field].values) != sizes[field]
+                or (ranks[field][delta[field]] == -1).any()
+            ):
+                ranks[field] = _ranks(field, self.tables[field])
+        snapshot = DirectorySnapshot(columns, self.tables, ranks, {}, started, version)
+        existing = rows[~new]
+        for sort_by, order in self.orders.items():
+            # Only rows whose sort value changed, and new rows, move.
+            column = "id_hi" if sort_by == "doctor_id" else sort_by
+            changed = existing[
+                self.columns[column][existing] != columns[column][existing]
+            ]
+            moved = np.concatenate([changed, rows[new]])
+            if not len(moved):
+                snapshot.orders[sort_by] = order
+                continue
+            snapshot.orders[sort_by] = _merge_order(
+                order,
+                snapshot.sort_keys(sort_by),
+                columns["id_hi"],
+                columns["id_lo"],
+                moved,
+            )
+        snapshot._lowered = dict(self._lowered)
+        return snapshot
+
+    def _locate(self, id_hi, id_lo):
+        # Row index of each doctor_id, or -1 for doctors not in the snapshot.
+        order = self.ascending("doctor_id")
+        sorted_hi = self.columns["id_hi"][order]
+        sorted_lo = self.columns["id_lo"][order]
+        rows = np.full(len(id_hi), -1, dtype=np.int64)
+        if not self.rows:
+            return rows
+        start = np.searchsorted(sorted_hi, id_hi, "left")
+        end = np.searchsorted(sorted_hi, id_hi, "right")
+        # Within equal high halves, sorted by the low half.
+        for index in np.flatnonzero(end > start):
+            position = start[index] + np.searchsorted(
+                sorted_lo[start[index] : end[index]], id_lo[index]
+            )
+            if position < end[index] and sorted_lo[position] == id_lo[index]:
+                rows[index] = order[position]
+        return rows
+
+    def save(self, path):
+        # Each save writes a new generation directory and then points CURRENT
+        # at it, so readers never see a half-written snapshot.
+        generation = f"{time.time_ns()}-{os.getpid()}"
+        directory = os.path.join(path, generation)
+        os.makedirs(directory)
+        arrays = {f"column.{name}": column for name, column in self.columns.items()}
+        for name, table in self.tables.items():
+            arrays[f"table.{name}"] = np.array(table.values, dtype=str)
+        arrays.update({f"rank.{name}": ranks for name, ranks in self.ranks.items()})
+        arrays.update({f"order.{name}": order for name, order in self.orders.items()})
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        meta = {
+            "format": _FORMAT,
+            "source": _source(),
+            "watermark": self.watermark.isoformat(),
+            "version": self.version,
+            "arrays": sorted(arrays),
+        }
+        with open(os.path.join(directory, "meta.json"), "w") as file:
+            json.dump(meta, file)
+
+        pointer = os.path.join(path, f"CURRENT.{generation}")
+        with open(pointer, "w") as file:
+            file.write(generation)
+        os.replace(pointer, os.path.join(path, "CURRENT"))
+        # Older generations go; a newer one belongs to a concurrent save.
+        for name in os.listdir(path):
+            if name.startswith("CURRENT") or name == generation:
+                continue
+            if int(name.split("-")[0]) < int(generation.split("-")[0]):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        # Arrays are memory-mapped copy-on-write, so workers loading the same
+        # generation share its pages.
+        try:
+            with open(os.path.join(path, "CURRENT")) as file:
+                directory = os.path.join(path, file.read().strip())
+            with open(os.path.join(directory, "meta.json")) as file:
+                meta = json.load(file)
+            if meta["format"] != _FORMAT or meta["source"] != _source():
+                return None
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="c")
+                for name in meta["arrays"]
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+        groups = defaultdict(dict)
+        for name, array in arrays.items():
+            group, _, key = name.partition(".")
+            groups[group][key] = array
+        tables = {
+            name: _Table(array.tolist()) for name, array in groups["table"].items()
+        }
+        return cls(
+            groups["column"],
+            tables,
+            groups["rank"],
+            groups["order"],
+            datetime.fromisoformat(meta["watermark"]),
+            meta["version"],
+        )
+
+
+@primary_reads()
+def build_snapshot(version):
+    started = timezone.now()
+    tables = {name: _Table() for name in (*_INTERNED_FIELDS, "availability")}
+    availabilities = _availabilities(DoctorAvailability.objects.all())
+    doctors = list(
+        Doctor.objects.order_by()
+        .values_list(*_DOCTOR_FIELDS)
+        .iterator(chunk_size=10000)
+    )
+    columns = _encode(doctors, availabilities, tables)
+    ranks = {field: _ranks(field, tables[field]) for field in _INTERNED_FIELDS}
+    snapshot = DirectorySnapshot(columns, tables, ranks, {}, started, version)
+    snapshot.prepare()
+    return snapshot
+
+
+def _save(snapshot):
+    _state["saved_at"] = time.monotonic()
+    try:
+        snapshot.save(settings.DIRECTORY_SNAPSHOT_PATH)
+    except OSError:
+        logger.exception("Could not save the directory snapshot")
+
+
+def _build():
+    try:
+        snapshot = build_snapshot(directory_version())
+        _state["snapshot"] = snapshot
+        _count("built")
+        _save(snapshot)
+    finally:
+        with _lock:
+            _state["building"] = False
+
+
+def _build_in_background():
+    try:
+        _build()
+    except Exception:
+        logger.exception("Building the directory snapshot failed")
+    finally:
+        connections.close_all()
+
+
+def _save_later(snapshot):
+    _state["saved_at"] = time.monotonic()
+    if not settings.CACHE_REVALIDATE_ASYNC:
+        _save(snapshot)
+        return
+    threading.Thread(
+        target=_save, args=(snapshot,), name="directory-snapshot", daemon=True
+    ).start()
+
+
+def rebuild_snapshot(wait=False):
+    with _lock:
+        if _state["building"]:
+            return
+        _state["building"] = True
+    if wait or not settings.CACHE_REVALIDATE_ASYNC:
+        _build()
+        return
+    threading.Thread(
+        target=_build_in_background, name="directory-snapshot", daemon=True
+    ).start()
+
+
+def _reset_after_fork():
+    # A forked worker inherits the snapshot but not a build in progress.
+    if _state["pid"] != os.getpid():
+        with _lock:
+            if _state["pid"] != os.getpid():
+                _state["pid"] = os.getpid()
+                _state["building"] = False
+
+
+def current_snapshot():
+    # The snapshot for the current directory version, or None while one is
+    # being built; callers then use the ORM.
+    _reset_after_fork()
+    if _state["snapshot"] is None and not _state["loaded"]:
+        with _refresh_lock:
+            if not _state["loaded"]:
+                _state["snapshot"] = DirectorySnapshot.load(
+                    settings.DIRECTORY_SNAPSHOT_PATH
+                )
+                _state["loaded"] = True
+                if _state["snapshot"] is not None:
+                    _count("loaded")
+    if _state["snapshot"] is None:
+        # Only built at once when revalidation is synchronous.
+        rebuild_snapshot()
+        return _state["snapshot"]
+
+    version = directory_version()
+    if _state["snapshot"].version == version:
+        return _state["snapshot"]
+    with _refresh_lock:
+        snapshot = _state["snapshot"]
+        if snapshot is None:
+            return None
+        if snapshot.version != version:
+            snapshot = snapshot.refreshed(version)
+            if snapshot is None:
+                _state["snapshot"] = None
+                _count("mismatched")
+                rebuild_snapshot()
+                return _state["snapshot"]
+            _state["snapshot"] = snapshot
+            _count("refreshed")
+            if time.monotonic() - _state["saved_at"] > _SAVE_INTERVAL_SECONDS:
+                _save_later(snapshot)
+        return snapshot
+
+
+def snapshot_list_payload(params):
+    snapshot = current_snapshot()
+    payload = None if snapshot is None else snapshot.list_payload(params)
+    _count("fallback" if payload is None else "served")
+    return payload
+
+
+def clear_snapshot():
+    with _refresh_lock:
+        _state.update(snapshot=None, loaded=False)
@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+
+from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
+from allauth.socialaccount.models import SocialApp
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.signals import request_started
+from django.db import DatabaseError
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpRequest
+
+logger = logging.getLogger(__name__)
+
+_apps = {}
+_lock = threading.Lock()
+_warmed = False
+
+
+def clear_social_app_cache(**kwargs):
+    with _lock:
+        _apps.clear()
+
+
+class CachedSocialAccountAdapter(DefaultSocialAccountAdapter):
+    # SocialApp rows change a few times a year, yet allauth re-reads them on
+    # every provider_login_url, OAuth start and callback. Keep the resolved
+    # list per process; signals clear it here and the TTL bounds how long
+    # other worker processes can serve a stale copy.
+    def list_apps(self, request, provider=None, client_id=None):
+        site_id = get_current_site(request).pk if request else None
+        key = (site_id, provider, client_id)
+        now = time.monotonic()
+        with _lock:
+            entry = _apps.get(key)
+        if entry is not None and entry[0] > now:
+            return list(entry[1])
+
+        apps = super().list_apps(request, provider=provider, client_id=client_id)
+        with _lock:
+            _apps[key] = (now + settings.SOCIAL_APP_CACHE_TTL, apps)
+        return list(apps)
+
+
+def warm_social_login_cache(request=None):
+    # Site.objects.get_current() fills Django's own SITE_CACHE; listing the
+    # Google apps fills ours, so the login page and OAuth views start warm.
+    request = request or HttpRequest()
+    Site.objects.get_current(request)
+    CachedSocialAccountAdapter(request).list_apps(request, provider="google")
+
+
+@receiver(request_started)
+def warm_on_first_request(sender, **kwargs):
+    global _warmed
+    if _warmed or not settings.SOCIAL_LOGIN_WARMUP:
+        return
+    _warmed = True
+    try:
+        warm_social_login_cache()
+    except (Site.DoesNotExist, DatabaseError) as exc:
+        logger.warning("Social login cache warmup failed: %s", exc)
+
+
+post_save.connect(clear_social_app_cache, sender=SocialApp)
+post_delete.connect(clear_social_app_cache, sender=SocialApp)
+m2m_changed.connect(clear_social_app_cache, sender=SocialApp.sites.through)
+post_save.connect(clear_social_app_cache, sender=Site)
+post_delete.connect(clear_social_app_cache, sender=Site)
@@ -2,14 +2,40 @@ from datetime import time
 import io
 
 import pytest
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from PIL import Image
 
 from medflex.models import Doctor, DoctorAvailability
+from medflex.social import clear_social_app_cache
 from medflex.views import User
 from PIL import Image
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    clear_social_app_cache()
+    yield
+    cache.clear()
+    clear_social_app_cache()
+
+
+@pytest.fixture(autouse=True)
+def sync_login_logs(settings):
+    settings.LOGIN_LOG_ASYNC = False
+
+
+@pytest.fixture(autouse=True)
+def sync_cache_revalidation(settings):
+    settings.CACHE_REVALIDATE_ASYNC = False
+
+
+@pytest.fixture(autouse=True)
+def no_social_warmup(settings):
+    settings.SOCIAL_LOGIN_WARMUP = False
+
+
 @pytest.fixture
 def doctor_instance():
     return Doctor.objects.create(
@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.authentication import issue_tokens
+
+
+@pytest.fixture
+def bearer_client(create_user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {issue_tokens(create_user)['access']}"
+    )
+    return client
+
+
+@pytest.mark.django_db
+def test_async_list_matches_sync_list(bearer_client, create_doctor_availability):
+    params = {"sort_by": "last_name", "order": "desc", "per_page": 5}
+
+    sync = bearer_client.get(reverse("doctor-list-api"), params)
+    response = bearer_client.get(reverse("doctor-list-api-async"), params)
+
+    assert response.status_code == 200
+    assert response.json() == sync.json()
+    assert response.json()["doctors"][0]["availability"]["monday"] != "NA"
+
+
+@pytest.mark.django_db
+def test_async_list_validates_params(bearer_client):
+    url = reverse("doctor-list-api-async")
+
+    assert bearer_client.get(url, {"sort_by": "secret"}).status_code == 400
+    assert bearer_client.get(url, {"page": 2}).status_code == 404
+    assert bearer_client.post(url).status_code == 405
+
+
+@pytest.mark.django_db
+def test_async_schedule(bearer_client, create_doctor_availability):
+    doctor = create_doctor_availability.doctor
+    url = reverse("update_doctor_data_api_async", args=[doctor.doctor_id])
+
+    response = bearer_client.get(url)
+
+    assert response.status_code == 200
+    assert (
+        response.json()
+        == bearer_client.get(
+            reverse("update_doctor_data_api", args=[doctor.doctor_id])
+        ).json()
+    )
+    missing = reverse("update_doctor_data_api_async", args=["not-a-uuid"])
+    assert bearer_client.get(missing).status_code == 400
+
+
+@pytest.mark.django_db
+def test_async_dashboard_accepts_session_and_rejects_anonymous(create_user):
+    client = APIClient()
+    url = reverse("dashboard-api-async")
+
+    response = client.get(url)
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"] == 'Bearer realm="api"'
+
+    client.force_login(create_user)
+    assert client.get(url).json() == {
+        "message": "Welcome to the dashboard",
+        "user": create_user.username,
+    }
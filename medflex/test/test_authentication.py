@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.functional import empty
+from rest_framework.test import APIClient
+
+from medflex.authentication import TokenUser, decode_token, issue_tokens
+from medflex.models import LoginLogs, User
+
+
+@pytest.fixture
+def token_user():
+    return User.objects.create_user(
+        username="api_user", email="api@example.com", password="Secret@123"
+    )
+
+
+def bearer_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+@pytest.mark.django_db
+def test_obtain_token_with_email_and_password(token_user):
+    response = APIClient().post(
+        reverse("token-obtain"),
+        {"email": "api@example.com", "password": "Secret@123"},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert decode_token(response.data["access"], "access")["sub"] == str(token_user.pk)
+    assert decode_token(response.data["refresh"], "refresh")["sub"] == str(
+        token_user.pk
+    )
+    assert LoginLogs.objects.filter(email="api@example.com").count() == 1
+
+
+@pytest.mark.django_db
+def test_obtain_token_rejects_bad_credentials(token_user):
+    response = APIClient().post(
+        reverse("token-obtain"),
+        {"email": "api@example.com", "password": "wrong"},
+        format="json",
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_bearer_token_is_verified_without_user_query(token_user):
+    client = bearer_client(issue_tokens(token_user)["access"])
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(reverse("doctor-list-api"))
+    assert response.status_code == 200
+    assert not any("auth_user" in query["sql"] for query in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_token_user_resolves_lazily(token_user):
+    claims = decode_token(issue_tokens(token_user)["access"], "access")
+    user = TokenUser(claims)
+    assert user.is_authenticated and bool(user)
+    assert user._wrapped is empty
+    assert user.username == "api_user"
+    assert isinstance(user, User)
+
+
+@pytest.mark.django_db
+def test_refresh_token_cannot_be_used_as_access(token_user):
+    client = bearer_client(issue_tokens(token_user)["refresh"])
+    response = client.get(reverse("doctor-list-api"))
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"].startswith("Bearer")
+
+
+@pytest.mark.django_db
+def test_expired_access_token_is_rejected(token_user, settings):
+    settings.JWT_ACCESS_TOKEN_LIFETIME = timedelta(seconds=-1)
+    client = bearer_client(issue_tokens(token_user)["access"])
+    response = client.get(reverse("doctor-list-api"))
+    assert response.status_code == 401
+    assert response.data["detail"] == "Token has expired."
+
+
+@pytest.mark.django_db
+def test_refresh_issues_new_tokens(token_user):
+    refresh = issue_tokens(token_user)["refresh"]
+    response = APIClient().post(
+        reverse("token-refresh"), {"refresh": refresh}, format="json"
+    )
+    assert response.status_code == 200
+    assert decode_token(response.data["access"], "access")["sub"] == str(token_user.pk)
+
+
+@pytest.mark.django_db
+def test_refresh_rejects_inactive_user(token_user):
+    refresh = issue_tokens(token_user)["refresh"]
+    token_user.is_active = False
+    token_user.save()
+    response = APIClient().post(
+        reverse("token-refresh"), {"refresh": refresh}, format="json"
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_bearer_token_skips_login_redirect(token_user, create_doctor):
+    client = bearer_client(issue_tokens(token_user)["access"])
+    response = client.put(
+        reverse(
+            "update_doctor_data_profile_api",
+            kwargs={"step": 1, "doctor_id": create_doctor.doctor_id},
+        ),
+        {"city": "Boston"},
+        format="json",
+    )
+    assert response.status_code == 200
+    create_doctor.refresh_from_db()
+    assert create_doctor.city == "Boston"
+
+
+@pytest.mark.django_db
+def test_anonymous_request_still_redirects(create_doctor):
+    response = APIClient().put(
+        reverse(
+            "update_doctor_data_profile_api",
+            kwargs={"step": 1, "doctor_id": create_doctor.doctor_id},
+        ),
+        {"city": "Boston"},
+        format="json",
+    )
+    assert response.status_code == 302
@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.db import connection
+
+from medflex.backends import EmailBackend, unknown_email_cache_key
+from medflex.models import User
+
+
+@pytest.fixture
+def login_user():
+    return User.objects.create_user(
+        username="login_user", email="Login.User@Example.com", password="Secret@123"
+    )
+
+
+@pytest.mark.django_db
+def test_authenticate_email_is_case_insensitive(login_user):
+    user = authenticate(None, email="login.user@example.com", password="Secret@123")
+    assert user == login_user
+
+
+@pytest.mark.django_db
+def test_wrong_password_stops_at_email_backend(login_user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        user = authenticate(None, email=login_user.email, password="wrong")
+    assert user is None
+
+
+@pytest.mark.django_db
+def test_inactive_user_is_rejected(login_user):
+    login_user.is_active = False
+    login_user.save()
+    assert authenticate(None, email=login_user.email, password="Secret@123") is None
+
+
+@pytest.mark.django_db
+def test_unknown_email_is_negatively_cached(django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert authenticate(None, email="ghost@example.com", password="x") is None
+    assert cache.get(unknown_email_cache_key("GHOST@example.com"))
+    with django_assert_num_queries(0):
+        assert authenticate(None, email="ghost@example.com", password="x") is None
+
+
+@pytest.mark.django_db
+def test_unknown_email_still_hashes_the_password(monkeypatch):
+    hashed = []
+    monkeypatch.setattr(User, "set_password", lambda self, raw: hashed.append(raw))
+
+    authenticate(None, email="ghost@example.com", password="x")
+    authenticate(None, email="ghost@example.com", password="y")
+
+    assert hashed == ["x", "y"]
+
+
+@pytest.mark.django_db
+def test_creating_user_clears_negative_cache():
+    authenticate(None, email="new@example.com", password="Secret@123")
+    User.objects.create_user(
+        username="new_user", email="new@example.com", password="Secret@123"
+    )
+    user = authenticate(None, email="new@example.com", password="Secret@123")
+    assert user is not None and user.username == "new_user"
+
+
+@pytest.mark.django_db
+def test_username_login_falls_through_to_model_backend(login_user):
+    assert EmailBackend().authenticate(None, username="login_user", password="Secret@123") is None
+    assert authenticate(None, username="login_user", password="Secret@123") == login_user
+
+
+@pytest.mark.django_db
+def test_email_upper_index_exists():
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, "auth_user")
+    assert "auth_user_email_upper_idx" in constraints
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from medflex.directory import parse_list_params, read_list_payload
+from medflex.doctor_cache import read_cached_doctor
+from medflex.models import LoginLogDailySummary, LoginLogs
+
+
+def make_log(email, days_ago, name="Doc"):
+    created_at = timezone.now() - timedelta(days=days_ago)
+    return LoginLogs.objects.create(name=name, email=email, created_at=created_at)
+
+
+@pytest.mark.django_db
+def test_compact_login_logs_summarises_and_purges_old_rows():
+    old_day = datetime(2020, 1, 5, 9, tzinfo=dt_timezone.utc)
+    for hour in range(3):
+        LoginLogs.objects.create(
+            name="Doc",
+            email="a@example.com",
+            created_at=old_day + timedelta(hours=hour),
+        )
+    LoginLogs.objects.create(name="Doc", email="b@example.com", created_at=old_day)
+    recent = make_log("a@example.com", days_ago=1)
+
+    out = StringIO()
+    call_command("compact_login_logs", days=30, batch_size=2, stdout=out)
+
+    assert list(LoginLogs.objects.values_list("pk", flat=True)) == [recent.pk]
+    summaries = {
+        s.email: s.login_count
+        for s in LoginLogDailySummary.objects.filter(day=old_day.date())
+    }
+    assert summaries == {"a@example.com": 3, "b@example.com": 1}
+    assert "Compacted 4 login logs" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_compact_login_logs_adds_to_existing_summary():
+    LoginLogDailySummary.objects.create(
+        day=datetime(2020, 1, 5).date(),
+        email="a@example.com",
+        name="Doc",
+        login_count=2,
+    )
+    LoginLogs.objects.create(
+        name="Doc",
+        email="a@example.com",
+        created_at=datetime(2020, 1, 5, 12, tzinfo=dt_timezone.utc),
+    )
+
+    call_command("compact_login_logs", days=30, stdout=StringIO())
+
+    assert LoginLogDailySummary.objects.get(email="a@example.com").login_count == 3
+    assert not LoginLogs.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_warm_caches_fills_directory_pages_and_doctor_details(create_doctor):
+    out = StringIO()
+    call_command("warm_caches", pages=2, per_page=[10], workers=4, stdout=out)
+
+    output = out.getvalue()
+    # One doctor, so only page 1 of each sort exists.
+    assert "directory pages: 4 entries in" in output
+    assert "doctor details: 1 entries in" in output
+    assert "templates: 3 entries in" in output
+    assert "Warmed 8 cache entries." in output
+    params = parse_list_params({"sort_by": "last_name", "order": "desc"})
+    assert read_list_payload(params).status == "HIT"
+    assert read_cached_doctor(create_doctor.doctor_id).status == "HIT"
@@ -0,0 +1,34 @@
+import pytest
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.db_metrics import connection_stats, reset_connection_stats
+from medflex.models import User
+
+
+def test_connection_created_is_counted_per_alias():
+    reset_connection_stats()
+
+    connection_created.send(sender=type(connection), connection=connection)
+    stats = connection_stats()
+
+    assert stats["connections_opened"] == {"default": 1}
+    assert stats["requests"] == 0
+    assert stats["connections_per_request"] is None
+
+
+@pytest.mark.django_db
+def test_db_metrics_endpoint_is_staff_only():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="doc"))
+    assert client.get(reverse("db-metrics")).status_code == 403
+
+    client.force_authenticate(User.objects.create_user(username="ops", is_staff=True))
+    reset_connection_stats()
+    response = client.get(reverse("db-metrics"))
+
+    assert response.status_code == 200
+    assert response.data["requests"] == 1
+    assert "pid" in response.data
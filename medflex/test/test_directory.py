@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.directory import doctor_queryset
+from medflex.models import DOCTOR_SORT_FIELDS, Doctor
+
+
+def make_doctor(index, first_name="Same"):
+    return Doctor.objects.create(
+        first_name=first_name,
+        last_name=f"Doc{index}",
+        age=30 + index,
+        gender="male",
+        create_id=f"D{index}",
+        email=f"d{index}@example.com",
+        mobile_number=f"{index:010d}",
+        blood_group="O+",
+    )
+
+
+@pytest.mark.django_db
+def test_every_sort_field_has_a_composite_index():
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, Doctor._meta.db_table
+        )
+    indexed = {tuple(info["columns"]) for info in constraints.values() if info["index"]}
+
+    for field in DOCTOR_SORT_FIELDS:
+        assert (Doctor._meta.get_field(field).column, "doctor_id") in indexed
+
+
+@pytest.mark.django_db
+def test_ties_are_broken_by_doctor_id():
+    doctors = [make_doctor(i) for i in range(4)]
+    by_id = sorted(doctor.doctor_id for doctor in doctors)
+
+    ascending = doctor_queryset("", "first_name", "asc")
+    descending = doctor_queryset("", "first_name", "desc")
+
+    assert [d.doctor_id for d in ascending] == by_id
+    assert [d.doctor_id for d in descending] == by_id[::-1]
+
+
+@pytest.mark.django_db
+def test_list_views_only_sort_by_whitelisted_fields(create_user):
+    client = APIClient()
+    client.force_login(create_user)
+    make_doctor(1, "Zed")
+    make_doctor(2, "Amy")
+
+    response = client.get(reverse("doctor-list-api"), {"sort_by": "password"})
+    assert response.status_code == 400
+
+    response = client.get(reverse("doctor-list-view"), {"sort_by": "password"})
+    assert response.status_code == 200
+    assert [d["name"] for d in response.context["doctors"]] == ["Amy Doc2", "Zed Doc1"]
@@ -0,0 +1,166 @@
+from datetime import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.context_processors import current_doctor
+from medflex.doctor_cache import (
+    doctor_cache_stats,
+    get_cached_doctor,
+    get_doctor_for_email,
+    reset_doctor_cache_stats,
+)
+from medflex.models import User
+from medflex.onboarding import onboard_users
+
+
+@pytest.mark.django_db
+def test_cached_doctor_is_served_without_queries(
+    create_doctor_availability, django_assert_num_queries
+):
+    doctor = create_doctor_availability.doctor
+    reset_doctor_cache_stats()
+
+    with django_assert_num_queries(2):
+        get_cached_doctor(doctor.doctor_id)
+    with django_assert_num_queries(0):
+        cached = get_cached_doctor(doctor.doctor_id)
+
+    assert cached.email == doctor.email
+    assert [a.start_time for a in cached.availabilities.all()] == [time(9)]
+    assert doctor_cache_stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+@pytest.mark.django_db
+def test_cached_doctor_is_invalidated_on_commit(
+    create_doctor_availability, django_capture_on_commit_callbacks
+):
+    doctor = create_doctor_availability.doctor
+    get_cached_doctor(doctor.doctor_id)
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        create_doctor_availability.start_time = time(8)
+        create_doctor_availability.save()
+
+    assert get_cached_doctor(doctor.doctor_id).availabilities.all()[0].start_time == (
+        time(9)
+    )
+    for callback in callbacks:
+        callback()
+    assert get_cached_doctor(doctor.doctor_id).availabilities.all()[0].start_time == (
+        time(8)
+    )
+
+
+@pytest.mark.django_db
+def test_missing_doctor_is_not_cached(create_doctor):
+    doctor_id = create_doctor.doctor_id
+    create_doctor.delete()
+    reset_doctor_cache_stats()
+
+    assert get_cached_doctor(doctor_id) is None
+    assert get_cached_doctor(doctor_id) is None
+    assert doctor_cache_stats()["misses"] == 2
+
+
+@pytest.mark.django_db
+def test_schedule_endpoint_reads_through_cache(create_doctor_availability):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="ops", is_staff=True))
+    url = reverse("update_doctor_data_api", args=[create_doctor_availability.doctor_id])
+    reset_doctor_cache_stats()
+
+    first = client.get(url)
+    second = client.get(url)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert client.get(reverse("cache-metrics")).data["doctor"] == {
+        "hits": 1,
+        "misses": 1,
+        "hit_ratio": 0.5,
+    }
+
+
+@pytest.mark.django_db
+def test_current_doctor_header_is_free_on_warm_cache(
+    create_doctor, django_assert_num_queries
+):
+    user = User.objects.create_user(
+        username="john", email=create_doctor.email, password="Secret@123"
+    )
+    client = Client()
+    client.force_login(user)
+    client.get(reverse("dashboard"))
+
+    request = RequestFactory().get("/")
+    request.user = user
+    with django_assert_num_queries(0):
+        context = current_doctor(request)
+        assert context["current_doctor"].doctor_id == create_doctor.doctor_id
+        assert current_doctor(request)["current_doctor"].email == create_doctor.email
+
+
+@pytest.mark.django_db
+def test_current_doctor_is_refreshed_when_profile_changes(
+    create_doctor, django_capture_on_commit_callbacks
+):
+    assert get_doctor_for_email("nobody@example.com") is None
+    assert get_doctor_for_email(create_doctor.email).first_name == "John"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_doctor.first_name = "Jack"
+        create_doctor.save()
+
+    assert get_doctor_for_email(create_doctor.email).first_name == "Jack"
+
+
+@pytest.mark.django_db
+def test_email_change_drops_the_old_address(
+    create_doctor, django_capture_on_commit_callbacks
+):
+    old_email = create_doctor.email
+    assert get_doctor_for_email(old_email) is not None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_doctor.email = "new@example.com"
+        create_doctor.save()
+
+    assert get_doctor_for_email(old_email) is None
+    assert get_doctor_for_email("new@example.com").pk == create_doctor.pk
+
+
+@pytest.mark.django_db
+def test_onboarding_refreshes_linked_doctors(create_doctor, settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    assert get_cached_doctor(create_doctor.pk).user_name is None
+    assert get_doctor_for_email(create_doctor.email).user_name is None
+
+    onboard_users(
+        [
+            {
+                "username": "john_doe",
+                "email": create_doctor.email,
+                "password": "Secret@123",
+                "first_name": "John",
+                "last_name": "Doe",
+            }
+        ],
+        workers=1,
+    )
+
+    assert get_cached_doctor(create_doctor.pk).user_name == "john_doe"
+    assert get_doctor_for_email(create_doctor.email).user_name == "john_doe"
+
+
+@pytest.mark.django_db
+def test_current_doctor_is_lazy_and_empty_for_anonymous(django_assert_num_queries):
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+
+    with django_assert_num_queries(0):
+        context = current_doctor(request)
+        assert not context["current_doctor"]
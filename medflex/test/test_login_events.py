@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from medflex.login_events import LoginLogBuffer, record_login
+from medflex.models import LoginLogs, User
+
+
+@pytest.fixture
+def async_buffer(settings):
+    settings.LOGIN_LOG_ASYNC = True
+    settings.LOGIN_LOG_FLUSH_INTERVAL_MS = 60000
+    settings.LOGIN_LOG_BATCH_SIZE = 100
+    buffer = LoginLogBuffer()
+    yield buffer
+    buffer.shutdown()
+
+
+@pytest.mark.django_db
+def test_form_login_writes_one_log_row():
+    User.objects.create_user(
+        username="doc", email="doc@example.com", password="Secret@123"
+    )
+    response = Client().post(
+        reverse("login"), {"email": "doc@example.com", "password": "Secret@123"}
+    )
+    assert response.status_code == 302
+    assert LoginLogs.objects.filter(email="doc@example.com").count() == 1
+
+
+@pytest.mark.django_db
+def test_record_login_once_per_request():
+    user = User.objects.create_user(username="doc", email="doc@example.com")
+    request = MagicMock(spec=["META"])
+    record_login(request, user)
+    record_login(request, user)
+    assert LoginLogs.objects.count() == 1
+    assert LoginLogs.objects.get().name == "doc"
+
+
+@pytest.mark.django_db
+def test_async_buffer_defers_inserts(async_buffer, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        async_buffer.record("Doc One", "one@example.com")
+        async_buffer.record("Doc Two", "two@example.com")
+    assert LoginLogs.objects.count() == 0
+
+    assert async_buffer.flush() == 2
+    assert set(LoginLogs.objects.values_list("email", flat=True)) == {
+        "one@example.com",
+        "two@example.com",
+    }
+
+
+@pytest.mark.django_db
+def test_async_buffer_drops_when_full(async_buffer, settings):
+    settings.LOGIN_LOG_MAX_PENDING = 1
+    async_buffer.record("Doc One", "one@example.com")
+    async_buffer.record("Doc Two", "two@example.com")
+    assert async_buffer.flush() == 1
+
+
+@pytest.mark.django_db
+def test_shutdown_flushes_pending_events(async_buffer):
+    async_buffer.record("Doc One", "one@example.com")
+    async_buffer.shutdown()
+    assert LoginLogs.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_record_after_shutdown_restarts_the_writer(async_buffer):
+    async_buffer.record("Doc One", "one@example.com")
+    async_buffer.shutdown()
+
+    async_buffer.record("Doc Two", "two@example.com")
+
+    assert async_buffer._thread.is_alive()
@@ -0,0 +1,118 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.login_stats import rollup_login_logs
+from medflex.models import LoginLogDailySummary, LoginLogs, LoginRollupWatermark, User
+
+
+def log_at(email, *args):
+    created_at = datetime(*args, tzinfo=dt_timezone.utc)
+    return LoginLogs.objects.create(name="Doc", email=email, created_at=created_at)
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="admin", is_staff=True))
+    return client
+
+
+@pytest.mark.django_db
+def test_rollup_only_processes_rows_after_watermark():
+    log_at("a@example.com", 2025, 3, 3, 9)
+    log_at("a@example.com", 2025, 3, 3, 10)
+    assert rollup_login_logs(batch_size=1) == 2
+
+    last = log_at("a@example.com", 2025, 3, 3, 11)
+    assert rollup_login_logs() == 1
+    assert rollup_login_logs() == 0
+
+    summary = LoginLogDailySummary.objects.get(email="a@example.com")
+    assert summary.login_count == 3
+    watermark = LoginRollupWatermark.objects.get()
+    assert (watermark.rolled_up_to, watermark.last_log_id) == (last.created_at, last.pk)
+
+
+@pytest.mark.django_db
+def test_rollup_picks_up_rows_committed_out_of_pk_order():
+    # A buffered flush can commit a lower pk after a higher one was rolled up.
+    created_at = datetime(2025, 3, 3, 9, tzinfo=dt_timezone.utc)
+    LoginLogs.objects.create(
+        pk=10, name="Doc", email="a@example.com", created_at=created_at
+    )
+    assert rollup_login_logs() == 1
+
+    LoginLogs.objects.create(
+        pk=5, name="Doc", email="a@example.com", created_at=created_at.replace(minute=1)
+    )
+    assert rollup_login_logs() == 1
+    assert LoginLogDailySummary.objects.get().login_count == 2
+
+
+@pytest.mark.django_db
+def test_rollup_waits_for_recent_rows(settings):
+    LoginLogs.objects.create(name="Doc", email="a@example.com")
+    assert rollup_login_logs() == 0
+
+    settings.LOGIN_ROLLUP_LAG_SECONDS = 0
+    assert rollup_login_logs() == 1
+
+
+@pytest.mark.django_db
+def test_login_stats_endpoint(api_client, django_assert_num_queries):
+    log_at("a@example.com", 2025, 3, 3, 9)  # Monday
+    log_at("a@example.com", 2025, 3, 4, 9)
+    log_at("b@example.com", 2025, 3, 4, 9)
+    log_at("b@example.com", 2025, 3, 10, 9)  # next week
+    log_at("c@example.com", 2025, 1, 1, 9)  # outside the range
+    rollup_login_logs()
+
+    with django_assert_num_queries(3):
+        response = api_client.get(
+            reverse("login-stats"),
+            {"start": "2025-03-01", "end": "2025-03-31", "top": 1},
+        )
+
+    assert response.status_code == 200
+    assert response.data["logins_per_day"] == [
+        {"day": date(2025, 3, 3), "logins": 1},
+        {"day": date(2025, 3, 4), "logins": 2},
+        {"day": date(2025, 3, 10), "logins": 1},
+    ]
+    assert response.data["unique_users_per_week"] == [
+        {"week": date(2025, 3, 3), "unique_users": 2},
+        {"week": date(2025, 3, 10), "unique_users": 1},
+    ]
+    assert len(response.data["top_emails"]) == 1
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"start": "2025-03-31", "end": "2025-03-01"},
+        {"start": "2020-01-01", "end": "2025-01-01"},
+        {"start": "not-a-date"},
+        {"top": "0"},
+    ],
+)
+@pytest.mark.django_db
+def test_login_stats_rejects_bad_params(api_client, params):
+    response = api_client.get(reverse("login-stats"), params)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_login_stats_requires_authentication():
+    response = APIClient().get(reverse("login-stats"))
+    assert response.status_code in (401, 403)
+
+
+@pytest.mark.django_db
+def test_login_stats_requires_an_admin():
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="doc"))
+    response = client.get(reverse("login-stats"))
+    assert response.status_code == 403
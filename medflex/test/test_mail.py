@@ -0,0 +1,227 @@
+from datetime import time, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from medflex.mail import (
+    claim_batch,
+    deliver_queued_emails,
+    enqueue_email,
+    send_bulk_mail,
+)
+from medflex.models import AvailabilityDigest, DoctorAvailability, OutboundEmail, User
+from medflex.notifications import send_availability_digests
+from medflex.services import provision_doctor_account
+
+
+@pytest.mark.django_db
+def test_password_reset_for_unknown_email_queues_nothing():
+    User.objects.create_user(username="social", email="social@example.com")
+
+    for email in ("nobody@example.com", "social@example.com"):
+        response = APIClient().post(
+            reverse("password_reset"), {"email": email}, format="json"
+        )
+        assert response.status_code == 200
+
+    assert not OutboundEmail.objects.exists()
+
+
+@pytest.mark.django_db
+def test_password_reset_enqueues_instead_of_sending():
+    User.objects.create_user(
+        username="doc", email="doc@example.com", password="Secret@123"
+    )
+    response = APIClient().post(
+        reverse("password_reset"), {"email": "doc@example.com"}, format="json"
+    )
+
+    assert response.status_code == 200
+    assert mail.outbox == []
+    queued = OutboundEmail.objects.get()
+    assert queued.to == ["doc@example.com"]
+    assert "password-reset/confirm/" in queued.html_body
+
+    out = StringIO()
+    call_command("send_queued_emails", stdout=out)
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == "Reset Your Password"
+    assert mail.outbox[0].alternatives[0][1] == "text/html"
+    queued.refresh_from_db()
+    assert queued.status == OutboundEmail.StatusChoices.SENT
+    assert "Sent 1 emails, 0 failed." in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_batch_reuses_one_connection():
+    for i in range(3):
+        enqueue_email("Hello", "Body", [f"user{i}@example.com"])
+
+    with patch("medflex.mail.get_connection", wraps=get_connection) as factory:
+        assert deliver_queued_emails(batch_size=10) == (3, 0)
+
+    assert factory.call_count == 1
+    assert len(mail.outbox) == 3
+
+
+@pytest.mark.django_db
+def test_failed_send_is_retried_with_backoff(settings):
+    settings.EMAIL_QUEUE_BACKOFF_SECONDS = 60
+    queued = enqueue_email("Hello", "Body", ["user@example.com"])
+
+    with patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=ConnectionError("smtp down"),
+    ):
+        assert deliver_queued_emails() == (0, 1)
+
+    queued.refresh_from_db()
+    assert queued.status == OutboundEmail.StatusChoices.PENDING
+    assert queued.attempts == 1
+    assert queued.last_error == "smtp down"
+    assert queued.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert deliver_queued_emails() == (0, 0)
+
+    queued.next_attempt_at = timezone.now()
+    queued.save()
+    assert deliver_queued_emails() == (1, 0)
+
+
+@pytest.mark.django_db
+def test_send_gives_up_after_max_attempts(settings):
+    settings.EMAIL_QUEUE_MAX_ATTEMPTS = 1
+    queued = enqueue_email("Hello", "Body", ["user@example.com"])
+
+    with patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=ConnectionError("smtp down"),
+    ):
+        deliver_queued_emails()
+
+    queued.refresh_from_db()
+    assert queued.status == OutboundEmail.StatusChoices.FAILED
+
+
+@pytest.mark.django_db
+def test_claimed_rows_are_leased(settings):
+    settings.EMAIL_QUEUE_LEASE_SECONDS = 300
+    queued = enqueue_email("Hello", "Body", ["user@example.com"])
+
+    assert claim_batch(10) == [queued]
+    assert claim_batch(10) == []
+
+    queued.refresh_from_db()
+    assert queued.status == OutboundEmail.StatusChoices.PENDING
+    assert queued.next_attempt_at > timezone.now() + timedelta(seconds=250)
+
+
+@pytest.mark.django_db
+def test_connection_failure_retries_the_claimed_batch(settings):
+    settings.EMAIL_QUEUE_BACKOFF_SECONDS = 60
+    settings.EMAIL_QUEUE_LEASE_SECONDS = 300
+    first = enqueue_email("Hello", "Body", ["a@example.com"])
+    second = enqueue_email("Hello", "Body", ["b@example.com"])
+
+    with patch(
+        "django.core.mail.backends.locmem.EmailBackend.open",
+        side_effect=ConnectionError("smtp down"),
+    ):
+        assert deliver_queued_emails() == (0, 2)
+
+    for queued in (first, second):
+        queued.refresh_from_db()
+        assert queued.status == OutboundEmail.StatusChoices.PENDING
+        assert queued.attempts == 1
+        assert queued.last_error == "smtp down"
+        # The backoff, not the lease.
+        assert queued.next_attempt_at < timezone.now() + timedelta(seconds=250)
+
+
+def test_send_bulk_mail_uses_one_connection_per_batch():
+    recipients = [(f"doc{i}@example.com", {"user": None}) for i in range(5)]
+
+    with patch("medflex.mail.get_connection", wraps=get_connection) as conn_mock:
+        sent = send_bulk_mail(
+            "Hello", "password_reset_email.html", recipients, batch_size=2
+        )
+
+    assert sent == 5
+    assert conn_mock.call_count == 3
+    assert [message.to for message in mail.outbox] == [[r[0]] for r in recipients]
+
+
+@pytest.mark.django_db
+def test_availability_changes_are_coalesced_into_one_digest(
+    doctor_instance, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        slot = DoctorAvailability.objects.create(
+            doctor=doctor_instance,
+            day_of_week="monday",
+            start_time=time(9),
+            end_time=time(12),
+        )
+        slot.end_time = time(13)
+        slot.save()
+        DoctorAvailability.objects.create(
+            doctor=doctor_instance,
+            day_of_week="tuesday",
+            start_time=time(10),
+            end_time=time(11),
+        ).delete()
+
+    digest = AvailabilityDigest.objects.get()
+    assert len(digest.changes) == 2
+    assert digest.changes[str(slot.pk)]["end_time"] == "13:00:00"
+
+    assert send_availability_digests() == 0
+    AvailabilityDigest.objects.update(created_at=timezone.now() - timedelta(hours=1))
+    assert send_availability_digests() == 1
+    assert not AvailabilityDigest.objects.exists()
+    assert mail.outbox == []
+    assert deliver_queued_emails() == (1, 0)
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == [doctor_instance.email]
+    assert "13:00:00" in mail.outbox[0].body
+    assert "no longer available" in mail.outbox[0].body
+
+
+@pytest.mark.django_db
+def test_digest_record_merges_into_a_row_created_concurrently(doctor_instance):
+    AvailabilityDigest.objects.create(
+        doctor=doctor_instance, changes={"1": {"action": "removed"}}
+    )
+
+    AvailabilityDigest.record(doctor_instance.pk, {2: {"action": "updated"}})
+
+    digest = AvailabilityDigest.objects.get()
+    assert set(digest.changes) == {"1", "2"}
+
+
+@pytest.mark.django_db
+def test_password_setup_emails_skip_doctors_with_passwords(doctor_instance):
+    provision_doctor_account(doctor_instance, "john_doe")
+    User.objects.create_user(
+        username="other", email="other@example.com", password="Secret@123"
+    )
+
+    out = StringIO()
+    call_command(
+        "send_password_setup_emails", base_url="https://medflex.test/", stdout=out
+    )
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == [doctor_instance.email]
+    html = mail.outbox[0].alternatives[0][0]
+    assert "https://medflex.test/password-reset/confirm/" in html
+    assert "john_doe" in html
+    assert "Sent 1 password setup emails." in out.getvalue()
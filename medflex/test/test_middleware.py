@@ -0,0 +1,73 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncClient, RequestFactory
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from rest_framework.test import APIClient
+
+from medflex.authentication import issue_tokens
+from medflex.middleware import is_lean_api_request
+from medflex.models import User
+
+
+@pytest.fixture
+def api_user():
+    return User.objects.create_user(username="api_user", email="api@example.com")
+
+
+def test_only_bearer_requests_to_api_prefixes_are_lean():
+    factory = RequestFactory()
+    bearer = {"HTTP_AUTHORIZATION": "Bearer abc"}
+
+    assert is_lean_api_request(factory.get("/doctor/api/", **bearer))
+    assert is_lean_api_request(factory.get("/doctor/update/api/get/1/", **bearer))
+    assert not is_lean_api_request(factory.get("/doctor/api/"))
+    assert not is_lean_api_request(factory.get("/dashboard/", **bearer))
+
+
+@pytest.mark.django_db
+def test_bearer_api_request_skips_session_and_frame_options(api_user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(api_user)['access']}")
+
+    response = client.get(reverse("doctor-list-api"))
+
+    assert response.status_code == 200
+    assert not hasattr(response.wsgi_request, "session")
+    assert not hasattr(response.wsgi_request, "_messages")
+    assert "X-Frame-Options" not in response.headers
+
+
+@pytest.mark.django_db
+def test_session_api_request_keeps_full_stack(api_user):
+    client = APIClient()
+    client.force_login(api_user)
+
+    response = client.get(reverse("doctor-list-api"))
+
+    assert response.status_code == 200
+    assert hasattr(response.wsgi_request, "session")
+    assert response.headers["X-Frame-Options"] == "DENY"
+
+
+def test_project_middleware_is_async_capable():
+    # One sync-only middleware puts every ASGI request through a thread hop.
+    for path in settings.MIDDLEWARE:
+        assert import_string(path).async_capable, path
+
+
+@pytest.mark.django_db
+def test_async_view_through_full_stack(api_user):
+    client = AsyncClient()
+    token = issue_tokens(api_user)["access"]
+
+    response = async_to_sync(client.get)(
+        reverse("doctor-list-api-async"), headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    # Without a token the request takes the session/CSRF/auth path.
+    assert (
+        async_to_sync(client.get)(reverse("doctor-list-api-async")).status_code == 401
+    )
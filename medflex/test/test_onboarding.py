@@ -0,0 +1,197 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.backends import unknown_email_cache_key
+from medflex.directory import DIRECTORY_VERSION_KEY
+from medflex.models import Doctor, User
+from medflex.onboarding import hash_passwords, onboard_users, read_onboarding_csv
+
+CSV = (
+    "username,email,password,first_name,last_name\n"
+    "john_doe,doctor@example.com,Secret@123,John,Doe\n"
+    "jane,jane@example.com,Secret@456,Jane,Roe\n"
+)
+DOCTOR_CSV = (
+    "username,email,password,first_name,last_name,create_id,age,gender,"
+    "mobile_number,blood_group,designation,city\n"
+    "ann,ann@example.com,Secret@123,Ann,Lee,DOC200,41,female,9876500000,A+,,Pune\n"
+    "plain,plain@example.com,Secret@456,Pat,Kim,,,,,,,\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def fast_hasher(settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+def test_hash_passwords_in_process_pool():
+    encoded = hash_passwords(["Secret@1", "Secret@2", "Secret@3"], workers=2)
+
+    assert [check_password(f"Secret@{i}", e) for i, e in enumerate(encoded, 1)] == [
+        True,
+        True,
+        True,
+    ]
+
+
+@pytest.mark.django_db
+def test_onboard_users_creates_accounts_and_links_doctors(doctor_instance):
+    cache.set(unknown_email_cache_key("jane@example.com"), True)
+
+    users, errors = onboard_users(read_onboarding_csv(CSV), workers=1)
+
+    assert errors == {}
+    assert len(users) == 2
+    jane = User.objects.get(username="jane")
+    assert jane.check_password("Secret@456")
+    assert cache.get(unknown_email_cache_key("jane@example.com")) is None
+    doctor = Doctor.objects.get(pk=doctor_instance.pk)
+    assert doctor.user_name == "john_doe"
+    assert check_password("Secret@123", doctor.password)
+
+
+@pytest.mark.django_db
+def test_onboard_users_rejects_whole_file_on_bad_rows():
+    User.objects.create_user(username="taken", email="jane@example.com")
+    rows = read_onboarding_csv(CSV + "john_doe,other@example.com,weak,,\n")
+
+    users, errors = onboard_users(rows, workers=1)
+
+    assert users == []
+    assert set(errors) == {3, 4}
+    assert errors[3] == {"email": ["Email is already registered."]}
+    assert "password" in errors[4]
+    assert User.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_onboard_users_command(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(CSV)
+
+    out = StringIO()
+    call_command("onboard_users", str(path), workers=1, stdout=out)
+
+    assert User.objects.count() == 2
+    assert "Created 2 accounts." in out.getvalue()
+    with pytest.raises(CommandError):
+        call_command("onboard_users", str(path), workers=1, stderr=StringIO())
+
+
+@pytest.mark.django_db
+def test_onboard_users_matches_emails_case_insensitively(doctor_instance):
+    User.objects.create_user(username="taken", email="Jane@Example.com")
+    rows = read_onboarding_csv(CSV)
+    rows[0]["email"] = "Doctor@Example.com"
+
+    users, errors = onboard_users(rows, workers=1)
+    assert errors == {3: {"email": ["Email is already registered."]}}
+
+    users, errors = onboard_users(rows[:1], workers=1)
+    assert errors == {}
+    assert Doctor.objects.get(pk=doctor_instance.pk).user_name == "john_doe"
+
+
+@pytest.mark.django_db
+def test_onboard_users_creates_doctor_profiles(doctor_instance):
+    admin = User.objects.create_user(username="admin", is_staff=True)
+    directory_version = cache.get_or_set(DIRECTORY_VERSION_KEY, "v1", None)
+
+    users, errors = onboard_users(
+        read_onboarding_csv(DOCTOR_CSV), workers=1, created_by=admin
+    )
+
+    assert errors == {}
+    assert len(users) == 2
+    doctor = Doctor.objects.get(create_id="DOC200")
+    assert (doctor.email, doctor.age, doctor.city) == ("ann@example.com", 41, "Pune")
+    assert doctor.user_name == "ann"
+    assert doctor.designation is None
+    assert doctor.created_by == admin
+    assert check_password("Secret@123", doctor.password)
+    assert User.objects.get(username="ann").check_password("Secret@123")
+    assert cache.get(DIRECTORY_VERSION_KEY) != directory_version
+
+
+@pytest.mark.django_db
+def test_onboard_users_rejects_bad_doctor_rows(doctor_instance):
+    rows = read_onboarding_csv(
+        DOCTOR_CSV
+        + "bob,bob@example.com,Secret@123,Bob,Lee,DOC123,19,male,9876500001,B+,,\n"
+    )
+
+    users, errors = onboard_users(rows, workers=1)
+
+    assert users == []
+    assert set(errors) == {4}
+    assert "age" in errors[4]
+    rows[2]["age"] = "50"
+    assert onboard_users(rows, workers=1)[1] == {
+        4: {"create_id": ["Create ID is already taken."]}
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_onboarding_endpoint(settings):
+    client = APIClient()
+    client.force_login(User.objects.create_user(username="admin", is_staff=True))
+    upload = SimpleUploadedFile("users.csv", CSV.encode(), content_type="text/csv")
+
+    response = client.post(reverse("bulk-onboarding"), {"file": upload})
+
+    assert response.status_code == 201
+    assert response.data == {"created": 2}
+    assert client.post(reverse("bulk-onboarding"), {}).status_code == 400
+
+    settings.ONBOARDING_API_MAX_ROWS = 1
+    upload = SimpleUploadedFile(
+        "users.csv", DOCTOR_CSV.encode(), content_type="text/csv"
+    )
+    response = client.post(reverse("bulk-onboarding"), {"file": upload})
+    assert response.status_code == 413
+    assert "onboard_users" in response.data["error"]
+
+
+@pytest.mark.django_db
+def test_bulk_onboarding_accepts_exactly_the_row_limit(settings):
+    client = APIClient()
+    client.force_login(User.objects.create_user(username="admin", is_staff=True))
+
+    def upload(count, offset=0):
+        rows = "".join(
+            f"user{i},user{i}@example.com,Secret@{i},First,Last\n"
+            for i in range(offset, offset + count)
+        )
+        csv = "username,email,password,first_name,last_name\n" + rows
+        return SimpleUploadedFile("users.csv", csv.encode(), content_type="text/csv")
+
+    limit = settings.ONBOARDING_API_MAX_ROWS
+    assert limit == 50
+    response = client.post(reverse("bulk-onboarding"), {"file": upload(limit)})
+    assert response.status_code == 201
+    assert response.data == {"created": limit}
+
+    response = client.post(
+        reverse("bulk-onboarding"), {"file": upload(limit + 1, offset=limit)}
+    )
+    assert response.status_code == 413
+    assert User.objects.filter(username=f"user{limit}").exists() is False
+
+
+@pytest.mark.django_db
+def test_bulk_onboarding_requires_an_admin():
+    client = APIClient()
+    client.force_login(User.objects.create_user(username="doc"))
+    upload = SimpleUploadedFile("users.csv", CSV.encode(), content_type="text/csv")
+
+    response = client.post(reverse("bulk-onboarding"), {"file": upload})
+
+    assert response.status_code == 403
+    assert not User.objects.exclude(username="doc").exists()
@@ -0,0 +1,146 @@
+import sqlite3
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from medflex.directory import parse_list_params, read_list_payload
+from medflex.doctor_cache import get_cached_doctor
+from medflex.models import Doctor
+from medflex.routers import (
+    STICKY_COOKIE,
+    PrimaryReplicaRouter,
+    PrimaryStickinessMiddleware,
+)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica_0"]
+
+
+def routed(cookies=None, write=False):
+    seen = {}
+
+    def view(request):
+        router = PrimaryReplicaRouter()
+        seen["before"] = router.db_for_read(Doctor)
+        if write:
+            router.db_for_write(Doctor)
+        seen["after"] = router.db_for_read(Doctor)
+        return HttpResponse()
+
+    request = RequestFactory().get("/doctor/api/")
+    request.COOKIES.update(cookies or {})
+    response = PrimaryStickinessMiddleware(view)(request)
+    return seen, response
+
+
+def test_reads_outside_requests_use_primary(replicas):
+    assert PrimaryReplicaRouter().db_for_read(Doctor) == "default"
+    assert PrimaryReplicaRouter().db_for_write(Doctor) == "default"
+
+
+def test_reads_go_to_replica_until_request_writes(replicas):
+    seen, response = routed(write=True)
+
+    assert seen == {"before": "replica_0", "after": "default"}
+    assert STICKY_COOKIE in response.cookies
+
+
+def test_stickiness_middleware_runs_async(replicas):
+    async def view(request):
+        PrimaryReplicaRouter().db_for_write(Doctor)
+        return HttpResponse()
+
+    middleware = PrimaryStickinessMiddleware(view)
+    response = async_to_sync(middleware)(RequestFactory().get("/doctor/api/"))
+
+    assert iscoroutinefunction(middleware)
+    assert STICKY_COOKIE in response.cookies
+
+
+def test_recent_writer_sticks_to_primary(replicas):
+    seen, response = routed({STICKY_COOKIE: str(time.time() + 5)})
+    assert seen["before"] == "default"
+    assert STICKY_COOKIE not in response.cookies
+
+    seen, _ = routed({STICKY_COOKIE: str(time.time() - 1)})
+    assert seen["before"] == "replica_0"
+
+
+def test_without_replicas_everything_uses_primary():
+    seen, response = routed(write=True)
+
+    assert seen == {"before": "default", "after": "default"}
+    assert STICKY_COOKIE not in response.cookies
+
+
+@pytest.fixture
+def lagging_replica(settings, tmp_path):
+    # A second SQLite database that only changes when sync() copies the
+    # primary into it, like a replica that has fallen behind.
+    if connection.vendor != "sqlite":
+        pytest.skip("copies the primary with the sqlite3 backup API")
+    path = str(tmp_path / "replica.sqlite3")
+    connections.settings["lagging"] = {**connections.settings["default"], "NAME": path}
+    settings.DATABASE_REPLICAS = ["lagging"]
+    # Connected up front: pytest-django only lets tests open connections to
+    # the databases that existed when it set them up.
+    connections["lagging"].connect()
+
+    def sync():
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+
+    yield sync
+    connections["lagging"].close()
+    del connections["lagging"]
+    del connections.settings["lagging"]
+
+
+def in_request(read):
+    seen = {}
+
+    def view(request):
+        seen["value"] = read()
+        return HttpResponse()
+
+    PrimaryStickinessMiddleware(view)(RequestFactory().get("/doctor/api/"))
+    return seen["value"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cache_fills_read_from_the_primary(lagging_replica, doctor_instance):
+    lagging_replica()
+    doctor_instance.first_name = "Jack"
+    doctor_instance.save()
+
+    # Plain request reads see the replica's older row...
+    assert in_request(lambda: Doctor.objects.get().first_name) == "John"
+    # ...but what goes into the shared caches comes from the primary.
+    assert in_request(lambda: get_cached_doctor(doctor_instance.pk)).first_name == (
+        "Jack"
+    )
+    payload = in_request(lambda: read_list_payload(parse_list_params({})).value)
+    assert [row["name"] for row in payload["doctors"]] == ["Jack Doe"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_snapshot_reads_from_the_primary(lagging_replica, doctor_instance):
+    pytest.importorskip("numpy")
+    from medflex.snapshot import build_snapshot
+
+    snapshot = in_request(lambda: build_snapshot("v1"))
+    lagging_replica()
+    doctor_instance.first_name = "Jack"
+    doctor_instance.save()
+
+    refreshed = in_request(lambda: snapshot.refreshed("v2"))
+    payload = refreshed.list_payload(parse_list_params({}))
+    assert [row["name"] for row in payload["doctors"]] == ["Jack Doe"]
@@ -0,0 +1,181 @@
+from datetime import time
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from medflex.models import (
+    AvailabilityDigest,
+    Doctor,
+    DoctorAvailability,
+    User,
+    batched_digests,
+)
+from medflex.serializers import (
+    DoctorAvailabilitySerializer,
+    UpdateDoctorAvailabilitySerializer,
+)
+from medflex.services import (
+    provision_doctor_account,
+    save_availabilities,
+    upsert_availabilities,
+)
+
+
+@pytest.mark.django_db
+def test_provision_creates_user_with_shared_hash(create_doctor):
+    with patch("medflex.services.make_password", wraps=make_password) as hash_mock:
+        user = provision_doctor_account(create_doctor, "john_doe", "Secret@123")
+
+    assert hash_mock.call_count == 1
+    create_doctor.refresh_from_db()
+    assert user.username == "john_doe"
+    assert user.email == create_doctor.email
+    assert user.first_name == "John"
+    assert user.password == create_doctor.password
+    assert user.check_password("Secret@123")
+    assert check_password("Secret@123", create_doctor.password)
+
+
+@pytest.mark.django_db
+def test_provision_updates_existing_user(create_doctor):
+    User.objects.create_user(
+        username="old_name", email=create_doctor.email, password="Old@12345"
+    )
+
+    user = provision_doctor_account(create_doctor, "new_name", "Secret@123")
+
+    assert User.objects.filter(email=create_doctor.email).count() == 1
+    user.refresh_from_db()
+    assert user.username == "new_name"
+    assert user.check_password("Secret@123")
+    assert not user.check_password("Old@12345")
+
+
+@pytest.mark.django_db
+def test_provision_without_password_keeps_existing_hash(create_doctor):
+    User.objects.create_user(
+        username="old_name", email=create_doctor.email, password="Old@12345"
+    )
+
+    user = provision_doctor_account(create_doctor, "new_name")
+
+    user.refresh_from_db()
+    assert user.username == "new_name"
+    assert user.check_password("Old@12345")
+    assert Doctor.objects.get(pk=create_doctor.pk).password is None
+
+
+@pytest.mark.django_db
+def test_availability_list_serializer_inserts_in_one_query(create_doctor):
+    serializer = DoctorAvailabilitySerializer(
+        data=[
+            {"day_of_week": day, "start_time": "09:00", "end_time": "12:00"}
+            for day in ("monday", "tuesday", "wednesday")
+        ],
+        many=True,
+        context={"doctor": create_doctor},
+    )
+    assert serializer.is_valid(), serializer.errors
+
+    with CaptureQueriesContext(connection) as ctx:
+        serializer.save()
+
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 1
+
+    assert create_doctor.availabilities.count() == 3
+
+
+@pytest.mark.django_db
+def test_upsert_availabilities_writes_nothing_when_a_day_is_invalid(
+    create_doctor_availability,
+):
+    doctor = create_doctor_availability.doctor
+
+    saved, errors = upsert_availabilities(
+        doctor,
+        [
+            {"day_of_week": "monday", "start_time": "10:00", "end_time": "11:00"},
+            {"day_of_week": "tuesday", "start_time": "12:00", "end_time": "11:00"},
+        ],
+        UpdateDoctorAvailabilitySerializer,
+    )
+
+    assert saved == []
+    assert set(errors) == {"tuesday"}
+    create_doctor_availability.refresh_from_db()
+    assert create_doctor_availability.start_time == time(9)
+    assert doctor.availabilities.count() == 1
+
+
+@pytest.mark.django_db
+def test_upsert_availabilities_batches_writes_and_defers_digest(
+    create_doctor_availability, django_capture_on_commit_callbacks
+):
+    doctor = create_doctor_availability.doctor
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        saved, errors = upsert_availabilities(
+            doctor,
+            [
+                {"day_of_week": "monday", "start_time": "10:00", "end_time": "11:00"},
+                {"day_of_week": "tuesday", "start_time": "12:00", "end_time": "13:00"},
+            ],
+            UpdateDoctorAvailabilitySerializer,
+        )
+
+    assert errors == {}
+    assert len(saved) == 2
+    assert not AvailabilityDigest.objects.exists()
+    for callback in callbacks:
+        callback()
+    create_doctor_availability.refresh_from_db()
+    assert create_doctor_availability.start_time == time(10)
+    assert create_doctor_availability.updated_at is not None
+    assert len(AvailabilityDigest.objects.get(doctor=doctor).changes) == 2
+
+
+@pytest.mark.django_db
+def test_batched_digests_record_a_transaction_once(
+    create_doctor_availability, django_capture_on_commit_callbacks
+):
+    doctor = create_doctor_availability.doctor
+
+    with patch.object(AvailabilityDigest, "record") as record:
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic(), batched_digests():
+                doctor.availabilities.all().delete()
+                save_availabilities(
+                    [
+                        DoctorAvailability(
+                            doctor=doctor,
+                            day_of_week=day,
+                            start_time=time(9),
+                            end_time=time(12),
+                        )
+                        for day in ("monday", "tuesday")
+                    ]
+                )
+
+    record.assert_called_once()
+    assert len(record.call_args.args[1]) == 3
+
+
+@pytest.mark.django_db
+def test_rolled_back_batch_is_not_reused(
+    create_doctor_availability, django_capture_on_commit_callbacks
+):
+    with pytest.raises(ValueError):
+        with transaction.atomic(), batched_digests():
+            create_doctor_availability.delete()
+            raise ValueError
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_doctor_availability.end_time = time(18)
+        create_doctor_availability.save()
+
+    digest = AvailabilityDigest.objects.get()
+    assert list(digest.changes.values())[0]["end_time"] == "18:00:00"
@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from medflex.shared_cache import SharedMemoryCache
+
+
+@pytest.fixture
+def shared_cache(tmp_path):
+    def make(**options):
+        return SharedMemoryCache(
+            str(tmp_path / "cache"),
+            {"OPTIONS": {"MAX_SIZE": 256 * 1024, **options}},
+        )
+
+    return make
+
+
+def _incr_many(path, times):
+    cache = SharedMemoryCache(path, {"OPTIONS": {"MAX_SIZE": 256 * 1024}})
+    for _ in range(times):
+        cache.incr("hits")
+
+
+def _add_lock(path, results):
+    cache = SharedMemoryCache(path, {"OPTIONS": {"MAX_SIZE": 256 * 1024}})
+    results.put(cache.add("lock", os.getpid()))
+
+
+def test_basic_operations(shared_cache):
+    cache = shared_cache()
+
+    cache.set("page", {"doctors": [1, 2]})
+    assert cache.get("page") == {"doctors": [1, 2]}
+    assert cache.add("page", "other") is False
+    assert cache.add("lease", 1) is True
+    assert cache.get_many(["page", "lease", "missing"]) == {
+        "page": {"doctors": [1, 2]},
+        "lease": 1,
+    }
+    assert cache.incr("lease", 4) == 5
+    assert cache.delete("lease") is True
+    assert cache.get("lease", "gone") == "gone"
+    with pytest.raises(ValueError):
+        cache.incr("lease")
+
+    cache.clear()
+    assert cache.get("page") is None
+
+
+def test_entries_expire(shared_cache):
+    cache = shared_cache()
+
+    cache.set("short", 1, timeout=0.05)
+    cache.set("forever", 2, timeout=None)
+    time.sleep(0.1)
+
+    assert cache.get("short") is None
+    assert cache.has_key("forever")
+    assert cache.touch("forever", 0.05)
+    time.sleep(0.1)
+    assert not cache.has_key("forever")
+
+
+def test_values_move_between_size_classes(shared_cache):
+    cache = shared_cache(SIZE_CLASSES=(512, 8192))
+
+    cache.set("page", "x")
+    cache.set("page", "x" * 4000)
+    assert cache.get("page") == "x" * 4000
+    cache.set("page", "y")
+    assert cache.get("page") == "y"
+
+    cache.set("huge", "x" * 10000)
+    assert cache.get("huge") is None
+
+
+def test_full_set_evicts_least_recently_used(shared_cache):
+    # One set of four slots, so every key competes for the same slots.
+    cache = shared_cache(MAX_SIZE=4 * 512, SIZE_CLASSES=(512,), WAYS=4)
+    for key in "abcd":
+        cache.set(key, key)
+        time.sleep(0.001)
+    cache.get("a")
+
+    cache.set("e", "e")
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acde"] == list("acde")
+
+
+def test_workers_share_entries_and_counters(shared_cache, tmp_path):
+    cache = shared_cache()
+    cache.set("hits", 0)
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_incr_many, args=(str(tmp_path / "cache"), 200))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert cache.get("hits") == 800
+
+
+def test_layout_change_uses_a_new_file(shared_cache, tmp_path):
+    old = shared_cache()
+    old.set("page", "old layout")
+
+    new = shared_cache(WAYS=4)
+    assert new.get("page") is None
+    new.set("page", "new layout")
+
+    # The old layout's file is left as it was for workers still using it.
+    assert old.get("page") == "old layout"
+    assert len(list(tmp_path.glob("cache-*"))) == 2
+
+
+def test_add_is_atomic_across_workers(shared_cache, tmp_path):
+    shared_cache()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_add_lock, args=(str(tmp_path / "cache"), results))
+        for _ in range(8)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(results.get() for _ in workers) == [False] * 7 + [True]
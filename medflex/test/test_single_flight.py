@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from medflex.directory import parse_list_params, read_list_payload
+from medflex.models import User
+from medflex.single_flight import (
+    coalesced_fill,
+    reset_single_flight_stats,
+    single_flight_stats,
+)
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+    results = []
+    reset_single_flight_stats()
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"page": 1}
+
+    def worker():
+        results.append(coalesced_fill("medflex:test:page", compute, 60).value)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"page": 1}] * 8
+    assert single_flight_stats()["computed"] == 1
+    assert single_flight_stats()["coalesced"] == 7
+
+
+def test_previous_value_is_served_while_another_worker_recomputes():
+    cache.set("medflex:test:last", (time.time() - 30, "previous"))
+    cache.add("medflex:test:page:lease", 1234, 10)
+
+    result = coalesced_fill(
+        "medflex:test:page", lambda: "fresh", 60, fallback_key="medflex:test:last"
+    )
+
+    assert result.value == "previous"
+    assert result.status == "STALE"
+    assert cache.get("medflex:test:page") is None
+
+
+def test_waiter_computes_itself_when_the_lease_holder_is_slow(settings):
+    settings.SINGLE_FLIGHT_WAIT_SECONDS = 0.1
+    cache.add("medflex:test:page:lease", 1234, 10)
+    reset_single_flight_stats()
+
+    assert coalesced_fill("medflex:test:page", lambda: "fresh", 60).value == "fresh"
+    assert single_flight_stats()["timed_out"] == 1
+
+
+@pytest.mark.django_db
+def test_directory_page_is_cached_until_a_write_commits(
+    create_doctor_availability,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    params = parse_list_params({})
+    first = read_list_payload(params).value
+
+    with django_assert_num_queries(0):
+        assert read_list_payload(params).value == first
+
+    doctor = create_doctor_availability.doctor
+    with django_capture_on_commit_callbacks(execute=True):
+        doctor.first_name = "Jack"
+        doctor.save()
+
+    assert read_list_payload(params).value["doctors"][0]["name"] == "Jack Doe"
+
+
+@pytest.mark.django_db
+def test_list_serves_stale_page_after_a_write_and_refreshes_it(
+    create_doctor_availability, django_capture_on_commit_callbacks
+):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="ops"))
+    url = reverse("doctor-list-api")
+
+    first = client.get(url)
+    assert first["X-Cache"] == "MISS"
+    assert "Age" not in first
+    assert client.get(url)["X-Cache"] == "HIT"
+    assert first["Cache-Control"] == ("private, max-age=60, stale-while-revalidate=600")
+
+    doctor = create_doctor_availability.doctor
+    with django_capture_on_commit_callbacks(execute=True):
+        doctor.first_name = "Jack"
+        doctor.save()
+
+    stale = client.get(url)
+    assert stale["X-Cache"] == "STALE"
+    assert stale["Age"] == "0"
+    assert stale.json()["doctors"][0]["name"] == "John Doe"
+
+    # Revalidation runs inline in tests, so the next request is fresh.
+    fresh = client.get(url)
+    assert fresh["X-Cache"] == "HIT"
+    assert fresh.json()["doctors"][0]["name"] == "Jack Doe"
+
+
+@pytest.mark.django_db
+def test_deleted_doctor_is_not_served_stale(
+    create_doctor_availability, django_capture_on_commit_callbacks
+):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username="ops"))
+    doctor = create_doctor_availability.doctor
+    url = reverse("update_doctor_data_api", args=[doctor.doctor_id])
+    assert client.get(url)["X-Cache"] == "MISS"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        doctor.delete()
+
+    assert client.get(url).status_code == 404
@@ -0,0 +1,189 @@
+from datetime import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from medflex.directory import (  # noqa: E402
+    DirectoryQueryError,
+    build_list_payload,
+    directory_version,
+    parse_list_params,
+)
+from medflex.models import DOCTOR_SORT_FIELDS, Doctor, DoctorAvailability  # noqa: E402
+from medflex.snapshot import (  # noqa: E402
+    build_snapshot,
+    clear_snapshot,
+    reset_snapshot_stats,
+    snapshot_list_payload,
+    snapshot_stats,
+)
+
+NAMES = [
+    ("John", "Doe", "doctor", "NYC"),
+    ("jane", "Doe", "hod", None),
+    ("John", "Smith", None, "Boston"),
+    ("Ann", "Lee", "doctor", "nyc"),
+    ("Zoe", "Hodge", "hod", "Boston"),
+    ("Émile", "Zola", None, None),
+    ("Ann", "Lee", "doctor", "NYC"),
+]
+
+
+@pytest.fixture
+def snapshot_engine(settings, tmp_path):
+    settings.DIRECTORY_SNAPSHOT = True
+    settings.DIRECTORY_SNAPSHOT_PATH = str(tmp_path / "snapshot")
+    clear_snapshot()
+    reset_snapshot_stats()
+    yield
+    clear_snapshot()
+
+
+def add_doctor(index, first_name, last_name, designation, city, age=40):
+    doctor = Doctor.objects.create(
+        first_name=first_name,
+        last_name=last_name,
+        age=age,
+        gender="male",
+        create_id=f"SNAP{index}",
+        email=f"snap{index}@example.com",
+        mobile_number=f"{index:010d}",
+        blood_group="O+",
+        designation=designation,
+        city=city,
+    )
+    DoctorAvailability.objects.create(
+        doctor=doctor,
+        day_of_week="monday",
+        start_time=time(9 + index % 3),
+        end_time=time(17),
+    )
+    return doctor
+
+
+@pytest.fixture
+def doctors():
+    created = [
+        add_doctor(index, *fields, age=30 + index % 3)
+        for index, fields in enumerate(NAMES)
+    ]
+    # A second slot on the same day, and an edit so updated_at isn't NULL
+    # for every row.
+    DoctorAvailability.objects.create(
+        doctor=created[0], day_of_week="monday", start_time=time(18), end_time=time(20)
+    )
+    created[2].age = 50
+    created[2].save()
+    return created
+
+
+def assert_matches_orm(snapshot, **query):
+    params = parse_list_params(query)
+    try:
+        expected = build_list_payload(params)
+    except DirectoryQueryError:
+        with pytest.raises(DirectoryQueryError):
+            snapshot.list_payload(params)
+        return
+    assert snapshot.list_payload(params) == expected
+
+
+@pytest.mark.django_db
+def test_snapshot_pages_match_the_orm(doctors):
+    snapshot = build_snapshot("v1")
+
+    for sort_by in DOCTOR_SORT_FIELDS:
+        for order in ("asc", "desc"):
+            for search in ("", "jo", "HOD", "oe", "nothing"):
+                for page in (1, 2, 3):
+                    assert_matches_orm(
+                        snapshot,
+                        sort_by=sort_by,
+                        order=order,
+                        search=search,
+                        page=page,
+                        per_page=3,
+                    )
+
+
+@pytest.mark.django_db
+def test_refresh_applies_changes_without_a_rebuild(doctors):
+    snapshot = build_snapshot("v1")
+
+    doctors[1].first_name = "Aaron"
+    doctors[1].save()
+    availability = doctors[3].availabilities.get()
+    availability.end_time = time(12)
+    availability.save()
+    add_doctor(len(NAMES), "Bea", "Doe", "hod", "Austin")
+
+    refreshed = snapshot.refreshed("v2")
+
+    assert refreshed.rows == len(NAMES) + 1
+    assert refreshed.version == "v2"
+    for sort_by in DOCTOR_SORT_FIELDS:
+        for order in ("asc", "desc"):
+            assert_matches_orm(refreshed, sort_by=sort_by, order=order, per_page=20)
+    assert_matches_orm(refreshed, search="a")
+    # The snapshot being served is left as it was.
+    assert snapshot.rows == len(NAMES)
+
+
+@pytest.mark.django_db
+def test_deleted_doctor_triggers_a_rebuild(
+    snapshot_engine, settings, doctors, django_capture_on_commit_callbacks
+):
+    params = parse_list_params({"per_page": "20"})
+    assert len(snapshot_list_payload(params)["doctors"]) == len(NAMES)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        doctors[0].delete()
+
+    payload = snapshot_list_payload(params)
+    settings.DIRECTORY_SNAPSHOT = False
+    assert payload == build_list_payload(params)
+    assert snapshot_stats() == {"built": 2, "mismatched": 1, "served": 2}
+
+
+@pytest.mark.django_db
+def test_new_worker_starts_from_the_saved_snapshot(
+    snapshot_engine, doctors, django_assert_num_queries
+):
+    params = parse_list_params({"sort_by": "city", "order": "desc"})
+    directory_version()
+    expected = snapshot_list_payload(params)
+    clear_snapshot()
+
+    with django_assert_num_queries(0):
+        assert snapshot_list_payload(params) == expected
+    assert snapshot_stats()["loaded"] == 1
+
+
+@pytest.mark.django_db
+def test_directory_pages_come_from_the_snapshot(snapshot_engine, doctors):
+    params = parse_list_params({"search": "doe"})
+
+    payload = build_list_payload(params)
+
+    assert [row["name"] for row in payload["doctors"]] == ["John Doe", "jane Doe"]
+    assert snapshot_stats()["served"] == 1
+
+
+@pytest.mark.django_db
+def test_refresh_sequence_reusing_a_renamed_away_value():
+    bob = add_doctor(0, "Bob", "X", "doctor", "NYC")
+    zed = add_doctor(1, "Zed", "X", "hod", "NYC")
+    snapshot = build_snapshot("v1")
+
+    zed.first_name = "Amy"
+    zed.save()
+    snapshot = snapshot.refreshed("v2")
+    bob.first_name = "Zed"
+    bob.designation = None
+    bob.save()
+    snapshot = snapshot.refreshed("v3")
+
+    for sort_by in ("first_name", "designation"):
+        for order in ("asc", "desc"):
+            assert_matches_orm(snapshot, sort_by=sort_by, order=order)
@@ -0,0 +1,55 @@
+import pytest
+from allauth.socialaccount.models import SocialApp
+from django.contrib.sites.models import Site
+from django.core.signals import request_started
+from django.test import RequestFactory
+
+from medflex import social
+from medflex.social import CachedSocialAccountAdapter, warm_social_login_cache
+
+
+@pytest.fixture
+def google_app(settings):
+    site = Site.objects.create(domain="medflex.test", name="medflex.test")
+    settings.SITE_ID = site.pk
+    app = SocialApp.objects.create(
+        provider="google", name="Google", client_id="id", secret="secret"
+    )
+    app.sites.add(site)
+    return app
+
+
+@pytest.mark.django_db
+def test_google_app_lookup_is_cached(google_app, django_assert_num_queries):
+    request = RequestFactory().get("/accounts/google/login/")
+    adapter = CachedSocialAccountAdapter(request)
+    warm_social_login_cache()
+
+    with django_assert_num_queries(0):
+        assert adapter.get_app(request, "google") == google_app
+        assert adapter.get_provider(request, "google").app == google_app
+
+
+@pytest.mark.django_db
+def test_social_app_changes_clear_the_cache(google_app):
+    request = RequestFactory().get("/")
+    adapter = CachedSocialAccountAdapter(request)
+    assert adapter.get_app(request, "google").client_id == "id"
+
+    google_app.client_id = "rotated"
+    google_app.save()
+    assert adapter.get_app(request, "google").client_id == "rotated"
+
+    google_app.sites.clear()
+    assert adapter.list_apps(request, provider="google") == []
+
+
+@pytest.mark.django_db
+def test_first_request_warms_the_cache(google_app, settings, monkeypatch):
+    settings.SOCIAL_LOGIN_WARMUP = True
+    monkeypatch.setattr(social, "_warmed", False)
+
+    request_started.send(sender=None)
+
+    assert social._warmed
+    assert len(social._apps) == 1
@@ -0,0 +1,158 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from medflex.throttling import LoginRateThrottle
+
+
+@pytest.fixture
+def tight_rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {
+            "login": "2/min",
+            "signup": "2/min",
+            "password_reset": "2/min",
+        },
+    }
+
+
+def post_login(email, ip="10.0.0.1", **extra):
+    return APIClient().post(
+        reverse("login"),
+        {"email": email, "password": "wrong"},
+        format="json",
+        REMOTE_ADDR=ip,
+        **extra,
+    )
+
+
+@pytest.mark.django_db
+def test_login_throttled_before_password_check(tight_rates):
+    assert post_login("a@example.com").status_code == 400
+    assert post_login("a@example.com").status_code == 400
+
+    with patch("medflex.views.LoginSerializer") as serializer_mock:
+        response = post_login("a@example.com")
+
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) > 0
+    serializer_mock.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_email_bucket_applies_across_ips(tight_rates):
+    post_login("a@example.com", ip="10.0.0.1")
+    post_login("a@example.com", ip="10.0.0.2")
+    assert post_login("a@example.com", ip="10.0.0.3").status_code == 429
+    assert post_login("b@example.com", ip="10.0.0.4").status_code == 400
+
+
+@pytest.mark.django_db
+def test_ip_bucket_applies_across_emails(tight_rates):
+    post_login("a@example.com")
+    post_login("b@example.com")
+    assert post_login("c@example.com").status_code == 429
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_proxies", [0, 1])
+def test_spoofed_forwarded_for_does_not_escape_ip_bucket(
+    tight_rates, settings, num_proxies
+):
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "NUM_PROXIES": num_proxies}
+    # The router appends the address it saw (10.0.0.1) to whatever the
+    # client sent; without a router REMOTE_ADDR is that address.
+    responses = [
+        post_login(
+            f"user{index}@example.com",
+            HTTP_X_FORWARDED_FOR=f"203.0.113.{index}, 10.0.0.1",
+        )
+        for index in range(3)
+    ]
+    assert [response.status_code for response in responses] == [400, 400, 429]
+
+
+@pytest.mark.django_db
+def test_bucket_refills_over_time(tight_rates):
+    with patch.object(LoginRateThrottle, "timer", return_value=1000.0):
+        post_login("a@example.com")
+        post_login("a@example.com")
+        assert post_login("a@example.com").status_code == 429
+    with patch.object(LoginRateThrottle, "timer", return_value=1030.0):
+        assert post_login("a@example.com").status_code == 400
+
+
+@pytest.mark.django_db
+def test_get_requests_are_not_throttled(tight_rates):
+    for _ in range(3):
+        post_login("a@example.com")
+    request = Request(APIRequestFactory().get("/login/", REMOTE_ADDR="10.0.0.1"))
+    assert LoginRateThrottle().allow_request(request, None)
+
+
+@pytest.mark.django_db
+def test_password_reset_throttled_before_sending(tight_rates):
+    client = APIClient()
+    url = reverse("password_reset")
+    with patch("medflex.views.CustomPasswordResetView.send_reset_email") as send:
+        send.return_value = "http://testserver/reset/"
+        for _ in range(2):
+            client.post(url, {"email": "a@example.com"}, format="json")
+        response = client.post(url, {"email": "a@example.com"}, format="json")
+    assert response.status_code == 429
+    assert send.call_count == 2
+
+
+def login_request(email, ip="10.0.0.1"):
+    return Request(
+        APIRequestFactory().post(
+            "/login/", {"email": email}, format="json", REMOTE_ADDR=ip
+        ),
+        parsers=[JSONParser()],
+    )
+
+
+@pytest.mark.django_db
+def test_concurrent_requests_never_overdraw_a_bucket(tight_rates):
+    barrier = threading.Barrier(8)
+
+    def attempt(index):
+        request = login_request("a@example.com", ip=f"10.0.1.{index}")
+        barrier.wait()
+        return LoginRateThrottle().allow_request(request, None)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        allowed = list(executor.map(attempt, range(8)))
+
+    assert allowed.count(True) == 2
+
+
+@pytest.mark.django_db
+def test_wait_rounds_up(tight_rates):
+    throttle = LoginRateThrottle()
+    with patch.object(LoginRateThrottle, "timer", return_value=1000.0):
+        for _ in range(2):
+            throttle.allow_request(login_request("a@example.com"), None)
+    with patch.object(LoginRateThrottle, "timer", return_value=1029.5):
+        assert not throttle.allow_request(login_request("a@example.com"), None)
+    assert throttle.wait() == 1
+
+
+@pytest.mark.django_db
+def test_locked_bucket_is_refused(tight_rates):
+    throttle = LoginRateThrottle()
+    throttle.lock_wait = 0.01
+    request = login_request("a@example.com")
+    key = throttle.get_cache_keys(request)[0]
+    throttle.cache.add(f"{key}:lock", 1)
+
+    assert not throttle.allow_request(request, None)
+    throttle.cache.delete(f"{key}:lock")
+    assert throttle.allow_request(request, None)
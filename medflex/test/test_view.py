@@ -6,6 +6,7 @@ import pytest
 from django.contrib.auth.middleware import AuthenticationMiddleware
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core import signing
 from django.core.exceptions import ValidationError
 from django.shortcuts import render
 from django.test import Client
@@ -19,6 +20,7 @@ from django.contrib.sites.models import Site
 from allauth.socialaccount.models import SocialApp
 
 from medflex.models import Doctor, User
+from medflex.wizard import WIZARD_COOKIE, WIZARD_SALT
 from medflex.views import CustomPasswordResetConfirmAPIView, CustomPasswordResetView, Dashboard,DoctorAvailabilityAPIView, DoctorUserNamePasswordUpdateAPIView, LoginView,SignupView
 
 
@@ -110,8 +112,11 @@ def test_post_success_json_request():
     with patch("medflex.views.DoctorSerializer", return_value=serializer_mock):
         response = Dashboard().post(request)
     assert response.status_code == status.HTTP_201_CREATED
-    assert response.data == {"message": "Doctor is added", "doctor_id": "123"}
-    assert request.session["doctor_id"] == "123"
+    assert response.data["message"] == "Doctor is added"
+    assert response.data["doctor_id"] == "123"
+    assert signing.loads(response.data["wizard_token"], salt=WIZARD_SALT) == "123"
+    assert response.cookies[WIZARD_COOKIE].value == response.data["wizard_token"]
+    assert "doctor_id" not in request.session
 
 
 @pytest.mark.django_db
@@ -349,12 +354,11 @@ def test_put_success_step_3():
     with patch("medflex.views.get_object_or_404", return_value=doctor_mock), patch(
         "medflex.views.DoctorUserNamePasswordSerializer", return_value=serializer_mock
     ):
-        with patch("medflex.views.User.objects.get_or_create",return_value=(user_mock,True)):
-            response = Dashboard().put(request)
-            assert response.status_code == 200
-        with patch("medflex.views.User.objects.get_or_create",return_value=(user_mock,False)):
+        with patch("medflex.views.provision_doctor_account",return_value=user_mock) as provision_mock:
             response = Dashboard().put(request)
             assert response.status_code == 200
+            provision_mock.assert_called_once()
+            serializer_mock.save.assert_not_called()
         
 @pytest.mark.django_db
 def test_put_serializer_error_step_4():
@@ -389,12 +393,11 @@ def test_put_doctor_user_name_password_update_api_view_success():
     with patch("medflex.views.get_object_or_404", return_value=doctor_mock), patch(
         "medflex.views.DoctorUserNamePasswordSerializer", return_value=serializer_mock
     ):
-        with patch("medflex.views.User.objects.get_or_create",return_value=(user_mock,True)):
-            response =DoctorUserNamePasswordUpdateAPIView().put(request,doctor_id)
-            assert response.status_code == 200
-        with patch("medflex.views.User.objects.get_or_create",return_value=(user_mock,False)):
+        with patch("medflex.views.provision_doctor_account",return_value=user_mock) as provision_mock:
             response =DoctorUserNamePasswordUpdateAPIView().put(request,doctor_id)
             assert response.status_code == 200
+            provision_mock.assert_called_once()
+            serializer_mock.save.assert_not_called()
             
 @pytest.mark.django_db
 def test_put_doctor_user_name_password_update_api_view_uid_error():
@@ -0,0 +1,77 @@
+import pytest
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from medflex.models import Doctor, DoctorAvailability
+from medflex.wizard import WIZARD_COOKIE, WIZARD_HEADER, make_wizard_token
+
+
+@pytest.fixture
+def wizard_client(create_user):
+    client = Client()
+    client.force_login(create_user)
+    return client
+
+
+@pytest.mark.django_db
+def test_wizard_steps_use_signed_token_not_session(wizard_client, valid_data):
+    response = wizard_client.post(reverse("dashboard"), valid_data)
+    assert response.status_code == 200
+    doctor = Doctor.objects.get(email=valid_data["email"])
+    assert WIZARD_COOKIE in response.cookies
+    assert "doctor_id" not in wizard_client.session
+
+    response = wizard_client.post(
+        reverse("dashboard"),
+        {
+            "step": "3",
+            "day_of_week": ["monday"],
+            "start_time_monday": "09:00",
+            "end_time_monday": "17:00",
+        },
+    )
+    assert response.status_code == 200
+    assert DoctorAvailability.objects.filter(doctor=doctor).count() == 1
+
+
+@pytest.mark.django_db
+def test_wizard_token_header_is_accepted(wizard_client, create_doctor):
+    wizard_client.cookies.pop(WIZARD_COOKIE, None)
+    response = wizard_client.put(
+        reverse("dashboard"),
+        "step=2&bio=Updated",
+        content_type="application/x-www-form-urlencoded",
+        headers={WIZARD_HEADER: make_wizard_token(create_doctor.doctor_id)},
+    )
+    assert response.status_code == 200
+    create_doctor.refresh_from_db()
+    assert create_doctor.bio == "Updated"
+
+
+@pytest.mark.django_db
+def test_tampered_wizard_token_is_rejected(wizard_client, create_doctor):
+    token = make_wizard_token(create_doctor.doctor_id) + "x"
+    response = wizard_client.put(
+        reverse("dashboard"),
+        "step=2&bio=Updated",
+        content_type="application/x-www-form-urlencoded",
+        headers={WIZARD_HEADER: token},
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_legacy_session_doctor_id_still_works(wizard_client, create_doctor):
+    session = wizard_client.session
+    session["doctor_id"] = str(create_doctor.doctor_id)
+    session.save()
+    # With signed cookies the session data is the cookie itself, so the
+    # saved session has to be sent back explicitly under every profile.
+    wizard_client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    response = wizard_client.put(
+        reverse("dashboard"),
+        "step=2&bio=Legacy",
+        content_type="application/x-www-form-urlencoded",
+    )
+    assert response.status_code == 200
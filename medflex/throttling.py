@@ -0,0 +1,101 @@
+import hashlib
+import math
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+# A request must find a token in both its IP and email buckets; otherwise
+# nothing is consumed and DRF answers 429 with Retry-After.
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    methods = ("POST",)
+    cache = default_cache
+    timer = time.time
+    durations = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    # Seconds a bucket lock lives, and how long a request waits for one.
+    lock_timeout = 2
+    lock_wait = 1
+
+    def __init__(self):
+        num, period = api_settings.DEFAULT_THROTTLE_RATES[self.scope].split("/")
+        self.capacity = int(num)
+        self.refill_rate = self.capacity / self.durations[period[0]]
+        self.wait_seconds = None
+
+    def get_cache_keys(self, request):
+        idents = [("ip", self.get_ident(request))]
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if email:
+            idents.append(("email", str(email).strip().lower()))
+        return [
+            f"throttle:{self.scope}:{kind}:{hashlib.sha1(ident.encode()).hexdigest()}"
+            for kind, ident in idents
+        ]
+
+    @contextmanager
+    def locked(self, keys):
+        # cache.add is atomic, so it serves as a short lock around each
+        # bucket's read-modify-write. Keys are taken in order to avoid
+        # deadlocks, and a lock left by a crashed worker expires by itself.
+        deadline = time.monotonic() + self.lock_wait
+        held = []
+        try:
+            for key in sorted(keys):
+                while not self.cache.add(f"{key}:lock", 1, timeout=self.lock_timeout):
+                    if time.monotonic() > deadline:
+                        yield False
+                        return
+                    time.sleep(0.001)
+                held.append(key)
+            yield True
+        finally:
+            self.cache.delete_many([f"{key}:lock" for key in held])
+
+    def allow_request(self, request, view):
+        if request.method not in self.methods:
+            return True
+
+        keys = self.get_cache_keys(request)
+        with self.locked(keys) as acquired:
+            if not acquired:
+                self.wait_seconds = self.lock_wait
+                return False
+
+            now = self.timer()
+            stored = self.cache.get_many(keys)
+            buckets = {}
+            for key in keys:
+                tokens, updated = stored.get(key, (self.capacity, now))
+                elapsed = max(now - updated, 0)
+                buckets[key] = min(self.capacity, tokens + elapsed * self.refill_rate)
+
+            empty = min(buckets.values())
+            if empty < 1:
+                self.wait_seconds = (1 - empty) / self.refill_rate
+                return False
+
+            self.cache.set_many(
+                {key: (tokens - 1, now) for key, tokens in buckets.items()},
+                timeout=int(self.capacity / self.refill_rate) + 1,
+            )
+            return True
+
+    def wait(self):
+        # Round up so Retry-After is never 0 while the bucket is still empty.
+        return None if self.wait_seconds is None else math.ceil(self.wait_seconds)
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    scope = "login"
+
+
+class SignupRateThrottle(TokenBucketThrottle):
+    scope = "signup"
+
+
+class PasswordResetRateThrottle(TokenBucketThrottle):
+    scope = "password_reset"
@@ -2,11 +2,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
 from django.urls import path
+from medflex import async_views
 from medflex.views import (
+    BulkOnboardingAPIView,
+    CacheMetricsAPIView,
     CustomPasswordResetConfirmAPIView,
     CustomPasswordResetConfirmView,
     CustomPasswordResetView,
     Dashboard,
+    DbMetricsAPIView,
     DeleteDoctorView,
     DeleteDoctorViewApi,
     DoctorAvailabilityAPIView,
@@ -20,17 +24,24 @@ from medflex.views import (
     DoctorUpdateApiViewProfile,
     DoctorUpdateView,
     DoctorUserNamePasswordUpdateAPIView,
+    LoginStatsAPIView,
     LoginView,
     LogoutView,
     SignupView,
     SingleDoctorView,
+    TokenObtainAPIView,
+    TokenRefreshAPIView,
 )
 
 urlpatterns = [
     path("", SignupView.as_view(), name="signup"),
     path("login/", LoginView.as_view(), name="login"),
     path("logout/", LogoutView.as_view(), name="logout"),
+    path("api/token/", TokenObtainAPIView.as_view(), name="token-obtain"),
+    path("api/token/refresh/", TokenRefreshAPIView.as_view(), name="token-refresh"),
     path("dashboard/", Dashboard.as_view(), name="dashboard"),
+    path("api/async/dashboard/", async_views.dashboard, name="dashboard-api-async"),
+    path("api/onboarding/", BulkOnboardingAPIView.as_view(), name="bulk-onboarding"),
     path("password-reset/", CustomPasswordResetView.as_view(), name="password_reset"),
     path(
         "password-reset/done/",
@@ -75,6 +86,7 @@ urlpatterns = [
     ),
     path("doctor/view/", DoctorListView.as_view(), name="doctor-list-view"),
     path("doctor/api/", DoctorListAPIView.as_view(), name="doctor-list-api"),
+    path("doctor/api/async/", async_views.doctor_list, name="doctor-list-api-async"),
     path(
         "doctor/update/<uuid:doctor_id>/",
         DoctorUpdateView.as_view(),
@@ -85,6 +97,11 @@ urlpatterns = [
         DoctorUpdateApiView.as_view(),
         name="update_doctor_data_api",
     ),
+    path(
+        "doctor/update/api/async/get/<str:doctor_id>/",
+        async_views.doctor_schedule,
+        name="update_doctor_data_api_async",
+    ),
     path(
         "doctor/update/api/personal/<int:step>/<str:doctor_id>/",
         DoctorUpdateApiViewPersonal.as_view(),
@@ -116,6 +133,9 @@ urlpatterns = [
         name="delete_doctor_api",
     ),
     path("doctor/data", SingleDoctorView.as_view(), name="doctor_data"),
+    path("login-stats/", LoginStatsAPIView.as_view(), name="login-stats"),
+    path("db-metrics/", DbMetricsAPIView.as_view(), name="db-metrics"),
+    path("cache-metrics/", CacheMetricsAPIView.as_view(), name="cache-metrics"),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,6 +1,8 @@
+import csv
 import hashlib
 import re
 import uuid
+from datetime import timedelta
 from uuid import UUID
 
 from django.conf import settings
@@ -11,23 +13,52 @@ from django.contrib.auth.signals import user_logged_in
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.views import PasswordResetConfirmView
 from django.core.exceptions import ValidationError
-from django.core.mail import EmailMultiAlternatives
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import Paginator
 from django.core.validators import validate_email
-from django.db.models import Q
+from django.db import transaction
 from django.dispatch import receiver
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.utils.crypto import get_random_string
 from django.utils.encoding import force_bytes
 from django.utils.html import strip_tags
+from django.utils.dateparse import parse_date
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.views.generic import TemplateView, UpdateView
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from medflex.models import Doctor, DoctorAvailability, LoginLogs
+from medflex.authentication import (
+    BearerOrLoginRequiredMixin,
+    decode_token,
+    issue_tokens,
+)
+from medflex.db_metrics import connection_stats
+from medflex.doctor_cache import (
+    doctor_cache_stats,
+    get_cached_doctor,
+    read_cached_doctor,
+)
+from medflex.directory import (
+    DirectoryQueryError,
+    doctor_queryset,
+    parse_list_params,
+    read_list_payload,
+    schedule_payload,
+)
+from medflex.login_events import record_login
+from medflex.login_stats import login_stats
+from medflex.mail import enqueue_email
+from medflex.models import (
+    DOCTOR_SORT_FIELDS,
+    Doctor,
+    DoctorAvailability,
+    batched_digests,
+)
+from medflex.onboarding import onboard_users, read_onboarding_csv
 from medflex.serializers import (
     DoctorAvailabilitySerializer,
     DoctorSerializer,
@@ -36,13 +67,22 @@ from medflex.serializers import (
     LoginSerializer,
     PasswordResetSerializer,
     SignupSerializer,
+    TokenRefreshSerializer,
     UpdateDoctorAvailabilitySerializer,
     UpdateDoctorSerializer,
 )
+from medflex.services import provision_doctor_account, upsert_availabilities
+from medflex.single_flight import set_cache_headers, single_flight_stats
+from medflex.throttling import (
+    LoginRateThrottle,
+    PasswordResetRateThrottle,
+    SignupRateThrottle,
+)
+from medflex.wizard import set_wizard_token, wizard_doctor_id
 from rest_framework import generics, status
 from rest_framework.decorators import schema
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -53,6 +93,7 @@ from django.core.paginator import Paginator
 class SignupView(generics.CreateAPIView, TemplateView):
     template_name = "signup.html"
     serializer_class = SignupSerializer
+    throttle_classes = [SignupRateThrottle]
 
     @swagger_auto_schema(
         tags=["Singup"],
@@ -84,6 +125,7 @@ class SignupView(generics.CreateAPIView, TemplateView):
 
 class LoginView(APIView, TemplateView):
     template_name = "login.html"
+    throttle_classes = [LoginRateThrottle]
 
     def get(self, request):
         return render(request, "login.html")
@@ -100,7 +142,6 @@ class LoginView(APIView, TemplateView):
         if serializer.is_valid():
             user = serializer.validated_data["user"]
             login(request, user)
-            LoginLogs.objects.create(name=user.username, email=user.email)
 
             if is_api_request:
                 return Response(
@@ -113,8 +154,46 @@ class LoginView(APIView, TemplateView):
 
 
 @receiver(user_logged_in)
-def log_google_login(sender, request, user, **kwargs):
-    LoginLogs.objects.create(name=user.get_full_name(), email=user.email)
+def log_user_login(sender, request, user, **kwargs):
+    record_login(request, user)
+
+
+class TokenObtainAPIView(APIView):
+    authentication_classes = []
+    throttle_classes = [LoginRateThrottle]
+
+    @swagger_auto_schema(
+        tags=["Token"],
+        request_body=LoginSerializer,
+        responses={200: "Access and refresh tokens", 400: "Invalid credentials"},
+    )
+    def post(self, request):
+        serializer = LoginSerializer(data=request.data, context={"request": request})
+        if serializer.is_valid():
+            user = serializer.validated_data["user"]
+            record_login(request, user)
+            return Response(issue_tokens(user), status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TokenRefreshAPIView(APIView):
+    authentication_classes = []
+
+    @swagger_auto_schema(
+        tags=["Token"],
+        request_body=TokenRefreshSerializer,
+        responses={200: "New access and refresh tokens", 401: "Invalid token"},
+    )
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claims = decode_token(serializer.validated_data["refresh"], "refresh")
+        user = User.objects.filter(pk=claims["sub"], is_active=True).first()
+        if not user:
+            return Response(
+                {"detail": "User not found."}, status=status.HTTP_401_UNAUTHORIZED
+            )
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
 
 
 class LogoutView(APIView):
@@ -138,13 +217,18 @@ class LogoutView(APIView):
 class CustomPasswordResetView(APIView):
     template_name = "forgetpassword.html"
     success_url = reverse_lazy("password_reset_done")
+    throttle_classes = [PasswordResetRateThrottle]
+
+    def get_users(self, email):
+        # As PasswordResetForm.get_users: only active accounts that have a
+        # password to reset get an email.
+        users = User.objects.filter(email__iexact=email, is_active=True)
+        return [user for user in users if user.has_usable_password()]
 
     def send_reset_email(self, email, request):
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            user = email
-        if isinstance(user, User):
+        users = self.get_users(email)
+        user = users[0] if users else None
+        if user is not None:
             token = default_token_generator.make_token(user)
             uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
         else:
@@ -153,24 +237,24 @@ class CustomPasswordResetView(APIView):
         reset_url = request.build_absolute_uri(
             reverse("password_reset_confirm", kwargs={"uidb64": uidb64, "token": token})
         )
+        if user is None:
+            # The caller answers the same way either way, so the response
+            # does not reveal whether the address has an account.
+            return reset_url
 
         subject = "Reset Your Password"
         message = render_to_string(
             "password_reset_email.html",
             {
                 "reset_url": reset_url,
-                "user": user if isinstance(user, User) else None,
+                "user": user,
                 "uidb64": uidb64,
                 "token": token,
             },
         )
 
-        plain_message = strip_tags(message)
-        email_message = EmailMultiAlternatives(
-            subject, plain_message, settings.DEFAULT_FROM_EMAIL, [email]
-        )
-        email_message.attach_alternative(message, "text/html")
-        email_message.send()
+        # Delivered by the send_queued_emails worker, not inside the request.
+        enqueue_email(subject, strip_tags(message), [user.email], html_body=message)
         return reset_url
 
     def get(self, request, *args, **kwargs):
@@ -328,17 +412,7 @@ class Dashboard(LoginRequiredMixin, APIView):
                 {"message": "Welcome to the dashboard", "user": str(request.user)},
                 status=status.HTTP_200_OK,
             )
-        doctor = (
-            Doctor.objects.filter(email=request.user.email).first()
-            if request.user.is_authenticated
-            else None
-        )
-
-        if doctor:
-            return render(
-                request, self.template_name, {"user": request.user, "doctor": doctor}
-            )
-
+        # The header avatar comes from the current_doctor context processor.
         return render(request, self.template_name, {"user": request.user})
 
     def post(self, request):
@@ -346,7 +420,7 @@ class Dashboard(LoginRequiredMixin, APIView):
         step = request.POST.get("step")
 
         if step == "3":
-            doctor_id = request.session.get("doctor_id")
+            doctor_id = wizard_doctor_id(request)
             if not doctor_id:
                 return render(
                     request,
@@ -367,15 +441,20 @@ class Dashboard(LoginRequiredMixin, APIView):
                             "end_time": end_time,
                         }
                     )
-            DoctorAvailability.objects.filter(
-                doctor=doctor,
-                day_of_week__in=[item["day_of_week"] for item in availability_data],
-            ).delete()
             serializer = DoctorAvailabilitySerializer(
                 data=availability_data, many=True, context={"request": request}
             )
             if serializer.is_valid():
-                serializer.save()
+                # Replace the submitted days in one transaction so a failed
+                # insert never leaves the doctor without those days.
+                with transaction.atomic(), batched_digests():
+                    DoctorAvailability.objects.filter(
+                        doctor=doctor,
+                        day_of_week__in=[
+                            item["day_of_week"] for item in availability_data
+                        ],
+                    ).delete()
+                    serializer.save()
                 return render(
                     request,
                     self.template_name,
@@ -394,19 +473,25 @@ class Dashboard(LoginRequiredMixin, APIView):
             serializer = DoctorSerializer(data=data, context={"request": request})
             if serializer.is_valid():
                 doctor = serializer.save()
-                request.session["doctor_id"] = str(doctor.doctor_id)
-                response_data = {
-                    "message": "Doctor is added",
-                    "doctor_id": str(doctor.doctor_id),
-                }
                 if is_api_request:
-                    return Response(response_data, status=status.HTTP_201_CREATED)
-                return render(
-                    request,
-                    self.template_name,
-                    {"success": True, "errors": None},
-                    status=200,
-                )
+                    response = Response(status=status.HTTP_201_CREATED)
+                else:
+                    response = render(
+                        request,
+                        self.template_name,
+                        {"success": True, "errors": None},
+                        status=200,
+                    )
+                # The wizard carries the doctor in a signed cookie/token, so
+                # later steps need no session write.
+                token = set_wizard_token(response, doctor.doctor_id)
+                if is_api_request:
+                    response.data = {
+                        "message": "Doctor is added",
+                        "doctor_id": str(doctor.doctor_id),
+                        "wizard_token": token,
+                    }
+                return response
 
             if is_api_request:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -418,7 +503,7 @@ class Dashboard(LoginRequiredMixin, APIView):
             )
 
     def put(self, request):
-        doctor_id = request.session.get("doctor_id")
+        doctor_id = wizard_doctor_id(request)
         if not doctor_id:
             return Response(
                 {"error": "Doctor ID not found in session"},
@@ -440,27 +525,20 @@ class Dashboard(LoginRequiredMixin, APIView):
             )
 
         if serializer.is_valid():
-            serializer.save()
             if step == "4":
-                password = request.data.get("password")
+                password = serializer.validated_data.get("password")
                 if not password:
                     return Response(
                         {"error": "Password is required for this step"},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
-                user, created = User.objects.get_or_create(email=doctor.email)
-
-                if created:
-                    user.set_password(password)
-                    user.username = doctor.user_name
-                    user.first_name = doctor.first_name
-                    user.last_name = doctor.last_name
-                    user.email = doctor.email
-                    user.save()
-                if user:
-                    user.set_password(password)
-                    user.username = doctor.user_name
-                    user.save()
+                provision_doctor_account(
+                    doctor,
+                    serializer.validated_data.get("user_name", doctor.user_name),
+                    password,
+                )
+            else:
+                serializer.save()
             return render(
                 request,
                 self.template_name,
@@ -535,13 +613,14 @@ class DoctorAvailabilityAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        DoctorAvailability.objects.filter(doctor=doctor).delete()
         serializer = DoctorAvailabilitySerializer(
             data=request.data, many=True, context={"doctor": doctor, "request": request}
         )
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic(), batched_digests():
+                DoctorAvailability.objects.filter(doctor=doctor).delete()
+                serializer.save()
             return Response(
                 {"message": "Availability created successfully"},
                 status=status.HTTP_201_CREATED,
@@ -608,21 +687,11 @@ class DoctorUserNamePasswordUpdateAPIView(APIView):
             doctor, data=request.data, partial=True
         )
         if serializer.is_valid():
-            serializer.save()
-            password = request.data.get("password")
-            user, created = User.objects.get_or_create(email=doctor.email)
-
-            if created:
-                user.set_password(password)
-                user.username = doctor.user_name
-                user.first_name = doctor.first_name
-                user.last_name = doctor.last_name
-                user.email = doctor.email
-                user.save()
-            if user:
-                user.set_password(password)
-                user.username = doctor.user_name
-                user.save()
+            provision_doctor_account(
+                doctor,
+                serializer.validated_data.get("user_name", doctor.user_name),
+                serializer.validated_data.get("password"),
+            )
             return Response(
                 {"message": "Account  updated successfully"}, status=status.HTTP_200_OK
             )
@@ -639,23 +708,17 @@ class DoctorListView(LoginRequiredMixin, APIView):
         search_query = request.GET.get("search", "")
         sort_by = request.GET.get("sort_by", "first_name")
         order = request.GET.get("order", "asc")
+        # Unknown sort keys fall back to the defaults rather than reaching
+        # order_by unvalidated.
+        if sort_by not in DOCTOR_SORT_FIELDS:
+            sort_by = "first_name"
+        if order not in ["asc", "desc"]:
+            order = "asc"
         # Get `page` and `per_page` values from the request
         page = int(request.GET.get("page", 1))
         per_page = int(request.GET.get("per_page", 10))  # Default to 6 records per page
 
-        # Apply pagination
-        doctors = Doctor.objects.prefetch_related(
-            "availabilities"
-        ).all()  # Get all doctors
-        if search_query:
-            doctors = doctors.filter(
-                Q(first_name__icontains=search_query)
-                | Q(last_name__icontains=search_query)
-                | Q(designation__icontains=search_query)
-            )
-        if order == "desc":
-            sort_by = f"-{sort_by}"
-        doctors = doctors.order_by(sort_by)
+        doctors = doctor_queryset(search_query, sort_by, order)
         paginator = Paginator(doctors, per_page)  # Paginate BEFORE processing data
         page_obj = paginator.get_page(page)
 
@@ -728,7 +791,7 @@ class DoctorListAPIView(APIView):
             openapi.Parameter(
                 "sort_by",
                 openapi.IN_QUERY,
-                description="Sort field (first_name, last_name, designation)",
+                description=f"Sort field ({', '.join(DOCTOR_SORT_FIELDS)})",
                 type=openapi.TYPE_STRING,
                 default="first_name",
             ),
@@ -757,109 +820,26 @@ class DoctorListAPIView(APIView):
         responses={200: "Success", 400: "Bad Request", 401: "Unauthorized"},
     )
     def get(self, request):
-        search_query = request.GET.get("search", "")
-        sort_by = request.GET.get("sort_by", "first_name")
-        order = request.GET.get("order", "asc")
-        page = request.GET.get("page", 1)
-        per_page = request.GET.get("per_page", 10)
-
-        valid_sort_fields = [field.name for field in Doctor._meta.fields]
-        if sort_by not in valid_sort_fields:
-            return Response(
-                {
-                    "error": f"Invalid sort_by field: {sort_by}. Available fields: {valid_sort_fields}"
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if order not in ["asc", "desc"]:
-            return Response(
-                {"error": "Invalid order parameter. Allowed values: asc, desc."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
         try:
-            page = int(page)
-            per_page = int(per_page)
-            if page < 1 or per_page < 1:
-                raise ValueError
-        except ValueError:
-            return Response(
-                {"error": "Page and per_page must be positive integers."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            params = parse_list_params(request.GET)
+        except DirectoryQueryError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
 
-        doctors = Doctor.objects.prefetch_related("availabilities").all()
-
-        if search_query:
-            doctors = doctors.filter(
-                Q(first_name__icontains=search_query)
-                | Q(last_name__icontains=search_query)
-                | Q(designation__icontains=search_query)
-            )
-
-        if order == "desc":
-            sort_by = f"-{sort_by}"
-        doctors = doctors.order_by(sort_by)
-
-        paginator = Paginator(doctors, per_page)
         try:
-            page_obj = paginator.page(page)
-        except PageNotAnInteger:
-            return Response(
-                {"error": "Page must be an integer."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        except EmptyPage:
-            return Response(
-                {"error": "Page number out of range."}, status=status.HTTP_404_NOT_FOUND
-            )
-
-        days_of_week = [
-            "sunday",
-            "monday",
-            "tuesday",
-            "wednesday",
-            "thursday",
-            "friday",
-            "saturday",
-        ]
-        doctor_data = []
-
-        for doctor in page_obj.object_list:
-            availability_map = {day: "NA" for day in days_of_week}
-            for availability in doctor.availabilities.all():
-                time_range = f"{availability.start_time.strftime('%#I%p')}-{availability.end_time.strftime('%#I%p')}"
-                if availability_map[availability.day_of_week] == "NA":
-                    availability_map[availability.day_of_week] = time_range
-                else:
-                    availability_map[availability.day_of_week] += f" <br> {time_range}"
-
-            doctor_data.append(
-                {
-                    "id": doctor.create_id,
-                    "name": f"{doctor.first_name} {doctor.last_name}",
-                    "profile_image": (
-                        doctor.update_profile.url if doctor.update_profile else None
-                    ),
-                    "designation": doctor.get_designation_display(),
-                    "availability": availability_map,
-                }
-            )
-
-        return Response(
-            {
-                "doctors": doctor_data,
-                "days_of_week": days_of_week,
-                "current_page": page_obj.number,
-                "total_pages": paginator.num_pages,
-                "per_page": per_page,
-                "search_query": search_query,
-                "sort_by": sort_by.replace("-", ""),
-                "order": order,
-            },
-            status=status.HTTP_200_OK,
+            result = read_list_payload(params, revalidate=True)
+        except DirectoryQueryError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+        response = Response(result.value, status=status.HTTP_200_OK)
+        set_cache_headers(response, result)
+        # Pages are the same for every user, but only authenticated users may
+        # see them, so shared caches must not store them.
+        patch_cache_control(
+            response,
+            private=True,
+            max_age=settings.DIRECTORY_CACHE_TTL,
+            stale_while_revalidate=settings.SINGLE_FLIGHT_FALLBACK_SECONDS,
         )
+        return response
 
 
 @schema(None)
@@ -870,9 +850,9 @@ class DoctorUpdateView(LoginRequiredMixin, APIView):
 
     def get(self, request, doctor_id):
 
-        doctor = get_object_or_404(
-            Doctor.objects.prefetch_related("availabilities"), doctor_id=doctor_id
-        )
+        doctor = get_cached_doctor(doctor_id)
+        if doctor is None:
+            raise Http404("No Doctor matches the given query.")
 
         # Fetch related availabilities
         availabilities = {
@@ -916,7 +896,6 @@ class DoctorUpdateView(LoginRequiredMixin, APIView):
             serializer = DoctorUpdateSerializer(doctor, data=data, partial=True)
         elif step == "3":
             availability_data = []
-            errors = {}
 
             # Collect availability data from the request
             for day in request.data.getlist("day_of_week"):
@@ -932,68 +911,36 @@ class DoctorUpdateView(LoginRequiredMixin, APIView):
                         }
                     )
 
-            existing_availabilities = DoctorAvailability.objects.filter(
-                doctor=doctor,
-                day_of_week__in=[item["day_of_week"] for item in availability_data],
+            _, errors = upsert_availabilities(
+                doctor,
+                availability_data,
+                UpdateDoctorAvailabilitySerializer,
+                context={"request": request},
             )
-            existing_availabilities_map = {
-                av.day_of_week: av for av in existing_availabilities
-            }
-
-            updated_instances = []
-
-            for item in availability_data:
-                day_of_week = item["day_of_week"]
-
-                # If availability already exists, update it
-                if day_of_week in existing_availabilities_map:
-                    instance = existing_availabilities_map[day_of_week]
-                    serializer = UpdateDoctorAvailabilitySerializer(
-                        instance, data=item, partial=True
-                    )
-
-                    if serializer.is_valid():
-                        saved_instance = serializer.save()
-                        updated_instances.append(saved_instance)
-                    else:
-                        errors[day_of_week] = serializer.errors
-
-                else:
-                    item["doctor"] = (
-                        doctor.doctor_id
-                    )  # Assign doctor ID for new availability
-                    serializer = UpdateDoctorAvailabilitySerializer(
-                        data=item, context={"request": request}
-                    )
-
-                    if serializer.is_valid():
-                        print("Validated Data:", serializer.validated_data)
-                        saved_instance = serializer.save()
-                        updated_instances.append(saved_instance)
-                    else:
-                        print(
-                            f"Validation Failed for {day_of_week}: {serializer.errors}"
-                        )  # Debugging
-                        errors[day_of_week] = serializer.errors
             if errors:
                 return Response({"success": False, "errors": errors}, status=400)
+            return Response(
+                {
+                    "success": True,
+                    "message": f"Doctor updated successfully for step {step}",
+                },
+                status=200,
+            )
         elif step == "4":
             serializer = DoctorUserNamePasswordSerializer(doctor, data=data)
             if serializer.is_valid():
-                serializer.save()
-                password = request.data.get("password")
-                user, created = User.objects.get_or_create(email=doctor.email)
-
-                if created:
-                    user.username = doctor.user_name
-                    user.first_name = doctor.first_name
-                    user.last_name = doctor.last_name
-                    user.set_password(password)
-                    user.save()
-                if user:
-                    user.set_password(password)
-                    user.username = doctor.user_name
-                    user.save()
+                provision_doctor_account(
+                    doctor,
+                    serializer.validated_data.get("user_name", doctor.user_name),
+                    serializer.validated_data.get("password"),
+                )
+                return Response(
+                    {
+                        "success": True,
+                        "message": f"Doctor updated successfully for step {step}",
+                    },
+                    status=200,
+                )
         else:
             return Response(
                 {"success": False, "message": "Invalid step provided"}, status=400
@@ -1013,7 +960,7 @@ class DoctorUpdateView(LoginRequiredMixin, APIView):
 
 
 @schema(None)
-class DeleteDoctorView(LoginRequiredMixin, APIView):
+class DeleteDoctorView(BearerOrLoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, doctor_id):
@@ -1027,7 +974,7 @@ class DeleteDoctorView(LoginRequiredMixin, APIView):
         return Response({"message": "Doctor deleted successfully"}, status=200)
 
 
-class DeleteDoctorViewApi(LoginRequiredMixin, APIView):
+class DeleteDoctorViewApi(BearerOrLoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, doctor_id):
@@ -1079,41 +1026,15 @@ class DoctorUpdateApiView(APIView):
                 {"error": "Invalid doctor ID format. Must be a valid UUID."}, status=400
             )
 
-        doctor = get_object_or_404(
-            Doctor.objects.prefetch_related("availabilities"), doctor_id=doctor_uuid
-        )
-
-        availabilities_list = [
-            {
-                "day_of_week": availability.day_of_week,
-                "start_time": availability.start_time.strftime("%H:%M"),
-                "end_time": availability.end_time.strftime("%H:%M"),
-            }
-            for availability in doctor.availabilities.all()
-        ]
-
-        days_of_week = [
-            "sunday",
-            "monday",
-            "tuesday",
-            "wednesday",
-            "thursday",
-            "friday",
-            "saturday",
-        ]
-
-        return Response(
-            {
-                "doctor_name": doctor.first_name,
-                "doctor_id": str(doctor.create_id),
-                "availabilities": availabilities_list,
-                "days_of_week": days_of_week,
-            },
-            status=200,
-        )
+        result = read_cached_doctor(doctor_uuid, revalidate=True)
+        if result.value is None:
+            raise Http404("No Doctor matches the given query.")
+        response = Response(schedule_payload(result.value), status=200)
+        set_cache_headers(response, result)
+        return response
 
 
-class DoctorUpdateApiViewPersonal(LoginRequiredMixin, APIView):
+class DoctorUpdateApiViewPersonal(BearerOrLoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -1154,7 +1075,7 @@ class DoctorUpdateApiViewPersonal(LoginRequiredMixin, APIView):
         return Response({"errors": serializer.errors}, status=400)
 
 
-class DoctorUpdateApiViewProfile(LoginRequiredMixin, APIView):
+class DoctorUpdateApiViewProfile(BearerOrLoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
 
@@ -1196,7 +1117,7 @@ class DoctorUpdateApiViewProfile(LoginRequiredMixin, APIView):
         return Response({"errors": serializer.errors}, status=400)
 
 
-class DoctorUpdateApiViewAvailability(LoginRequiredMixin, APIView):
+class DoctorUpdateApiViewAvailability(BearerOrLoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = (JSONParser,)
 
@@ -1248,7 +1169,6 @@ class DoctorUpdateApiViewAvailability(LoginRequiredMixin, APIView):
             print(f"Doctor with ID {doctor_id} not found in the database.")
             return Response({"error": "Doctor not found"}, status=404)
         availability_data = []
-        errors = {}
 
         for item in request.data:
             day = item.get("day_of_week")
@@ -1260,40 +1180,12 @@ class DoctorUpdateApiViewAvailability(LoginRequiredMixin, APIView):
                     {"day_of_week": day, "start_time": start_time, "end_time": end_time}
                 )
 
-        existing_availabilities = DoctorAvailability.objects.filter(
-            doctor=doctor,
-            day_of_week__in=[item["day_of_week"] for item in availability_data],
+        _, errors = upsert_availabilities(
+            doctor,
+            availability_data,
+            UpdateDoctorAvailabilitySerializer,
+            context={"request": request},
         )
-        existing_availabilities_map = {
-            av.day_of_week: av for av in existing_availabilities
-        }
-
-        updated_instances = []
-
-        for item in availability_data:
-            day_of_week = item["day_of_week"]
-
-            if day_of_week in existing_availabilities_map:
-                instance = existing_availabilities_map[day_of_week]
-                serializer = UpdateDoctorAvailabilitySerializer(
-                    instance, data=item, partial=True
-                )
-                if serializer.is_valid():
-                    saved_instance = serializer.save()
-                    updated_instances.append(saved_instance)
-                else:
-                    errors[day_of_week] = serializer.errors
-            else:
-                item["doctor"] = doctor.doctor_id
-                serializer = UpdateDoctorAvailabilitySerializer(
-                    data=item, context={"request": request}
-                )
-                if serializer.is_valid():
-                    saved_instance = serializer.save()
-                    updated_instances.append(saved_instance)
-                else:
-                    errors[day_of_week] = serializer.errors
-
         if errors:
             return Response({"success": False, "errors": errors}, status=400)
 
@@ -1303,7 +1195,7 @@ class DoctorUpdateApiViewAvailability(LoginRequiredMixin, APIView):
         )
 
 
-class DoctorUpdateApiViewAccount(LoginRequiredMixin, APIView):
+class DoctorUpdateApiViewAccount(BearerOrLoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -1337,26 +1229,167 @@ class DoctorUpdateApiViewAccount(LoginRequiredMixin, APIView):
             return Response({"error": "Doctor not found"}, status=404)
         serializer = DoctorUserNamePasswordSerializer(doctor, data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            password = request.data.get("password")
-            user, created = User.objects.get_or_create(email=doctor.email)
-            if created:
-                user.username = doctor.user_name
-                user.first_name = doctor.first_name
-                user.last_name = doctor.last_name
-                user.set_password(password)
-                user.save()
-            if user:
-                user.set_password(password)
-                user.username = doctor.user_name
-                user.save()
-
-            # ✅ Add this return statement to prevent the error
+            provision_doctor_account(
+                doctor,
+                serializer.validated_data.get("user_name", doctor.user_name),
+                serializer.validated_data.get("password"),
+            )
             return Response(
                 {"success": True, "message": "Doctor account updated successfully"},
                 status=200,
             )
 
+        return Response({"errors": serializer.errors}, status=400)
+
+
+class LoginStatsAPIView(APIView):
+    # top_emails lists other users' addresses, so admins only.
+    permission_classes = [IsAdminUser]
+    max_range_days = 366
+
+    @swagger_auto_schema(
+        tags=["Login_stats"],
+        manual_parameters=[
+            openapi.Parameter(
+                "start",
+                openapi.IN_QUERY,
+                description="First day (YYYY-MM-DD), defaults to 30 days ago",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+            ),
+            openapi.Parameter(
+                "end",
+                openapi.IN_QUERY,
+                description="Last day (YYYY-MM-DD), defaults to today",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+            ),
+            openapi.Parameter(
+                "top",
+                openapi.IN_QUERY,
+                description="Number of top login emails",
+                type=openapi.TYPE_INTEGER,
+                default=10,
+            ),
+        ],
+        responses={200: "Success", 400: "Bad Request", 401: "Unauthorized"},
+    )
+    def get(self, request):
+        try:
+            end = request.GET.get("end")
+            end = parse_date(end) if end else timezone.localdate()
+            if end is None:
+                raise ValueError
+            start = request.GET.get("start")
+            start = parse_date(start) if start else end - timedelta(days=30)
+            top = int(request.GET.get("top", 10))
+            if start is None or top < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "Use YYYY-MM-DD dates and a positive integer for top."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if start > end or (end - start).days > self.max_range_days:
+            return Response(
+                {
+                    "error": f"start must be before end and at most {self.max_range_days} days apart."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stats = login_stats(start, end, top)
+        return Response(
+            {"start": start, "end": end, **stats}, status=status.HTTP_200_OK
+        )
+
+
+class BulkOnboardingAPIView(BearerOrLoginRequiredMixin, APIView):
+    # Admins only: a row whose email matches a doctor sets that doctor's
+    # login details.
+    permission_classes = [IsAdminUser]
+    parser_classes = (MultiPartParser, FormParser)
+
+    @swagger_auto_schema(
+        tags=["Onboarding"],
+        manual_parameters=[
+            openapi.Parameter(
+                "file",
+                openapi.IN_FORM,
+                description=(
+                    "CSV with username, email, password, first_name, last_name; "
+                    "rows with a create_id also create the doctor profile"
+                ),
+                type=openapi.TYPE_FILE,
+                required=True,
+            ),
+        ],
+        responses={
+            201: "Accounts created",
+            400: "Invalid rows",
+            401: "Unauthorized",
+            413: "Too many rows; use the onboard_users command",
+        },
+    )
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "Upload a CSV file in the 'file' field."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            rows = read_onboarding_csv(upload.read())
+        except (UnicodeDecodeError, csv.Error):
+            return Response(
+                {"error": "The file is not a UTF-8 CSV."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Passwords are hashed in this request thread, never in a process
+        # pool forked from the web worker, so big files go through
+        # `manage.py onboard_users` instead.
+        if len(rows) > settings.ONBOARDING_API_MAX_ROWS:
+            return Response(
+                {
+                    "error": f"Files over {settings.ONBOARDING_API_MAX_ROWS} rows "
+                    "must be loaded with the onboard_users management command."
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        users, errors = onboard_users(rows, workers=1, created_by=request.user)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"created": len(users)}, status=status.HTTP_201_CREATED)
+
+
+class DbMetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Metrics"],
+        operation_description="Database connections opened by the worker serving the request",
+        responses={200: "Success", 403: "Staff only"},
+    )
+    def get(self, request):
+        return Response(connection_stats(), status=status.HTTP_200_OK)
+
+
+class CacheMetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Metrics"],
+        operation_description="Doctor cache and single-flight counters in the worker serving the request",
+        responses={200: "Success", 403: "Staff only"},
+    )
+    def get(self, request):
+        return Response(
+            {"doctor": doctor_cache_stats(), "single_flight": single_flight_stats()},
+            status=status.HTTP_200_OK,
+        )
+
 
 class SingleDoctorView(LoginRequiredMixin, APIView):
     permission_classes = [IsAuthenticated]
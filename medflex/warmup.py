@@ -0,0 +1,144 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+
+from .directory import DirectoryQueryError, parse_list_params, read_list_payload
+from .doctor_cache import get_doctor_for_email, read_cached_doctor
+from .models import Doctor
+
+logger = logging.getLogger(__name__)
+
+WARM_TEMPLATES = ("view_doctor.html", "dashboard.html", "update_doctor.html")
+# The default sort and its usual alternative, at the API's default page size.
+# Only the list API reads the page cache; the HTML doctor list queries
+# directly, so its page sizes are not warmed.
+WARM_SORT_FIELDS = ("first_name", "last_name")
+WARM_PER_PAGE = (10,)
+
+
+class WarmResult(NamedTuple):
+    name: str
+    entries: int
+    failed: int
+    seconds: float
+
+
+def _directory_page(params):
+    try:
+        read_list_payload(params)
+    except DirectoryQueryError:
+        # Past the last page for this per_page.
+        return 0
+    return 1
+
+
+def _doctor(doctor_id, email):
+    read_cached_doctor(doctor_id)
+    get_doctor_for_email(email)
+    return 1
+
+
+def _template(name):
+    get_template(name)
+    return 1
+
+
+def _snapshot():
+    from .snapshot import rebuild_snapshot
+
+    rebuild_snapshot(wait=True)
+    return 1
+
+
+def warm_tasks(pages, sort_fields, per_page_values, doctors):
+    # (cache name, task) pairs; each task returns how many entries it filled.
+    tasks = []
+    if settings.DIRECTORY_SNAPSHOT:
+        tasks.append(("directory snapshot", _snapshot))
+    for sort_by in sort_fields:
+        for order in ("asc", "desc"):
+            for per_page in per_page_values:
+                for page in range(1, pages + 1):
+                    params = parse_list_params(
+                        {
+                            "sort_by": sort_by,
+                            "order": order,
+                            "per_page": per_page,
+                            "page": page,
+                        }
+                    )
+                    tasks.append(("directory pages", partial(_directory_page, params)))
+    recent = Doctor.objects.order_by("-created_at").values_list("doctor_id", "email")
+    for doctor_id, email in recent[:doctors] if doctors else recent:
+        tasks.append(("doctor details", partial(_doctor, doctor_id, email)))
+    for name in WARM_TEMPLATES:
+        tasks.append(("templates", partial(_template, name)))
+    return tasks
+
+
+def run_warm_tasks(tasks, workers):
+    # Each pool thread drains the shared queue and closes its database
+    # connections once at the end. A cache's time runs from its first task
+    # starting to its last finishing.
+    pending = queue.Queue()
+    for task in tasks:
+        pending.put(task)
+    lock = threading.Lock()
+    stats = {}
+
+    def drain():
+        try:
+            while True:
+                try:
+                    name, task = pending.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                try:
+                    entries, failed = task(), 0
+                except Exception:
+                    logger.exception("Warming %s failed", name)
+                    entries, failed = 0, 1
+                end = time.perf_counter()
+                with lock:
+                    first, last, total, errors = stats.get(name, (start, end, 0, 0))
+                    stats[name] = (
+                        min(first, start),
+                        max(last, end),
+                        total + entries,
+                        errors + failed,
+                    )
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(drain) for _ in range(workers)]:
+            future.result()
+
+    names = dict.fromkeys(name for name, _ in tasks)
+    return [
+        WarmResult(
+            name, stats[name][2], stats[name][3], stats[name][1] - stats[name][0]
+        )
+        for name in names
+    ]
+
+
+def warm_caches(
+    pages=3,
+    sort_fields=WARM_SORT_FIELDS,
+    per_page_values=WARM_PER_PAGE,
+    doctors=1000,
+    workers=8,
+):
+    return run_warm_tasks(
+        warm_tasks(pages, sort_fields, per_page_values, doctors), workers
+    )
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core import signing
+
+WIZARD_COOKIE = "medflex_wizard"
+WIZARD_HEADER = "X-Wizard-Token"
+WIZARD_SALT = "medflex.wizard"
+
+
+def make_wizard_token(doctor_id):
+    return signing.dumps(str(doctor_id), salt=WIZARD_SALT)
+
+
+def set_wizard_token(response, doctor_id):
+    token = make_wizard_token(doctor_id)
+    response.set_cookie(
+        WIZARD_COOKIE,
+        token,
+        max_age=settings.WIZARD_TOKEN_MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+    )
+    return token
+
+
+def wizard_doctor_id(request):
+    for token in (
+        request.headers.get(WIZARD_HEADER),
+        request.COOKIES.get(WIZARD_COOKIE),
+    ):
+        if not token:
+            continue
+        try:
+            return signing.loads(
+                token, salt=WIZARD_SALT, max_age=settings.WIZARD_TOKEN_MAX_AGE
+            )
+        except signing.BadSignature:
+            continue
+    # Wizards started before signed tokens still carry the id in the session;
+    # lean API requests have no session at all.
+    session = getattr(request, "session", None)
+    return session.get("doctor_id") if session is not None else None
@@ -11,7 +11,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
 import os
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -56,17 +58,22 @@ INSTALLED_APPS = [
 ]
 
 
+# The medflex subclasses run as the stock middleware, except for Bearer-token
+# requests under LEAN_API_PREFIXES, which pass straight through. allauth
+# insists on its own AccountMiddleware path, so it stays as is.
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "medflex.routers.PrimaryStickinessMiddleware",
+    "medflex.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "medflex.middleware.WhiteNoiseMiddleware",
+    "medflex.middleware.CsrfViewMiddleware",
+    "medflex.middleware.AuthenticationMiddleware",
+    "medflex.middleware.MessageMiddleware",
+    "medflex.middleware.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
 ]
+LEAN_API_PREFIXES = ["/api/", "/doctor/api/", "/doctor/update/api/", "/login-stats/"]
 
 ROOT_URLCONF = "medical_admin.urls"
 
@@ -81,6 +88,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "medflex.context_processors.current_doctor",
             ],
         },
     },
@@ -98,9 +106,53 @@ WSGI_APPLICATION = "medical_admin.wsgi.application"
 #         "NAME": BASE_DIR / "db.sqlite3",
 #     }
 # }
+# Connections are kept for DB_CONN_MAX_AGE seconds and health-checked before
+# reuse. With DB_POOL on PostgreSQL and psycopg_pool installed, Django's
+# native pool replaces per-thread persistent connections, which also keeps
+# ASGI workers from holding one connection per thread.
+# Under ASGI every request does its database work on a new thread, so a
+# persistent connection is never reused and stays open until collected;
+# asgi.py sets DJANGO_ASGI and connections then close after each request
+# (without DB_POOL, anyway).
+DJANGO_ASGI = os.getenv("DJANGO_ASGI", "false").lower() in ("1", "true", "yes")
+DB_CONN_MAX_AGE = 0 if DJANGO_ASGI else int(os.getenv("DB_CONN_MAX_AGE", 600))
+DB_POOL = os.getenv("DB_POOL", "false").lower() in ("1", "true", "yes")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+
 DATABASES = {
-    'default': dj_database_url.config(default=os.getenv('DATABASE_URL'))
+    'default': dj_database_url.config(
+        default=os.getenv('DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
 }
+if (
+    DB_POOL
+    and DATABASES["default"].get("ENGINE") == "django.db.backends.postgresql"
+    and importlib.util.find_spec("psycopg_pool")
+):
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+    }
+    # Django refuses a pool combined with persistent connections.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+# Read replicas, e.g. DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3
+# locally. Reads go to a replica unless the client wrote within the last
+# REPLICA_STICKY_SECONDS; in tests the replicas mirror the primary.
+DATABASE_REPLICAS = []
+replica_urls = filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(","))
+for index, url in enumerate(replica_urls):
+    alias = f"replica_{index}"
+    DATABASES[alias] = dj_database_url.parse(
+        url.strip(), conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+    )
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["medflex.routers.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
 
 
 # Password validation
@@ -152,6 +204,21 @@ AUTHENTICATION_BACKENDS = [
     "allauth.account.auth_backends.AuthenticationBackend",
 ]
 
+# Seconds an email with no matching user is remembered by EmailBackend.
+AUTH_UNKNOWN_EMAIL_CACHE_TTL = int(os.getenv("AUTH_UNKNOWN_EMAIL_CACHE_TTL", 30))
+
+# Login audit rows are buffered and written by a background thread.
+LOGIN_LOG_ASYNC = True
+LOGIN_LOG_BATCH_SIZE = 100
+LOGIN_LOG_FLUSH_INTERVAL_MS = 1000
+LOGIN_LOG_MAX_PENDING = 10000
+
+# Raw login rows older than this are folded into daily summaries.
+LOGIN_LOG_RETENTION_DAYS = int(os.getenv("LOGIN_LOG_RETENTION_DAYS", 90))
+# Login rows are rolled up once they are this old, which leaves buffered
+# writes from every worker time to commit.
+LOGIN_ROLLUP_LAG_SECONDS = int(os.getenv("LOGIN_ROLLUP_LAG_SECONDS", 600))
+
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
 ]
@@ -160,6 +227,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 LOGIN_REDIRECT_URL = "/dashboard/"
 LOGOUT_REDIRECT_URL = "/login/"
 SOCIALACCOUNT_LOGIN_ON_GET = True
+SOCIALACCOUNT_ADAPTER = "medflex.social.CachedSocialAccountAdapter"
+# SocialApp lookups are cached per process; signals clear the local copy and
+# the TTL bounds staleness in other workers.
+SOCIAL_APP_CACHE_TTL = int(os.getenv("SOCIAL_APP_CACHE_TTL", 300))
+SOCIAL_LOGIN_WARMUP = True
 
 
 ACCOUNT_LOGIN_METHODS = {"email"}
@@ -184,8 +256,27 @@ REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
     ],
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "medflex.authentication.JWTAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    # Token bucket capacity per period, keyed by client IP and by email.
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "10/min",
+        "signup": "5/min",
+        "password_reset": "5/hour",
+    },
+    # Proxies in front of the app that append to X-Forwarded-For; the IP
+    # bucket is keyed on the address the outermost one saw. 0 ignores the
+    # header, 1 behind the Heroku router (see Procfile).
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
 }
 
+JWT_SIGNING_KEY = os.getenv("JWT_SIGNING_KEY", SECRET_KEY)
+JWT_ACCESS_TOKEN_LIFETIME = timedelta(minutes=5)
+JWT_REFRESH_TOKEN_LIFETIME = timedelta(days=1)
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
@@ -194,6 +285,84 @@ EMAIL_HOST_USER = "loggerkey314@gmail.com"
 EMAIL_HOST_PASSWORD = "otal siug cwhl rkjn"
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Outbound mail is queued in the database and sent by send_queued_emails.
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_BACKOFF_SECONDS = 60
+EMAIL_QUEUE_LEASE_SECONDS = 300
+
+# Availability changes are coalesced per doctor and mailed once per window.
+AVAILABILITY_DIGEST_WINDOW_MINUTES = 15
+
+# Seconds a cached doctor (with availabilities) is kept; writes move the
+# doctor's version on commit, so this only bounds memory for idle entries.
+DOCTOR_CACHE_TTL = int(os.getenv("DOCTOR_CACHE_TTL", 300))
+# Seconds a doctor directory page is cached; writes start a new version.
+DIRECTORY_CACHE_TTL = int(os.getenv("DIRECTORY_CACHE_TTL", 60))
+
+# Cache misses are recomputed by one request per key. The others serve the
+# previous value, kept for SINGLE_FLIGHT_FALLBACK_SECONDS, or wait up to
+# SINGLE_FLIGHT_WAIT_SECONDS before computing themselves. The lease lets
+# workers see each other's recomputes and expires if its holder dies.
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", 2))
+SINGLE_FLIGHT_POLL_SECONDS = 0.05
+SINGLE_FLIGHT_LEASE_SECONDS = int(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", 10))
+SINGLE_FLIGHT_FALLBACK_SECONDS = int(os.getenv("SINGLE_FLIGHT_FALLBACK_SECONDS", 600))
+# Stale directory pages and doctor details are refreshed by a background
+# thread; the previous value is served with X-Cache: STALE meanwhile. The
+# directory snapshot below is built the same way.
+CACHE_REVALIDATE_ASYNC = True
+
+# Directory pages can be answered from a columnar in-memory snapshot of the
+# doctor list (needs numpy) instead of the database. It is built in the
+# background, saved under DIRECTORY_SNAPSHOT_PATH so new workers start warm,
+# and refreshed from created_at/updated_at deltas that look back
+# DIRECTORY_SNAPSHOT_OVERLAP_SECONDS to cover slow commits and clock skew.
+DIRECTORY_SNAPSHOT = (
+    os.getenv("DIRECTORY_SNAPSHOT", "false").lower() in ("1", "true", "yes")
+    and importlib.util.find_spec("numpy") is not None
+)
+DIRECTORY_SNAPSHOT_PATH = os.getenv("DIRECTORY_SNAPSHOT_PATH", "/var/tmp/medflex-directory")
+DIRECTORY_SNAPSHOT_OVERLAP_SECONDS = int(os.getenv("DIRECTORY_SNAPSHOT_OVERLAP_SECONDS", 60))
+
+# Processes used by the onboard_users command to hash passwords; 0 means one
+# per available core.
+ONBOARDING_HASH_WORKERS = int(os.getenv("ONBOARDING_HASH_WORKERS", 0))
+# The onboarding endpoint hashes in the request thread, about 0.26 s per
+# PBKDF2 hash, so 50 rows (~13 s) stay well inside gunicorn's 30 s timeout;
+# larger files have to go through the onboard_users command.
+ONBOARDING_API_MAX_ROWS = int(os.getenv("ONBOARDING_API_MAX_ROWS", 50))
+
+# "shared" keeps one cache per host in a memory-mapped file (on tmpfs by
+# default), so every worker sees the same sessions, directory pages and
+# throttle buckets; "locmem" gives each process its own.
+CACHE_PROFILES = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "medflex",
+    },
+    "shared": {
+        "BACKEND": "medflex.shared_cache.SharedMemoryCache",
+        "LOCATION": os.getenv("SHARED_CACHE_PATH", "/dev/shm/medflex-cache"),
+        "OPTIONS": {
+            "MAX_SIZE": int(os.getenv("SHARED_CACHE_MAX_SIZE", 64 * 1024 * 1024)),
+        },
+    },
+}
+CACHE_PROFILE = os.getenv("CACHE_PROFILE", "locmem")
+CACHES = {"default": CACHE_PROFILES[CACHE_PROFILE]}
+
+# "cached_db" serves session reads from the cache and falls back to the
+# database; "signed_cookies" keeps no server-side session state at all.
+SESSION_PROFILES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_PROFILE = os.getenv("SESSION_PROFILE", "cached_db")
+SESSION_ENGINE = SESSION_PROFILES[SESSION_PROFILE]
+
+# Lifetime of the signed token that carries doctor_id between wizard steps.
+WIZARD_TOKEN_MAX_AGE = 60 * 60 * 24
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")